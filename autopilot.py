@@ -0,0 +1,232 @@
+"""
+Scripted player for headless runs (soak tests, benchmarks).
+
+The ship already aims and fires on its own, so the autopilot only has to
+move: it is pushed away from enemies, bosses and boss bullets, pulled towards
+orbs, power-ups and gates, and kept off the walls. It answers with the same
+kind of key state the game reads from pygame.key.get_pressed().
+
+LookaheadPilot is the reference planner on top of Game.fork(): a beam search
+that plays candidate moves out on forked games and keeps the moves whose
+futures score best.
+"""
+import random
+
+import pygame
+
+from gametime import get_ticks
+from index import SPEED_FRAME_MS, WORLD_H, WORLD_W
+
+DANGER_RADIUS = 260
+PICKUP_RADIUS = 500
+WALL_MARGIN = 250
+
+# LookaheadPilot: the moves it tries (dx, dy), and how it plays them out
+PLAN_MOVES = ((0, 0), (1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+PLAN_DEPTH = 3           # moves per plan
+PLAN_SEGMENT_STEPS = 8   # sim steps each move is held for
+PLAN_BEAM = 2            # partial plans kept after each move
+REPLAN_STEPS = 8         # sim steps between plans
+LIFE_VALUE = 20_000      # score a life is worth to the planner
+DANGER_VALUE = 1000      # score it gives up per unit of danger (see evaluate())
+
+
+class KeyState:
+    """Stand-in for pygame.key.get_pressed(): indexable by key constant."""
+
+    def __init__(self, pressed=()):
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+class Autopilot:
+    def __init__(self, bomb_threshold=12):
+        # Bomb when this many enemies are inside DANGER_RADIUS
+        self.bomb_threshold = bomb_threshold
+
+    def steer(self, game):
+        """(dx, dy) the ship would like to move in."""
+        p = game.player.pos
+        dx = dy = 0.0
+        crowd = 0
+
+        def push(x, y, weight):
+            nonlocal dx, dy
+            ox = p.x - x
+            oy = p.y - y
+            d2 = ox * ox + oy * oy
+            if 0 < d2 < DANGER_RADIUS * DANGER_RADIUS:
+                dx += ox / d2 * weight
+                dy += oy / d2 * weight
+                return True
+            return False
+
+        for en in game.enemies:
+            crowd += push(en.pos.x, en.pos.y, 60.0)
+        for boss in game.bosses:
+            push(boss.pos.x, boss.pos.y, 60.0 + boss.radius)
+        bb = game.boss_bullets
+        for x, y in bb.pos[:bb.n].tolist():
+            push(x, y, 40.0)
+
+        # Head for the nearest thing worth picking up
+        best = None
+        for thing in game.orbs + game.fire_powerups:
+            d2 = (thing.pos.x - p.x) ** 2 + (thing.pos.y - p.y) ** 2
+            if d2 < PICKUP_RADIUS * PICKUP_RADIUS and (best is None or d2 < best[0]):
+                best = (d2, thing.pos.x, thing.pos.y)
+        if best is not None and best[0] > 0:
+            d = best[0] ** 0.5
+            dx += (best[1] - p.x) / d * 0.1
+            dy += (best[2] - p.y) / d * 0.1
+
+        # Walls
+        if p.x < WALL_MARGIN:
+            dx += 0.3
+        elif p.x > WORLD_W - WALL_MARGIN:
+            dx -= 0.3
+        if p.y < WALL_MARGIN:
+            dy += 0.3
+        elif p.y > WORLD_H - WALL_MARGIN:
+            dy -= 0.3
+        return dx, dy, crowd
+
+    def keys(self, game):
+        """Return (KeyState to hold, list of keys to press this step)."""
+        dx, dy, crowd = self.steer(game)
+        pressed = []
+        if dx > 0.05:
+            pressed.append(pygame.K_d)
+        elif dx < -0.05:
+            pressed.append(pygame.K_a)
+        if dy > 0.05:
+            pressed.append(pygame.K_s)
+        elif dy < -0.05:
+            pressed.append(pygame.K_w)
+
+        taps = []
+        if crowd >= self.bomb_threshold and game.bombs > 0:
+            taps.append(pygame.K_e)
+        elif crowd >= self.bomb_threshold // 2:
+            taps.append(pygame.K_SPACE)  # boost away (no-op while on cooldown)
+        return KeyState(pressed), taps
+
+
+def move_keys(dx, dy):
+    """KeyState holding the WASD keys for a (dx, dy) move."""
+    pressed = []
+    if dx:
+        pressed.append(pygame.K_d if dx > 0 else pygame.K_a)
+    if dy:
+        pressed.append(pygame.K_s if dy > 0 else pygame.K_w)
+    return KeyState(pressed)
+
+
+def evaluate(game):
+    """
+    How good a (forked) game looks: score, lives and pickups, minus danger
+    close by (enemies, boss bullets, bosses, walls), with a pull toward the
+    nearest pickup, like the reactive pilot's forces.
+    """
+    p = game.player.pos
+    px, py = p.x, p.y
+    value = game.score + LIFE_VALUE * game.player.lives
+    if game.state != "playing":
+        value -= LIFE_VALUE  # dead (respawning) or over
+    value += 300 * game.orbs_collected + 3000 * game.powerups_collected
+
+    r2 = DANGER_RADIUS * DANGER_RADIUS
+    danger = 0.0
+    for en in game.enemies:
+        d2 = (en.pos.x - px) ** 2 + (en.pos.y - py) ** 2
+        if d2 < r2:
+            danger += (1.0 - d2 / r2) ** 2
+    bb = game.boss_bullets
+    for x, y in bb.pos[:bb.n].tolist():
+        d2 = (x - px) ** 2 + (y - py) ** 2
+        if d2 < r2:
+            danger += (1.0 - d2 / r2) ** 2
+    for boss in game.bosses:
+        d = max(0.0, boss.pos.distance_to(p) - boss.radius)
+        if d < DANGER_RADIUS:
+            danger += 4.0 * (1.0 - d / DANGER_RADIUS) ** 2
+    for d in (px, WORLD_W - px, py, WORLD_H - py):
+        if d < WALL_MARGIN:
+            danger += 2.0 * (1.0 - d / WALL_MARGIN) ** 2
+    value -= DANGER_VALUE * danger
+
+    best = PICKUP_RADIUS * PICKUP_RADIUS
+    for thing in game.orbs + game.fire_powerups:
+        best = min(best, (thing.pos.x - px) ** 2 + (thing.pos.y - py) ** 2)
+    return value - best ** 0.5
+
+
+class LookaheadPilot:
+    """
+    Beam search over forked games. Every `replan_steps` steps it forks the
+    game once per move, plays each for `segment_steps` steps, keeps the
+    `beam` best, extends those by every move again, and so on to `depth`
+    moves; it then holds the first move of the best plan. Bombs and boosts
+    are left to the reactive Autopilot's rule.
+
+    Rollouts draw from the global random module like the game does. Each
+    one starts from the game's random state, so all moves are judged on the
+    same spawns, and the state is put back after planning: the real game sees
+    the same random stream whether or not a planner is looking ahead.
+    """
+
+    def __init__(self, depth=PLAN_DEPTH, segment_steps=PLAN_SEGMENT_STEPS, beam=PLAN_BEAM,
+                 replan_steps=REPLAN_STEPS, step_ms=SPEED_FRAME_MS):
+        self.depth = depth
+        self.segment_steps = segment_steps
+        self.beam = beam
+        self.replan_steps = replan_steps
+        self.step_ms = step_ms
+        self.reactive = Autopilot()
+        self.move = (0, 0)
+        self.until_replan = 0
+        # Totals, for benchmarks
+        self.plans = 0
+        self.forks = 0
+        self.rollout_steps = 0
+
+    def plan(self, game, now):
+        """The first move of the best `depth`-move plan from `game` at `now`."""
+        state = random.getstate()
+        step = self.step_ms
+        beams = [(None, game)]
+        for depth in range(self.depth):
+            start = now + depth * self.segment_steps * step
+            scored = []
+            for first, base in beams:
+                for move in PLAN_MOVES:
+                    random.setstate(state)
+                    fork = base.fork()
+                    keys = move_keys(*move)
+                    t = start
+                    for _ in range(self.segment_steps):
+                        fork.update(keys, step, t)
+                        t += step
+                    scored.append((evaluate(fork), first or move, fork))
+            self.forks += len(scored)
+            self.rollout_steps += len(scored) * self.segment_steps
+            # Stable sort: on ties the earlier move (standing still first) wins
+            scored.sort(key=lambda s: -s[0])
+            beams = [(first, fork) for _, first, fork in scored[:self.beam]]
+        random.setstate(state)
+        self.plans += 1
+        return beams[0][0]
+
+    def keys(self, game, now=None):
+        """Return (KeyState to hold, list of keys to press this step)."""
+        _, taps = self.reactive.keys(game)
+        if game.state != "playing":
+            self.until_replan = 0
+            return KeyState(), taps
+        if self.until_replan <= 0:
+            self.move = self.plan(game, get_ticks() if now is None else now)
+            self.until_replan = self.replan_steps
+        self.until_replan -= 1
+        return move_keys(*self.move), taps
@@ -0,0 +1,1122 @@
+"""
+Headless benchmarks for the game loop.
+
+    python bench.py pipeline --frames 600 --enemies 400
+    python bench.py history --runs 50000
+    python bench.py collision --shots 2000
+    python bench.py bullets --bullets 1000 5000 20000
+    python bench.py particles --budget 4000 --kills 20
+    python bench.py spectate --viewers 200 --slow 10
+    python bench.py leaderboard
+    python bench.py lod --near 100 --horde 500 2000 8000
+    python bench.py flowfield --enemies 500 2000 8000 --walls 12
+    python bench.py minimap --enemies 200 1000 4000
+    python bench.py world --size 50000x50000 --steps 20000
+    python bench.py swarm --groups 4 16 64
+    python bench.py separation --enemies 500 2000 8000
+    python bench.py parallel --rows 100000 1000000 --workers 1 2 4 8
+    python bench.py lookahead --enemies 0 200 1000 --seconds 60
+
+Uses SDL's dummy video driver unless SDL_VIDEODRIVER is already set, so it runs
+on machines without a display.
+"""
+import argparse
+import asyncio
+import copy
+import hashlib
+import json
+import math
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+import index
+import gametime
+from autopilot import PLAN_MOVES, Autopilot, KeyState, LookaheadPilot
+from bullet_patterns import BulletBuffer, compile_pattern
+from collision import first_hit, sweep_toi
+from flowfield import FlowField
+from fonts import FontCache
+from formations import FORMATIONS
+from frame_stats import percentile
+from gametime import get_ticks
+import leaderboard_client
+from leaderboard_client import LeaderboardClient
+from lod import SimLod
+from minimap import Minimap
+from parallel import CHUNK_ROWS, ChunkPool, attract
+from particles import ParticleSystem
+from pipeline import run_pipelined
+from run_history import RunHistory
+from separation import separation, separation_brute
+from spectator import HEADER, SpectatorServer, StateDecoder, StateEncoder
+from world import parse_size as parse_world_size
+
+
+def make_bench_game(enemy_count, seed):
+    """A started game with a pre-filled horde and an invincible player."""
+    random.seed(seed)
+    game = index.Game()
+    game.state = "playing"
+    game.game_start_time = pygame.time.get_ticks()
+    game.player.invincible = True
+    game.player.invincible_until = float("inf")
+    for _ in range(enemy_count):
+        t = random.choice(list(index.ENEMY_TYPES))
+        game.enemies.append(index.Enemy(t, random.uniform(0, index.WORLD_W),
+                                        random.uniform(0, index.WORLD_H)))
+    game.take_lod_slots(game.enemies)
+    return game
+
+
+def run_loop_mode(mode, args):
+    game = make_bench_game(args.enemies, args.seed)
+    renderer = index.Renderer(pygame.display.get_surface(), FontCache(args.font_cache))
+    latencies = []
+    frames = [0]
+
+    def on_present(snap):
+        latencies.append((time.perf_counter() - snap.published_at) * 1000.0)
+        frames[0] += 1
+        if frames[0] == args.frames:
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    steps_before = game.seq
+    start = time.perf_counter()
+    if mode == "serial":
+        index.run_serial(game, renderer, fps=args.fps, on_present=on_present,
+                         max_fps=args.max_fps)
+    else:
+        run_pipelined(game, renderer, args.fps, on_present=on_present, max_fps=args.max_fps)
+    wall = time.perf_counter() - start
+
+    return {
+        "mode": mode,
+        "frames": frames[0],
+        "sim_steps": game.seq - steps_before,
+        "fps": frames[0] / wall,
+        "sim_hz": (game.seq - steps_before) / wall,
+        "lat_mean": statistics.fmean(latencies) if latencies else 0.0,
+        "lat_p50": percentile(latencies, 50),
+        "lat_p95": percentile(latencies, 95),
+        "lat_p99": percentile(latencies, 99),
+    }
+
+
+def bench_pipeline(args):
+    pygame.init()
+    pygame.display.set_mode((args.width, args.height))
+
+    cap = args.fps if args.max_fps is None else args.max_fps or "none"
+    print(f"{args.enemies} enemies, {args.frames} frames, sim {args.fps} Hz, "
+          f"fps cap {cap}, {args.width}x{args.height}")
+    print(f"{'mode':<10}{'frames/s':>10}{'sim Hz':>10}"
+          f"{'lat mean':>10}{'p50':>8}{'p95':>8}{'p99':>8}  (ms)")
+    for mode in ("serial", "pipelined"):
+        r = run_loop_mode(mode, args)
+        print(f"{r['mode']:<10}{r['fps']:>10.1f}{r['sim_hz']:>10.1f}"
+              f"{r['lat_mean']:>10.2f}{r['lat_p50']:>8.2f}{r['lat_p95']:>8.2f}{r['lat_p99']:>8.2f}")
+
+    pygame.quit()
+
+
+def bench_history(args):
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        history = RunHistory(os.path.join(tmp, "runs.sqlite3"))
+        start_ts = time.time() - args.runs * 600
+        runs = []
+        for i in range(args.runs):
+            duration = rng.uniform(20, 1200)
+            runs.append({
+                "ended_at": start_ts + i * 600,
+                "duration_s": duration,
+                "score": int(duration ** 2 * rng.uniform(0.5, 2.0)),
+                "enemies_killed": int(duration * rng.uniform(1, 4)),
+            })
+
+        t0 = time.perf_counter()
+        for i in range(0, len(runs), 256):
+            history.insert_many(runs[i:i + 256])
+        print(f"inserted {args.runs} runs in {time.perf_counter() - t0:.2f}s")
+
+        queries = [
+            ("personal_best", lambda: history.personal_best()),
+            ("top(10)", lambda: history.top(10)),
+            ("top(10, duration)", lambda: history.top(10, by="duration_s")),
+            ("percentile", lambda: history.percentile(rng.randint(0, 1_000_000))),
+            ("trend(100)", lambda: history.trend(100)),
+            ("summarize", lambda: history.summarize(rng.randint(0, 1_000_000))),
+        ]
+        print(f"{'query':<20}{'mean ms':>10}{'max ms':>10}")
+        for name, fn in queries:
+            times = []
+            for _ in range(args.repeat):
+                t = time.perf_counter()
+                fn()
+                times.append((time.perf_counter() - t) * 1000.0)
+            print(f"{name:<20}{statistics.fmean(times):>10.3f}{max(times):>10.3f}")
+        history.close()
+
+
+def shot_hits(rng_state, step_ms, swept, duration_ms=1500):
+    """Fire one bullet at one approaching enemy; True if it registers a hit."""
+    random.setstate(rng_state)
+    player = index.Player(index.WORLD_W / 2, index.WORLD_H / 2)
+    # Pentagons are left out: their wobble follows the wall clock, which would
+    # make runs at different step sizes disagree for reasons unrelated to hits.
+    kinds = [k for k in index.ENEMY_TYPES if k != "pentagon"]
+    en = index.Enemy(random.choice(kinds),
+                     player.pos.x + random.uniform(-600, 600),
+                     player.pos.y + random.uniform(-600, 600))
+    # Aim at the enemy with some spread so near-misses are part of the mix
+    aim = en.pos - player.pos
+    aim.rotate_ip(random.uniform(-4, 4))
+    b = index.Bullet(player.pos.x, player.pos.y, aim)
+
+    t = 0
+    while t < duration_ms:
+        b.update(step_ms)
+        en.update(player, step_ms)
+        t += step_ms
+        if swept:
+            if sweep_toi(b.prev_pos, b.pos, b.radius, en.prev_pos, en.pos, en.radius) is not None:
+                return True
+        elif index.circle_coll(b.pos, b.radius, en.pos, en.radius):
+            return True
+    return False
+
+
+def bench_collision(args):
+    rng = random.Random(args.seed)
+    states = []
+    for _ in range(args.shots):
+        random.seed(rng.random())
+        states.append(random.getstate())
+
+    truth = [shot_hits(s, 1, swept=True) for s in states]
+    print(f"{args.shots} shots, {sum(truth)} hits at 1 ms steps (ground truth)")
+    print(f"{'sim Hz':>8}{'method':>8}{'hits':>8}{'missed':>8}{'extra':>8}{'us/shot':>10}")
+    for hz in args.rates:
+        step = 1000.0 / hz
+        for swept in (False, True):
+            t0 = time.perf_counter()
+            got = [shot_hits(s, step, swept) for s in states]
+            us = (time.perf_counter() - t0) * 1e6 / len(states)
+            missed = sum(1 for g, want in zip(got, truth) if want and not g)
+            extra = sum(1 for g, want in zip(got, truth) if g and not want)
+            print(f"{hz:>8}{'swept' if swept else 'point':>8}{sum(got):>8}"
+                  f"{missed:>8}{extra:>8}{us:>10.1f}")
+
+
+class ObjectBullet:
+    """Per-object boss bullet, as bosses used to fire them (the baseline)."""
+
+    def __init__(self, x, y, direction):
+        self.pos = pygame.math.Vector2(x, y)
+        self.prev_pos = self.pos.copy()
+        self.radius = index.BOSS_BULLET_RADIUS
+        self.vel = direction.normalize() * 6
+
+    def update(self, dt):
+        self.prev_pos.update(self.pos)
+        self.pos += self.vel * (dt / index.SPEED_FRAME_MS)
+
+    def offscreen(self):
+        return (
+            self.pos.x < -50 or self.pos.x > index.WORLD_W + 50 or
+            self.pos.y < -50 or self.pos.y > index.WORLD_H + 50
+        )
+
+
+def bench_bullets(args):
+    step = 1000.0 / index.FPS
+    player = index.Player(index.WORLD_W / 2, index.WORLD_H / 2)
+    cx, cy = index.WORLD_W / 2, index.WORLD_H / 2 - 300
+    print(f"{'bullets':>8}{'mode':>9}{'spawn ms':>10}{'step ms':>10}{'hit ms':>10}{'snap ms':>10}")
+    for count in args.bullets:
+        # Rings fired from a point so every bullet stays on screen for the run
+        pattern = compile_pattern({"kind": "ring", "count": count, "interval_ms": 0, "speed": 1})
+
+        t0 = time.perf_counter()
+        buf = BulletBuffer(index.WORLD_W, index.WORLD_H, index.BOSS_BULLET_RADIUS)
+        pattern.fire(buf, 0.0, cx, cy, 0, 0, 0)
+        t1 = time.perf_counter()
+        for _ in range(args.steps):
+            buf.update(step / index.SPEED_FRAME_MS)
+        t2 = time.perf_counter()
+        for _ in range(args.steps):
+            buf.first_hit(player)
+        t3 = time.perf_counter()
+        for _ in range(args.steps):
+            buf.rows()
+        t4 = time.perf_counter()
+        print(f"{count:>8}{'buffer':>9}{(t1 - t0) * 1000:>10.2f}"
+              f"{(t2 - t1) * 1000 / args.steps:>10.3f}{(t3 - t2) * 1000 / args.steps:>10.3f}"
+              f"{(t4 - t3) * 1000 / args.steps:>10.3f}")
+
+        t0 = time.perf_counter()
+        objs = []
+        for i in range(count):
+            ang = 2 * math.pi * i / count
+            objs.append(ObjectBullet(cx, cy, pygame.math.Vector2(math.cos(ang), math.sin(ang))))
+        t1 = time.perf_counter()
+        for _ in range(args.steps):
+            for bb in objs:
+                bb.update(step)
+            objs = [bb for bb in objs if not bb.offscreen()]
+        t2 = time.perf_counter()
+        for _ in range(args.steps):
+            first_hit(player, objs)
+        t3 = time.perf_counter()
+        for _ in range(args.steps):
+            tuple((bb.pos.x, bb.pos.y, bb.prev_pos.x, bb.prev_pos.y) for bb in objs)
+        t4 = time.perf_counter()
+        print(f"{count:>8}{'objects':>9}{(t1 - t0) * 1000:>10.2f}"
+              f"{(t2 - t1) * 1000 / args.steps:>10.3f}{(t3 - t2) * 1000 / args.steps:>10.3f}"
+              f"{(t4 - t3) * 1000 / args.steps:>10.3f}")
+
+
+def bench_particles(args):
+    pygame.init()
+    screen = pygame.display.set_mode((args.width, args.height))
+    renderer = index.Renderer(screen, FontCache(args.font_cache))
+    rng = random.Random(args.seed)
+    step = 1000.0 / index.FPS
+    colors = [d["color"] for d in index.ENEMY_TYPES.values()]
+
+    print(f"{args.kills} kills/frame, {args.frames} frames")
+    print(f"{'budget':>8}{'live':>8}{'evicted':>10}{'emit ms':>10}{'update ms':>11}"
+          f"{'rows ms':>10}{'draw ms':>10}")
+    for budget in args.budget:
+        ps = ParticleSystem(budget, seed=args.seed)
+        t_emit = t_update = t_rows = t_draw = 0.0
+        for _ in range(args.frames):
+            t0 = time.perf_counter()
+            for _ in range(args.kills):
+                ps.explode(rng.uniform(0, args.width), rng.uniform(0, args.height),
+                           14, rng.choice(colors))
+            t1 = time.perf_counter()
+            ps.update(step)
+            t2 = time.perf_counter()
+            rows = ps.rows()
+            t3 = time.perf_counter()
+            blits = []
+            for x, y, ox, oy, color, level in rows:
+                sprite = renderer.particle_sprites.get((color, level)) or \
+                    renderer.particle_sprite(color, level)
+                blits.append((sprite, (x, y)))
+            screen.blits(blits, False)
+            t4 = time.perf_counter()
+            t_emit += t1 - t0
+            t_update += t2 - t1
+            t_rows += t3 - t2
+            t_draw += t4 - t3
+        n = args.frames / 1000.0
+        print(f"{budget:>8}{len(ps):>8}{ps.evicted:>10}{t_emit / n:>10.3f}{t_update / n:>11.3f}"
+              f"{t_rows / n:>10.3f}{t_draw / n:>10.3f}")
+    pygame.quit()
+
+
+def lod_horde(near, total, seed):
+    """`near` enemies within 900 px of a centred player, the rest beyond 1000 px."""
+    rng = random.Random(seed)
+    random.seed(seed)
+    player = index.Player(index.WORLD_W / 2, index.WORLD_H / 2)
+    kinds = list(index.ENEMY_TYPES)
+    enemies = []
+    while len(enemies) < total:
+        x = rng.uniform(0, index.WORLD_W)
+        y = rng.uniform(0, index.WORLD_H)
+        d = math.hypot(x - player.pos.x, y - player.pos.y)
+        if (len(enemies) < near and d < 900) or (len(enemies) >= near and d >= 1000):
+            en = index.Enemy(rng.choice(kinds), x, y)
+            en.lod_slot = len(enemies)
+            enemies.append(en)
+    return player, enemies
+
+
+def bench_lod(args):
+    # Short bursts from a fresh horde, so the near/far split stays as set up
+    # instead of the whole horde closing in on the player over the run.
+    step = 1000.0 / index.FPS
+    print(f"{args.near} near enemies, {args.repeat} x {args.steps} steps, "
+          f"bands {index.ENEMY_LOD_BANDS}")
+    print(f"{'horde':>8}{'full ms':>10}{'lod ms':>10}{'updates':>10}{'speedup':>9}"
+          f"  per band at start")
+    for total in args.horde:
+        full = reduced = 0.0
+        updates = 0
+        for r in range(args.repeat):
+            player, enemies = lod_horde(args.near, total, args.seed + r)
+            t0 = time.perf_counter()
+            for _ in range(args.steps):
+                for en in enemies:
+                    en.update(player, step)
+            full += time.perf_counter() - t0
+
+            player, enemies = lod_horde(args.near, total, args.seed + r)
+            lod = SimLod(index.ENEMY_LOD_BANDS)
+            bands = lod.counts(enemies, player)
+            t0 = time.perf_counter()
+            for _ in range(args.steps):
+                lod.update(enemies, player, step)
+                updates += lod.updated
+            reduced += time.perf_counter() - t0
+        n = args.repeat * args.steps
+        print(f"{total:>8}{full * 1000.0 / n:>10.3f}{reduced * 1000.0 / n:>10.3f}"
+              f"{updates / n:>10.0f}{full / reduced:>8.1f}x  {bands}")
+
+
+def bench_flowfield(args):
+    step = 1000.0 / index.FPS
+    rng = random.Random(args.seed)
+    walls = [(rng.uniform(0, index.WORLD_W), rng.uniform(0, index.WORLD_H))
+             for _ in range(args.walls)]
+    print(f"{args.walls} walls (r={args.wall_radius}), cell {args.cell}, {args.steps} steps, "
+          f"player circling the centre")
+    print(f"{'enemies':>8}{'field ms':>10}{'steer ms':>10}{'direct ms':>11}"
+          f"{'recomputes':>12}{'in walls':>10}{'direct':>8}")
+    for count in args.enemies:
+        results = []
+        for use_field in (True, False):
+            random.seed(args.seed)
+            rng = random.Random(args.seed)
+            field = FlowField(index.WORLD_W, index.WORLD_H, args.cell)
+            for x, y in walls:
+                field.block(x, y, args.wall_radius)
+            player = index.Player(index.WORLD_W / 2, index.WORLD_H / 2)
+            kinds = [k for k in index.ENEMY_TYPES if k != "pentagon"]
+            enemies = [index.Enemy(rng.choice(kinds), rng.uniform(0, index.WORLD_W),
+                                   rng.uniform(0, index.WORLD_H)) for _ in range(count)]
+            t_field = t_steer = 0.0
+            for i in range(args.steps):
+                a = i * 0.01
+                player.pos.update(index.WORLD_W / 2 + 600 * math.cos(a),
+                                  index.WORLD_H / 2 + 400 * math.sin(a))
+                t0 = time.perf_counter()
+                if use_field:
+                    field.update(player.pos.x, player.pos.y)
+                t1 = time.perf_counter()
+                for en in enemies:
+                    en.update(player, step, field if use_field else None)
+                t_field += t1 - t0
+                t_steer += time.perf_counter() - t1
+            stuck = sum(1 for en in enemies
+                        if field.cost[field.cell_of(en.pos.x, en.pos.y)] == math.inf)
+            results.append((t_field, t_steer, field.recomputes, stuck))
+        (t_field, t_steer, recomputes, stuck), (_, t_direct, _, stuck_direct) = results
+        n = args.steps / 1000.0
+        print(f"{count:>8}{t_field / n:>10.3f}{t_steer / n:>10.3f}{t_direct / n:>11.3f}"
+              f"{recomputes:>12}{stuck:>10}{stuck_direct:>8}")
+
+
+def bench_minimap(args):
+    pygame.init()
+    screen = pygame.display.set_mode((args.width, args.height))
+    step = 1000.0 / index.FPS
+    print(f"{args.frames} frames at {index.FPS} Hz, refresh every {args.refresh_ms} ms, "
+          f"orbs and boss bullets = enemies / 2")
+    print(f"{'enemies':>8}{'rebuild ms':>12}{'rebuilds':>10}{'per frame ms':>14}")
+    for count in args.enemies:
+        game = make_bench_game(count, args.seed)
+        for _ in range(count // 2):
+            game.orbs.append(index.Orb(random.uniform(0, index.WORLD_W),
+                                       random.uniform(0, index.WORLD_H)))
+        game.boss_bullets.spawn(
+            [(random.uniform(0, index.WORLD_W), random.uniform(0, index.WORLD_H))
+             for _ in range(count // 2)], [(0.0, 0.0)] * (count // 2))
+        minimap = Minimap(index.WORLD_W, index.WORLD_H, refresh_ms=args.refresh_ms)
+        snaps = []
+        now = 0.0
+        for _ in range(args.frames):
+            snaps.append(game.snapshot(now)._replace(now=now))
+            now += step
+        p = game.player.pos
+        t0 = time.perf_counter()
+        for snap in snaps:
+            minimap.draw(screen, snap, p.x, p.y, 0, 0)
+        total = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for snap in snaps[:50]:
+            minimap._rebuild(snap, 0, 0)
+        rebuild = (time.perf_counter() - t0) / 50
+        print(f"{count:>8}{rebuild * 1000:>12.3f}{minimap.rebuilds - 50:>10}"
+              f"{total * 1000 / args.frames:>14.3f}")
+    pygame.quit()
+
+
+def legacy_star_update(en, player, dt, lateral):
+    """Per-member star steering as it was before formations (baseline)."""
+    en.prev_pos.update(en.pos)
+    predicted_pos = player.pos + player.vel * 18
+    to_target = predicted_pos - en.pos
+    if to_target.length_squared() == 0:
+        return
+    dir_norm = to_target.normalize()
+    perp = pygame.math.Vector2(-dir_norm.y, dir_norm.x)
+    desired = dir_norm + perp * lateral
+    if desired.length_squared() > 0:
+        desired = desired.normalize() * (en.speed * dt / index.SPEED_FRAME_MS)
+    en.pos += desired
+
+
+def bench_swarm(args):
+    step = 1000.0 / index.FPS
+    shapes = sorted(FORMATIONS)
+    print(f"groups of {index.STAR_GROUP_SIZE}, shapes {shapes} in turn, {args.steps} steps, "
+          f"player circling, best of {args.repeat}")
+    print(f"{'groups':>7}{'members':>9}{'per-member ms':>15}{'formation ms':>14}"
+          f"{'us/member':>11}{'speedup':>9}")
+    for groups in args.groups:
+        results = [math.inf, math.inf]
+        for use_formations in [False, True] * args.repeat:
+            random.seed(args.seed)
+            player = index.Player(index.WORLD_W / 2, index.WORLD_H / 2)
+            formations = []
+            members = []
+            for g in range(groups):
+                formation, group = index.spawn_star_group(player.pos, shapes[g % len(shapes)])
+                formations.append(formation)
+                members += group
+            t0 = time.perf_counter()
+            for i in range(args.steps):
+                a = i * 0.02
+                player.prev_pos.update(player.pos)
+                player.pos.update(index.WORLD_W / 2 + 500 * math.cos(a),
+                                  index.WORLD_H / 2 + 300 * math.sin(a))
+                player.vel = player.pos - player.prev_pos
+                if use_formations:
+                    for formation in formations:
+                        formation.update(player, step, index.SPEED_FRAME_MS)
+                    for en in members:
+                        en.update(player, step)
+                else:
+                    for en in members:
+                        legacy_star_update(en, player, step, (en.slot - 2) * 0.9)
+            ms = (time.perf_counter() - t0) * 1000.0 / args.steps
+            results[use_formations] = min(results[use_formations], ms)
+        legacy, grouped = results
+        n = len(members)
+        print(f"{groups:>7}{n:>9}{legacy:>15.3f}{grouped:>14.3f}"
+              f"{grouped * 1000.0 / n:>11.2f}{legacy / grouped:>8.1f}x")
+
+
+def bench_separation(args):
+    step = 1000.0 / index.FPS
+    r = index.SEPARATION_RADIUS
+    print(f"radius {r} px, one enemy per {args.spacing:.0f}x{args.spacing:.0f} px around the "
+          f"player, best of {args.repeat}; all-pairs only up to {args.brute_max}")
+    print(f"{'enemies':>8}{'pairs/enemy':>13}{'grid ms':>9}{'us/enemy':>10}{'all-pairs ms':>14}"
+          f"{'max diff':>10}{'in game ms':>12}{'separated':>11}")
+    for count in args.enemies:
+        rng = np.random.default_rng(args.seed)
+        side = math.sqrt(count) * args.spacing
+        xs = rng.uniform(0, side, count)
+        ys = rng.uniform(0, side, count)
+        grid = brute = math.inf
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            px, py = separation(xs, ys, r)
+            grid = min(grid, time.perf_counter() - t0)
+        pairs = np.count_nonzero(
+            np.hypot(xs[:, None] - xs[None, :], ys[:, None] - ys[None, :]) < r) - count \
+            if count <= args.brute_max else None
+        brute_cell = diff_cell = "-"
+        if count <= args.brute_max:
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                bx, by = separation_brute(xs, ys, r)
+                brute = min(brute, time.perf_counter() - t0)
+            brute_cell = f"{brute * 1000:.3f}"
+            diff_cell = f"{max(abs(px - bx).max(), abs(py - by).max()):.0e}"
+        # Past --brute-max, estimate neighbours per enemy from a sample
+        if pairs is None:
+            pairs = sum(np.count_nonzero(np.hypot(xs - x, ys - y) < r) - 1
+                        for x, y in zip(xs[:200], ys[:200])) * count / 200
+
+        game = make_bench_game(0, args.seed)
+        p = game.player.pos
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            t = random.choice(list(index.ENEMY_TYPES))
+            game.enemies.append(index.Enemy(t, p.x + x - side / 2, p.y + y - side / 2))
+        reach = index.ENEMY_LOD_BANDS[1][0]
+        separated = sum(1 for en in game.enemies if en.pos.distance_to(p) < reach)
+        in_game = math.inf
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            game.separate_enemies(step)
+            in_game = min(in_game, time.perf_counter() - t0)
+        print(f"{count:>8}{pairs / count:>13.1f}{grid * 1000:>9.3f}{grid * 1e6 / count:>10.2f}"
+              f"{brute_cell:>14}{diff_cell:>10}{in_game * 1000:>12.3f}{separated:>11}")
+
+
+def parallel_scene(rows, seed):
+    """Boss bullets and orb arrays (pos, prev, vel) spread over the world."""
+    rng = np.random.default_rng(seed)
+    size = (index.WORLD_W, index.WORLD_H)
+    bullets = BulletBuffer(*size, capacity=rows)
+    angle = rng.uniform(0, 2 * math.pi, rows)
+    bullets.spawn(rng.uniform(0, 1, (rows, 2)) * size,
+                  np.column_stack((np.cos(angle), np.sin(angle))) * 5.0)
+    orbs = (rng.uniform(0, 1, (rows, 2)) * size, np.zeros((rows, 2)),
+            rng.uniform(-0.8, 0.8, (rows, 2)))
+    return bullets, orbs
+
+
+def bench_parallel(args):
+    tx, ty = index.WORLD_W / 2, index.WORLD_H / 2
+    radius = math.hypot(tx, ty) / 2  # so about a fifth of the orbs are being pulled
+    print(f"{os.cpu_count()} CPUs, chunks of {args.chunk} rows, {args.steps} steps of "
+          f"boss bullets moved and culled + orbs attracted, best of {args.repeat}")
+    print(f"{'rows':>9}{'workers':>9}{'ms/step':>10}{'ns/row':>8}{'speedup':>9}  digest")
+    for rows in args.rows:
+        single = None
+        digests = set()
+        for workers in [0] + args.workers:
+            pool = ChunkPool(workers, args.chunk) if workers else None
+            best = math.inf
+            for _ in range(args.repeat):
+                bullets, orbs = parallel_scene(rows, args.seed)
+                t0 = time.perf_counter()
+                for _ in range(args.steps):
+                    bullets.update(1.0, pool)
+                    if pool is None:
+                        attract(0, rows, *orbs, tx, ty, radius, index.ORB_ATTRACT_SPEED, 1.0, True)
+                    else:
+                        pool.run(attract, rows, *orbs, tx, ty, radius,
+                                 index.ORB_ATTRACT_SPEED, 1.0, True)
+                best = min(best, (time.perf_counter() - t0) / args.steps)
+            if pool is not None:
+                pool.close()
+            digest = hashlib.sha1(bullets.pos[:bullets.n].tobytes() + orbs[0].tobytes())
+            digests.add(digest.hexdigest()[:12])
+            if workers == 1:
+                single = best
+            speedup = f"{single / best:.2f}x" if single else "-"
+            print(f"{rows:>9}{workers or 'serial':>9}{best * 1000:>10.3f}{best * 1e9 / rows / 2:>8.1f}"
+                  f"{speedup:>9}  {digest.hexdigest()[:12]}")
+        print(f"{'':>9}{'identical results' if len(digests) == 1 else 'RESULTS DIFFER'}")
+
+
+def play_headless(pilot, seconds, seed):
+    """Play a run from the start menu with `pilot`; (game, wall seconds)."""
+    clock = {"now": 0.0}
+    gametime.set_source(lambda: int(clock["now"]))
+    random.seed(seed)
+    game = index.Game()
+    game.handle_key(pygame.K_RETURN, 0.0)
+    step = 1000.0 / index.FPS
+    t0 = time.perf_counter()
+    for _ in range(int(seconds * index.FPS)):
+        now = clock["now"]
+        if game.state == "game_over":
+            break
+        keys, taps = pilot.keys(game)
+        for key in taps:
+            game.handle_key(key, now)
+        game.update(keys, step, now)
+        clock["now"] += step
+    wall = time.perf_counter() - t0
+    gametime.set_source(None)
+    return game, wall
+
+
+def bench_lookahead(args):
+    pygame.init()
+    step = 1000.0 / index.FPS
+    print(f"Game.fork() vs copy.deepcopy, best of {args.repeat}; rollouts of "
+          f"{index.FPS // 10} steps (100 ms)")
+    print(f"{'enemies':>8}{'fork us':>9}{'forks/s':>9}{'deepcopy us':>13}{'rollout ms':>12}"
+          f"{'rollouts/s':>12}")
+    keys = KeyState()
+    for count in args.enemies:
+        game = make_bench_game(count, args.seed)
+        game.update(keys, step, get_ticks())  # fill in derived state (flow field, ...)
+        fork_s = deep_s = roll_s = math.inf
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            for _ in range(args.forks):
+                fork = game.fork()
+            fork_s = min(fork_s, (time.perf_counter() - t0) / args.forks)
+            t0 = time.perf_counter()
+            copy.deepcopy(game)
+            deep_s = min(deep_s, time.perf_counter() - t0)
+            state = random.getstate()
+            t0 = time.perf_counter()
+            now = get_ticks()
+            for _ in range(index.FPS // 10):
+                fork.update(keys, step, now)
+                now += step
+            roll_s = min(roll_s, time.perf_counter() - t0 + fork_s)
+            random.setstate(state)
+        print(f"{count:>8}{fork_s * 1e6:>9.1f}{1 / fork_s:>9.0f}{deep_s * 1e6:>13.0f}"
+              f"{roll_s * 1000:>12.2f}{1 / roll_s:>12.0f}")
+
+    planner = LookaheadPilot()
+    print(f"\nUp to {args.seconds:.0f} s of play from the start menu; lookahead: "
+          f"{len(PLAN_MOVES)} moves, depth {planner.depth}, beam {planner.beam}, "
+          f"{planner.segment_steps} steps per move, replanning every {planner.replan_steps} steps")
+    print(f"{'seed':>5}{'pilot':>11}{'sim s':>7}{'score':>10}{'lives':>7}{'kills':>7}"
+          f"{'wall s':>8}{'plans':>7}{'forks/s':>9}{'steps/s':>9}")
+    for seed in args.play_seeds:
+        for name in ("reactive", "lookahead"):
+            pilot = LookaheadPilot() if name == "lookahead" else Autopilot()
+            game, wall = play_headless(pilot, args.seconds, seed)
+            sim = game.seq * step / 1000.0
+            plans = getattr(pilot, "plans", 0)
+            forks = getattr(pilot, "forks", 0)
+            steps = getattr(pilot, "rollout_steps", 0)
+            print(f"{seed:>5}{name:>11}{sim:>7.0f}{game.score:>10}{game.player.lives:>7}"
+                  f"{game.enemies_killed:>7}{wall:>8.1f}{plans:>7}{forks / wall:>9.0f}"
+                  f"{steps / wall:>9.0f}")
+    pygame.quit()
+
+
+def bench_world(args):
+    w, h = parse_world_size(args.size)
+    index.WORLD_W = -(-w // index.WORLD_CHUNK) * index.WORLD_CHUNK
+    index.WORLD_H = -(-h // index.WORLD_CHUNK) * index.WORLD_CHUNK
+    index.LARGE_WORLD = True
+    game = make_bench_game(0, args.seed)
+    rng = random.Random(args.seed)
+    headings = [(pygame.K_w,), (pygame.K_w, pygame.K_d), (pygame.K_d,), (pygame.K_s, pygame.K_d),
+                (pygame.K_s,), (pygame.K_s, pygame.K_a), (pygame.K_a,), (pygame.K_w, pygame.K_a)]
+    step = 1000.0 / index.FPS
+    chunks = game.world.cols * game.world.rows
+    print(f"{index.WORLD_W}x{index.WORLD_H} world, {chunks} chunks of {index.WORLD_CHUNK} px, "
+          f"player wandering (new heading every {args.turn_every} steps)")
+    print(f"{'steps':>7}{'ms/step':>9}{'max ms':>8}{'enemies':>9}{'gates':>7}{'powerups':>10}"
+          f"{'visited':>9}{'frozen':>8}{'summary':>9}{'frozen rows':>13}")
+    now = game.game_start_time
+    visited = set()
+    times = []
+    for i in range(1, args.steps + 1):
+        if i % args.turn_every == 1:
+            keys = KeyState(rng.choice(headings))
+        t0 = time.perf_counter()
+        game.update(keys, step, now)
+        times.append(time.perf_counter() - t0)
+        now += step
+        visited.add(game.world.center)
+        if i % args.report == 0:
+            stats = game.world.stats()
+            print(f"{i:>7}{statistics.fmean(times) * 1000:>9.3f}{max(times) * 1000:>8.2f}"
+                  f"{len(game.enemies):>9}{len(game.gates):>7}{len(game.fire_powerups):>10}"
+                  f"{len(visited):>9}{stats['frozen']:>8}{stats['summarized']:>9}"
+                  f"{stats['frozen_rows']:>13}")
+            times = []
+
+
+def bench_spectate(args):
+    pygame.init()
+    game = make_bench_game(args.enemies, args.seed)
+    server = SpectatorServer(port=0)
+    server.start()
+
+    received = [0] * args.viewers
+    received_bytes = [0] * args.viewers
+    published = {}   # seq -> perf_counter() at publish
+    truth = {}       # seq -> quantized arrays, encoded independently
+    decoded = {}     # seq -> arrays rebuilt by viewer 0
+    latencies = []
+
+    async def viewer(i):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        decoder = StateDecoder() if i == 0 else None
+        slow = i > args.viewers - 1 - args.slow
+        try:
+            while True:
+                size, kind, seq, now = HEADER.unpack(await reader.readexactly(HEADER.size))
+                payload = await reader.readexactly(size)
+                received[i] += 1
+                received_bytes[i] += HEADER.size + size
+                if decoder is not None and decoder.apply(kind, payload):
+                    latencies.append((time.perf_counter() - published[seq]) * 1000.0)
+                    decoded[seq] = dict(decoder.arrays)
+                if slow:
+                    await asyncio.sleep(args.slow_delay)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def viewers():
+        await asyncio.gather(*(viewer(i) for i in range(args.viewers)))
+
+    loop = asyncio.new_event_loop()
+    clients = threading.Thread(target=loop.run_until_complete, args=(viewers(),), daemon=True)
+    clients.start()
+    while server.viewers < args.viewers:
+        time.sleep(0.01)
+
+    encoder = StateEncoder()
+    delta_bytes = []
+    keyframe_bytes = []
+    keys = KeyState()
+    step = 1000.0 / args.fps
+    start = time.perf_counter()
+    for i in range(args.frames):
+        now = get_ticks()
+        game.update(keys, step, now)
+        snap = game.snapshot(now)
+        delta, make_keyframe = encoder.encode(snap)
+        truth[snap.seq] = encoder.arrays
+        delta_bytes.append(len(delta))
+        keyframe_bytes.append(len(make_keyframe()))
+        published[snap.seq] = time.perf_counter()
+        server.publish(snap)
+        delay = start + (i + 1) * step / 1000.0 - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    wall = time.perf_counter() - start
+    time.sleep(0.5)  # let the last frames arrive
+    stats = server.stats()
+    server.close()
+    clients.join(5.0)
+    pygame.quit()
+
+    mismatched = sum(
+        1 for seq, arrays in decoded.items()
+        if any(not (arrays[k] == truth[seq][k]).all() for k in arrays)
+    )
+    fast = received[:args.viewers - args.slow] or received
+    print(f"{args.viewers} viewers ({args.slow} slow), {args.enemies} enemies, "
+          f"{args.frames} ticks at {args.fps} Hz in {wall:.1f}s")
+    print(f"server ticks {stats['ticks']}  encode {stats['encode_ms']:.3f} ms/tick  "
+          f"keyframes {stats['keyframes_sent']}  resyncs {stats['resyncs']}  "
+          f"skipped {stats['skipped']}")
+    print(f"sent {stats['bytes_sent'] / 2**20:.1f} MB  "
+          f"{statistics.fmean(received_bytes) / max(1, statistics.fmean(received)):.0f} B/msg  "
+          f"{statistics.fmean(received_bytes) / wall / 1024:.1f} KB/s per viewer")
+    print(f"message size: delta mean {statistics.fmean(delta_bytes):.0f} B, "
+          f"keyframe mean {statistics.fmean(keyframe_bytes):.0f} B")
+    print(f"frames per fast viewer min {min(fast)} median {statistics.median(fast):.0f}  "
+          f"slow viewers median {statistics.median(received[len(fast):] or [0]):.0f}")
+    print(f"viewer 0 latency p50 {percentile(latencies, 50):.2f} ms  "
+          f"p99 {percentile(latencies, 99):.2f} ms  decoded {len(decoded)}  "
+          f"mismatched {mismatched}")
+
+
+class StubLeaderboard(BaseHTTPRequestHandler):
+    """
+    Scripted stand-in for the site's leaderboard API. POSTs are answered from
+    server.replies, (status, body, close), raw bytes (sent as is, then hang up)
+    or "hang" (never answer), then 201. GETs take server.top_replies the same
+    way before the default top-N.
+    """
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+
+    def setup(self):
+        self.timeout = self.server.idle_timeout  # closes idle keep-alive connections
+        super().setup()
+
+    def do_GET(self):
+        self.server.log.append(("GET", self.client_address[1]))
+        replies = self.server.top_replies
+        reply = replies.popleft() if replies else (
+            200, {"entries": [{"name": "Stub", "score": 9000}], "cap": 10}, False)
+        self.answer(reply)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.log.append(("POST", self.client_address[1]))
+        replies = self.server.replies
+        self.answer(replies.popleft() if replies else (201, {"rank": 1, "entries": []}, False))
+
+    def answer(self, reply):
+        if reply == "hang":
+            self.rfile.read(1)  # until the client gives up and hangs up
+            self.close_connection = True
+        elif isinstance(reply, bytes):
+            self.wfile.write(reply)
+            self.close_connection = True
+        else:
+            self.reply(*reply)
+
+    def reply(self, status, body, close=False):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if close:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def wait_until(cond, timeout):
+    end = time.perf_counter() + timeout
+    while not cond():
+        if time.perf_counter() > end:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def bench_leaderboard(args):
+    # Short timeouts and backoff so the retry paths run in well under a second
+    leaderboard_client.BACKOFF_BASE_S = args.backoff
+    leaderboard_client.REQUEST_TIMEOUT_S = args.timeout
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubLeaderboard)
+    server.daemon_threads = True
+    server.replies = deque()
+    server.top_replies = deque()
+    server.log = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    tmp = tempfile.mkdtemp()
+    failed = []
+
+    # Every connection the client opens, to find ones it never closes
+    opened = []
+    pool_open = leaderboard_client.ConnectionPool._open
+
+    async def tracked_open(pool):
+        reader, writer = await pool_open(pool)
+        opened.append(writer)
+        return reader, writer
+
+    leaderboard_client.ConnectionPool._open = tracked_open
+
+    def session(name, replies, scores=1, idle_timeout=None, gap=0.0, check=None,
+                top_replies=(), refresh=leaderboard_client.REFRESH_INTERVAL_S):
+        """Submit `scores` scores through a fresh client against the scripted stub."""
+        server.replies.clear()
+        server.replies.extend(replies)
+        server.top_replies.clear()
+        server.top_replies.extend(top_replies)
+        server.idle_timeout = idle_timeout
+        leaderboard_client.REFRESH_INTERVAL_S = refresh
+        del server.log[:]
+        del opened[:]
+        queue_path = os.path.join(tmp, name + ".json")
+        client = LeaderboardClient(url, queue_path)
+        client.start()
+        # The prefetch GET left a pooled connection (scripted bad GETs: a refresh)
+        wait_until(lambda: client.top, 2.0)
+        t0 = time.perf_counter()
+        for i in range(scores):
+            time.sleep(gap)
+            client.submit("Bench", 1000 + i)
+            if check is not None:
+                check(client, queue_path)
+            # submit() sets the status at once; the client replaces it when done
+            sent = wait_until(lambda: not client.queued
+                              and client.status != "Submitting score...", 10.0)
+        ms = (time.perf_counter() - t0) * 1000.0
+        posts = [port for method, port in server.log if method == "POST"]
+        conns = len({port for _, port in server.log})
+        client.close()  # closes the pooled connections
+        leaked = sum(not writer.is_closing() for writer in opened)
+        return sent, client, posts, conns, ms, leaked
+
+    def report(name, ok, detail):
+        print(f"{name:<20}{'ok' if ok else 'FAIL':>6}  {detail}")
+        if not ok:
+            failed.append(name)
+
+    sent, client, posts, conns, ms, _ = session("created", [], scores=2)
+    report("201", sent and client.status == "Leaderboard rank #1" and conns == 1,
+           f"{len(posts)} POSTs on {conns} keep-alive connection(s), {ms:.1f} ms")
+
+    sent, client, posts, conns, ms, _ = session("conflict", [(409, {"min": 5000}, False)])
+    report("409", sent and client.status == "Not a top score (min 5000)" and len(posts) == 1,
+           f"status {client.status!r}")
+
+    requeued = []
+
+    def persisted(client, queue_path):
+        # After the 503 the score must wait in the on-disk queue for its retry
+        wait_until(lambda: len(server.log) >= 2, 2.0)
+        wait_until(lambda: "Offline" in client.status, 2.0)
+        with open(queue_path) as f:
+            requeued.append(len(json.load(f)))
+
+    sent, client, posts, conns, ms, _ = session(
+        "unavailable", [(503, {}, False), (502, {}, False)], check=persisted)
+    report("5xx backoff", sent and requeued == [1] and len(posts) == 3,
+           f"{len(posts)} POSTs, queued on disk after the first: {requeued[0]}, "
+           f"sent after {ms:.0f} ms")
+
+    sent, client, posts, conns, ms, _ = session(
+        "close", [(201, {"rank": 2}, True)], scores=2)
+    report("Connection: close", sent and len(set(posts)) == 2,
+           f"{len(posts)} POSTs on {len(set(posts))} connections")
+
+    sent, client, posts, conns, ms, _ = session(
+        "idle", [], idle_timeout=0.2, gap=0.5)
+    report("idle timeout", sent and len(posts) == 1 and client.status.startswith("Leaderboard"),
+           f"stale pooled connection replaced, {len(posts)} POST, {conns} connections")
+
+    sent, client, posts, conns, ms, leaked = session("hung", ["hang"] * 3)
+    report("hung server", sent and len(posts) == 4 and not leaked,
+           f"{len(posts)} POSTs after {len(posts) - 1} timeouts, "
+           f"{leaked} connection(s) left open")
+
+    # Replies that don't parse are failed requests, never a dead client
+    bad = [b"HTTP/1.1 2OO OK\r\n\r\n",
+           b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n",
+           b"HTTP/1.1 201 Created\r\nContent-Length: many\r\n\r\n"]
+    entries = [{"name": "Odd", "score": "lots"}, 7, {"name": "Stub", "score": 9000}]
+    sent, client, posts, conns, ms, leaked = session(
+        "malformed", bad + [(201, {"rank": 3, "entries": entries}, False)],
+        top_replies=bad + [(200, {"entries": entries}, False)], refresh=args.backoff)
+    report("malformed replies", sent and client.status == "Leaderboard rank #3"
+           and client.top == (("Stub", 9000),) and not leaked,
+           f"{len(posts)} POSTs, top {client.top}, status {client.status!r}")
+
+    server.shutdown()
+    if failed:
+        raise SystemExit(f"failed: {', '.join(failed)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geometrica benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("pipeline", help="serial vs pipelined sim/render loop")
+    p.add_argument("--frames", type=int, default=600)
+    p.add_argument("--enemies", type=int, default=400)
+    p.add_argument("--fps", type=int, default=index.FPS, help="sim rate")
+    p.add_argument("--max-fps", type=int, default=None,
+                   help="frame cap, interpolated (0 = uncapped; default: one frame per sim step)")
+    p.add_argument("--width", type=int, default=1280)
+    p.add_argument("--height", type=int, default=720)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--font-cache", default=os.path.join(index.DATA_DIR, "font_cache.json"))
+    p.set_defaults(func=bench_pipeline)
+
+    p = sub.add_parser("history", help="run-history store query latency")
+    p.add_argument("--runs", type=int, default=50_000)
+    p.add_argument("--repeat", type=int, default=50)
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=bench_history)
+
+    p = sub.add_parser("collision", help="point vs swept hit detection at coarse sim rates")
+    p.add_argument("--shots", type=int, default=2000)
+    p.add_argument("--rates", type=int, nargs="+", default=[60, 30, 15, 10])
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=bench_collision)
+
+    p = sub.add_parser("bullets", help="array-backed vs per-object boss bullets")
+    p.add_argument("--bullets", type=int, nargs="+", default=[1000, 5000, 20000])
+    p.add_argument("--steps", type=int, default=120)
+    p.set_defaults(func=bench_bullets)
+
+    p = sub.add_parser("particles", help="particle pool cost per frame under a kill storm")
+    p.add_argument("--budget", type=int, nargs="+", default=[1000, 4000, 16000])
+    p.add_argument("--kills", type=int, default=20, help="enemy deaths per frame")
+    p.add_argument("--frames", type=int, default=300)
+    p.add_argument("--width", type=int, default=1280)
+    p.add_argument("--height", type=int, default=720)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--font-cache", default=os.path.join(index.DATA_DIR, "font_cache.json"))
+    p.set_defaults(func=bench_particles)
+
+    p = sub.add_parser("lod", help="enemy update cost with and without distance LOD")
+    p.add_argument("--near", type=int, default=100, help="enemies within 900 px")
+    p.add_argument("--horde", type=int, nargs="+", default=[500, 2000, 8000],
+                   help="total enemy counts")
+    p.add_argument("--steps", type=int, default=16, help="steps per burst")
+    p.add_argument("--repeat", type=int, default=10, help="bursts per horde size")
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=bench_lod)
+
+    p = sub.add_parser("flowfield", help="flow-field steering around walls vs direct chase")
+    p.add_argument("--enemies", type=int, nargs="+", default=[500, 2000, 8000])
+    p.add_argument("--walls", type=int, default=12)
+    p.add_argument("--wall-radius", type=float, default=160)
+    p.add_argument("--cell", type=int, default=index.FLOW_CELL)
+    p.add_argument("--steps", type=int, default=300)
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=bench_flowfield)
+
+    p = sub.add_parser("minimap", help="density minimap rebuild and per-frame cost")
+    p.add_argument("--enemies", type=int, nargs="+", default=[200, 1000, 4000])
+    p.add_argument("--frames", type=int, default=600)
+    p.add_argument("--refresh-ms", type=float, default=100)
+    p.add_argument("--width", type=int, default=1280)
+    p.add_argument("--height", type=int, default=720)
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=bench_minimap)
+
+    p = sub.add_parser("swarm", help="star swarm steering: per-member vs shared formation frame")
+    p.add_argument("--groups", type=int, nargs="+", default=[4, 16, 64])
+    p.add_argument("--steps", type=int, default=600)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=bench_swarm)
+
+    p = sub.add_parser("separation", help="enemy separation: grid neighbour queries vs all pairs")
+    p.add_argument("--enemies", type=int, nargs="+", default=[500, 2000, 8000])
+    p.add_argument("--spacing", type=float, default=30.0, help="px per enemy (crowding)")
+    p.add_argument("--brute-max", type=int, default=4000, help="largest all-pairs run")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=bench_separation)
+
+    p = sub.add_parser("parallel", help="chunked array updates on 1..N worker threads")
+    p.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000],
+                   help="boss bullets (and as many orbs)")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.add_argument("--chunk", type=int, default=CHUNK_ROWS)
+    p.add_argument("--steps", type=int, default=20)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=bench_parallel)
+
+    p = sub.add_parser("lookahead", help="Game.fork() cost and the lookahead autopilot")
+    p.add_argument("--enemies", type=int, nargs="+", default=[0, 200, 1000])
+    p.add_argument("--forks", type=int, default=200, help="forks per timing")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seconds", type=float, default=60.0, help="play time per pilot")
+    p.add_argument("--play-seeds", type=int, nargs="+", default=[1, 2])
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=bench_lookahead)
+
+    p = sub.add_parser("world", help="chunked large world: per-step cost and paging as the player roams")
+    p.add_argument("--size", default="50000x50000", help="WIDTHxHEIGHT")
+    p.add_argument("--steps", type=int, default=20000)
+    p.add_argument("--report", type=int, default=2000, help="steps per report line")
+    p.add_argument("--turn-every", type=int, default=600)
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=bench_world)
+
+    p = sub.add_parser("spectate", help="spectator fan-out over localhost")
+    p.add_argument("--viewers", type=int, default=200)
+    p.add_argument("--slow", type=int, default=0, help="viewers that read too slowly")
+    p.add_argument("--slow-delay", type=float, default=0.1,
+                   help="seconds a slow viewer sleeps per message")
+    p.add_argument("--enemies", type=int, default=150)
+    p.add_argument("--frames", type=int, default=600)
+    p.add_argument("--fps", type=int, default=index.FPS, help="sim rate")
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=bench_spectate)
+
+    p = sub.add_parser("leaderboard", help="leaderboard client against a scripted stub server")
+    p.add_argument("--timeout", type=float, default=0.2, help="request timeout, s")
+    p.add_argument("--backoff", type=float, default=0.05, help="backoff base, s")
+    p.set_defaults(func=bench_leaderboard)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Boss bullet patterns as data, and the array-backed buffer their bullets live in.
+
+A pattern is a plain dict:
+
+    kind         "ring": `count` directions evenly around the circle
+                 "fan":  `count` directions spread across `spread` radians
+    count        bullets per volley
+    spread       fan width in radians (fan only)
+    aim          centre the volley on the player
+    spin         radians per second the volley turns over the boss's life
+                 (rotating emitters)
+    step         extra radians per volley fired (spirals)
+    interval_ms  time between volleys
+    speed        bullet speed in px per 60 Hz frame
+    from_rim     spawn on the boss's edge instead of its centre
+
+compile_pattern() turns it into a Pattern holding the unit directions of one
+volley at angle 0. Firing rotates that table with a single 2x2 product and
+appends the whole volley to a BulletBuffer, which keeps every boss bullet in
+numpy arrays and moves and culls them all at once.
+"""
+import math
+
+import numpy as np
+
+from collision import sweep_toi_many
+from parallel import inside, integrate
+
+PATTERNS = {
+    # Bosses I-III: one slow shot straight at the player
+    "aimed": {"kind": "fan", "count": 1, "aim": True,
+              "interval_ms": 2000, "speed": 6},
+    # Boss IV: 8 emitters on the rim, turning slowly
+    "rotor": {"kind": "ring", "count": 8, "spin": 1.5, "from_rim": True,
+              "interval_ms": 400, "speed": 6},
+    "spiral": {"kind": "ring", "count": 4, "step": 0.35, "from_rim": True,
+               "interval_ms": 120, "speed": 5},
+    "fan5": {"kind": "fan", "count": 5, "spread": 0.8, "aim": True,
+             "interval_ms": 900, "speed": 7},
+    "bloom": {"kind": "ring", "count": 36, "step": math.pi / 36,
+              "interval_ms": 1200, "speed": 4},
+}
+
+# style_id -> pattern name
+BOSS_PATTERNS = {1: "aimed", 2: "aimed", 3: "aimed", 4: "rotor"}
+
+
+class Pattern:
+    def __init__(self, spec):
+        self.kind = spec["kind"]
+        self.count = spec["count"]
+        self.aim = spec.get("aim", False)
+        self.spin = spec.get("spin", 0.0)
+        self.step = spec.get("step", 0.0)
+        self.spread = spec.get("spread", 0.0)
+        self.interval_ms = spec["interval_ms"]
+        self.speed = spec["speed"]
+        self.from_rim = spec.get("from_rim", False)
+
+        if self.kind == "ring":
+            angles = np.arange(self.count) * (2 * math.pi / self.count)
+        elif self.kind == "fan":
+            spread = self.spread
+            angles = np.linspace(-spread / 2, spread / 2, self.count) if self.count > 1 else np.zeros(1)
+        else:
+            raise ValueError(f"unknown pattern kind {self.kind!r}")
+        self.table = np.column_stack((np.cos(angles), np.sin(angles)))
+        self.shots = 0
+
+    def fork(self):
+        """Copy with its own volley counter (the direction table is shared)."""
+        dup = Pattern.__new__(Pattern)
+        dup.__dict__ = self.__dict__.copy()
+        return dup
+
+    def fire(self, bullets, t, ox, oy, radius, tx, ty):
+        """
+        Spawn one volley from (ox, oy) into `bullets`. t is seconds since the
+        boss appeared; (tx, ty) is the player. Returns False if an aimed
+        pattern has nothing to aim at.
+        """
+        angle = self.spin * t + self.step * self.shots
+        if self.aim:
+            if tx == ox and ty == oy:
+                return False
+            angle += math.atan2(ty - oy, tx - ox)
+        c = math.cos(angle)
+        s = math.sin(angle)
+        dirs = self.table @ np.array(((c, s), (-s, c)))
+
+        origins = dirs * radius if self.from_rim else np.zeros_like(dirs)
+        origins += (ox, oy)
+        bullets.spawn(origins, dirs * self.speed)
+        self.shots += 1
+        return True
+
+
+def compile_pattern(name_or_spec):
+    spec = PATTERNS[name_or_spec] if isinstance(name_or_spec, str) else name_or_spec
+    return Pattern(spec)
+
+
+class BulletBuffer:
+    """Boss bullets as parallel position / previous position / velocity arrays."""
+
+    def __init__(self, world_w, world_h, radius=6, capacity=256, margin=50):
+        self.radius = radius
+        self.bounds = (-margin, -margin, world_w + margin, world_h + margin)
+        self.pos = np.zeros((capacity, 2))
+        self.prev = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def clear(self):
+        self.n = 0
+
+    def _grow(self, need):
+        cap = len(self.pos)
+        while cap < need:
+            cap *= 2
+        for name in ("pos", "prev", "vel"):
+            old = getattr(self, name)
+            new = np.zeros((cap, 2))
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def spawn(self, origins, vels):
+        n = self.n
+        m = len(origins)
+        if n + m > len(self.pos):
+            self._grow(n + m)
+        self.pos[n:n + m] = origins
+        self.prev[n:n + m] = origins
+        self.vel[n:n + m] = vels
+        self.n = n + m
+
+    def update(self, frames, pool=None):
+        """
+        Move every bullet by `frames` 60 Hz frames and drop the ones that left
+        the world. With a ChunkPool (parallel.py) the moving and bounds checks
+        run chunked on its workers.
+        """
+        n = self.n
+        if not n:
+            return
+        if pool is None:
+            pos = self.pos[:n]
+            self.prev[:n] = pos
+            pos += self.vel[:n] * frames
+
+            x0, y0, x1, y1 = self.bounds
+            x = pos[:, 0]
+            y = pos[:, 1]
+            keep = (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+        else:
+            pool.run(integrate, n, self.pos, self.prev, self.vel, frames)
+            keep = np.empty(n, bool)
+            pool.run(inside, n, self.pos, self.bounds, keep)
+        kept = int(np.count_nonzero(keep))
+        if kept != n:
+            for arr in (self.pos, self.prev, self.vel):
+                arr[:kept] = arr[:n][keep]
+            self.n = kept
+
+    def fork(self):
+        """Independent copy holding the live bullets (for Game.fork())."""
+        n = self.n
+        dup = BulletBuffer.__new__(BulletBuffer)
+        dup.radius = self.radius
+        dup.bounds = self.bounds
+        rows = max(n, 16)  # some room to spawn into
+        dup.pos = self.pos[:rows].copy()
+        dup.prev = self.prev[:rows].copy()
+        dup.vel = self.vel[:rows].copy()
+        dup.n = n
+        return dup
+
+    def remove(self, i):
+        """Drop bullet i (order is not kept)."""
+        last = self.n - 1
+        if i != last:
+            self.pos[i] = self.pos[last]
+            self.prev[i] = self.prev[last]
+            self.vel[i] = self.vel[last]
+        self.n = last
+
+    def first_hit(self, mover):
+        """(toi, index) of the first bullet `mover` touches this step, or None."""
+        n = self.n
+        if not n:
+            return None
+        toi = sweep_toi_many(mover.prev_pos, mover.pos, mover.radius,
+                             self.prev[:n], self.pos[:n], self.radius)
+        i = int(np.argmin(toi))
+        if toi[i] == np.inf:
+            return None
+        return float(toi[i]), i
+
+    def rows(self):
+        """((x, y, px, py), ...) for a RenderSnapshot."""
+        n = self.n
+        return tuple(zip(*self.pos[:n].T.tolist(), *self.prev[:n].T.tolist()))
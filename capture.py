@@ -0,0 +1,227 @@
+"""
+Built-in gameplay video capture.
+
+FrameRecorder is a present hook: after each flip it copies the display
+surface's pixels, through a buffer view in memory order (a plain memcpy, well
+under a millisecond at 720p), into one of a fixed pool of preallocated frame
+buffers and hands it to an encoder thread. If every buffer
+is still waiting to be encoded the frame is dropped and counted, so a slow
+disk never stalls the game loop. Each capture gets a timestamped directory
+under the captures folder:
+
+    frames.raw     raw frames in the surface's own pixel layout (format "raw"),
+                   e.g. ffmpeg -f rawvideo -pix_fmt bgr0 -s WxH -r 60 -i frames.raw out.mp4
+                   (pix_fmt and size are in capture.json)
+    000001.png...  one PNG per frame (format "png")
+    capture.json   size, format, frame times (sim ms) and dropped frames
+
+Start one with F10 in game (F10 again stops) or from launch with
+--record [raw|png]. Headless, the game can also be recorded faster than real
+time under the autopilot, with no drops:
+
+    python capture.py --seconds 120 --format png --out captures
+"""
+import argparse
+import json
+import os
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+import pygame
+
+POOL_SIZE = 8  # frame buffers; ~3.5 MB each at 1280x720
+FORMATS = ("raw", "png")
+
+
+class FrameRecorder:
+    """Present hook that records the display surface once started."""
+
+    def __init__(self, surface, root_dir, fmt="raw", pool_size=POOL_SIZE, block=False):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown capture format {fmt!r}")
+        self.surface = surface
+        self.root_dir = root_dir
+        self.out_dir = None
+        self.fmt = fmt
+        self.block = block  # wait for a free buffer instead of dropping (headless)
+        self.pool_size = pool_size
+        self._pool = None  # allocated on first start
+        self._free = queue.Queue()
+        self._work = queue.Queue()
+        self._thread = None
+
+    @property
+    def active(self):
+        return self._thread is not None
+
+    def start(self):
+        if self.active:
+            return
+        if self._pool is None:
+            self._allocate()
+        self.out_dir = os.path.join(self.root_dir, time.strftime("%Y%m%d-%H%M%S"))
+        os.makedirs(self.out_dir, exist_ok=True)
+        self._last_seq = None
+        self.captured = 0
+        self.written = 0
+        self.dropped = []  # sim times (ms) of dropped frames
+        self.times = []    # sim times (ms) of written frames, in order
+        self.grab_s = 0.0
+        for buf in self._pool:
+            self._free.put(buf)
+        self._thread = threading.Thread(target=self._encode, name="geometrica-capture",
+                                        daemon=True)
+        self._thread.start()
+
+    def _allocate(self):
+        surface = self.surface
+        if surface.get_bytesize() != 4:
+            raise ValueError("capture needs a 32-bit display surface")
+        w, h = surface.get_size()
+        self.size = (w, h)
+        # Byte offset of each channel within a little-endian pixel
+        byte_of = {shift // 8: c for shift, c in zip(surface.get_shifts()[:3], "rgb")}
+        self.pix_fmt = "".join(byte_of.get(i, "0") for i in range(4))
+        self._rgb_bytes = [self.pix_fmt.index(c) for c in "rgb"]
+        # Buffers are (y, x) pixels, i.e. memory order, so the grab is a memcpy;
+        # the encoder thread does any reordering.
+        self._pool = [np.empty((h, w), np.uint32) for _ in range(self.pool_size)]
+
+    def on_present(self, snap):
+        if not self.active or snap.seq == self._last_seq:
+            return  # a redraw of a state already captured
+        self._last_seq = snap.seq
+        try:
+            buf = self._free.get(self.block)
+        except queue.Empty:
+            self.dropped.append(snap.now)
+            return
+        t0 = time.perf_counter()
+        view = self.surface.get_view("2")  # (x, y) pixels
+        np.copyto(buf, np.asarray(view).T)
+        del view  # unlocks the surface
+        self.grab_s += time.perf_counter() - t0
+        self.captured += 1
+        self._work.put((snap.now, buf))
+
+    def stop(self):
+        """Flush queued frames and write capture.json."""
+        if not self.active:
+            return None
+        self._work.put(None)
+        self._thread.join()
+        self._thread = None
+        while not self._free.empty():
+            self._free.get_nowait()
+        info = {
+            "format": self.fmt,
+            "width": self.size[0],
+            "height": self.size[1],
+            "pix_fmt": self.pix_fmt,
+            "frames": self.written,
+            "dropped": len(self.dropped),
+            "dropped_at_ms": self.dropped,
+            "times_ms": self.times,
+            "grab_ms_mean": round(self.grab_s * 1000.0 / max(1, self.captured), 3),
+        }
+        with open(os.path.join(self.out_dir, "capture.json"), "w") as f:
+            json.dump(info, f, indent=1, sort_keys=True)
+        print(f"capture written: {self.out_dir} ({self.written} frames, "
+              f"{len(self.dropped)} dropped)", flush=True)
+        return info
+
+    def toggle(self):
+        if self.active:
+            self.stop()
+        else:
+            self.start()
+
+    def _encode(self):
+        raw = open(os.path.join(self.out_dir, "frames.raw"), "wb") if self.fmt == "raw" else None
+        w, h = self.size
+        try:
+            while True:
+                item = self._work.get()
+                if item is None:
+                    return
+                now, buf = item
+                if raw is not None:
+                    raw.write(buf.data)
+                else:
+                    rgb = np.ascontiguousarray(buf.view(np.uint8).reshape(h, w, 4)[:, :, self._rgb_bytes])
+                    path = os.path.join(self.out_dir, f"{self.written + 1:06d}.png")
+                    pygame.image.save(pygame.image.frombuffer(rgb.data, (w, h), "RGB"), path)
+                self.times.append(now)
+                self.written += 1
+                self._free.put(buf)
+        finally:
+            if raw is not None:
+                raw.close()
+
+
+def record_headless(args):
+    """Record an autopilot run as fast as the machine can render it."""
+    import gametime
+    import index
+    from autopilot import Autopilot
+    from fonts import FontCache
+
+    random.seed(args.seed)
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((args.width, args.height))
+    renderer = index.Renderer(screen, FontCache(args.font_cache))
+    clock = {"now": 0.0}
+    gametime.set_source(lambda: int(clock["now"]))
+
+    recorder = FrameRecorder(screen, args.out, args.format, block=True)
+    recorder.start()
+    game = index.Game()
+    game.handle_key(pygame.K_RETURN, 0)
+    pilot = Autopilot()
+    step = 1000.0 / index.FPS
+    frames = int(args.seconds * index.FPS)
+    wall0 = time.perf_counter()
+    for _ in range(frames):
+        now = clock["now"]
+        if game.state == "game_over":
+            break
+        keys, taps = pilot.keys(game)
+        for key in taps:
+            game.handle_key(key, now)
+        game.update(keys, step, now)
+        snap = game.snapshot(now)
+        renderer.draw(snap)
+        recorder.on_present(snap)
+        clock["now"] = now + step
+    recorder.stop()
+    wall = time.perf_counter() - wall0
+    gametime.set_source(None)
+    pygame.quit()
+    sim = clock["now"] / 1000.0
+    print(f"{sim:.1f}s of play in {wall:.1f}s ({sim / wall:.1f}x real time)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record a headless Geometrica run")
+    parser.add_argument("--seconds", type=float, default=60.0, help="sim seconds to record")
+    parser.add_argument("--format", choices=FORMATS, default="raw")
+    parser.add_argument("--out", default="captures", help="captures folder")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--font-cache", default=None)
+    args = parser.parse_args()
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    if args.font_cache is None:
+        import index
+        args.font_cache = os.path.join(index.DATA_DIR, "font_cache.json")
+    record_headless(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Swept (continuous) circle collision.
+
+Each sim step moves objects in a straight line from prev_pos to pos. Testing
+only the end positions lets a fast bullet skip clean over a 14 px enemy when
+the step is long (coarse sim rate, catch-up after a hitch). These helpers test
+the whole motion instead and return the time of impact as a fraction of the
+step, so hits can be resolved in the order they actually happen.
+"""
+import math
+
+import numpy as np
+
+
+def sweep_toi(a_prev, a_pos, ar, b_prev, b_pos, br):
+    """
+    Earliest t in [0, 1] at which circle A (moving a_prev -> a_pos) touches
+    circle B (moving b_prev -> b_pos), or None if they never touch this step.
+    """
+    # Work in B's frame: A starts at p and moves by d over the step
+    px = a_prev.x - b_prev.x
+    py = a_prev.y - b_prev.y
+    dx = (a_pos.x - a_prev.x) - (b_pos.x - b_prev.x)
+    dy = (a_pos.y - a_prev.y) - (b_pos.y - b_prev.y)
+    r = ar + br
+
+    c = px * px + py * py - r * r
+    if c <= 0.0:
+        return 0.0  # already touching at the start of the step
+    b = px * dx + py * dy
+    if b >= 0.0:
+        return None  # not closing in
+    a = dx * dx + dy * dy
+    disc = b * b - a * c
+    if disc < 0.0:
+        return None
+    t = (-b - math.sqrt(disc)) / a
+    return t if t <= 1.0 else None
+
+
+def sweep_pairs(movers, targets):
+    """
+    All touching (toi, mover index, target index) pairs, earliest first.
+    Objects need pos, prev_pos and radius.
+    """
+    hits = []
+    for i, a in enumerate(movers):
+        a_prev = a.prev_pos
+        a_pos = a.pos
+        ar = a.radius
+        # Cheap reject: bounding circle of A's whole sweep
+        reach = ar + abs(a_pos.x - a_prev.x) + abs(a_pos.y - a_prev.y)
+        for j, b in enumerate(targets):
+            slack = reach + b.radius + abs(b.pos.x - b.prev_pos.x) + abs(b.pos.y - b.prev_pos.y)
+            if abs(a_pos.x - b.pos.x) > slack or abs(a_pos.y - b.pos.y) > slack:
+                continue
+            t = sweep_toi(a_prev, a_pos, ar, b.prev_pos, b.pos, b.radius)
+            if t is not None:
+                hits.append((t, i, j))
+    hits.sort()
+    return hits
+
+
+def first_hit(mover, targets):
+    """(toi, index) of the first target `mover` touches this step, or None."""
+    best = None
+    for j, b in enumerate(targets):
+        t = sweep_toi(mover.prev_pos, mover.pos, mover.radius, b.prev_pos, b.pos, b.radius)
+        if t is not None and (best is None or t < best[0]):
+            best = (t, j)
+    return best
+
+
+def sweep_toi_many(a_prev, a_pos, ar, b_prev, b_pos, br):
+    """
+    sweep_toi of one circle A against many circles B at once. b_prev and b_pos
+    are (n, 2) arrays; returns an (n,) array of times of impact, inf where B
+    is not touched this step.
+    """
+    px = a_prev.x - b_prev[:, 0]
+    py = a_prev.y - b_prev[:, 1]
+    dx = (a_pos.x - a_prev.x) - (b_pos[:, 0] - b_prev[:, 0])
+    dy = (a_pos.y - a_prev.y) - (b_pos[:, 1] - b_prev[:, 1])
+    r = ar + br
+
+    c = px * px + py * py - r * r
+    b = px * dx + py * dy
+    a = dx * dx + dy * dy
+    disc = b * b - a * c
+    closing = (b < 0.0) & (disc >= 0.0)
+
+    toi = np.full(len(c), np.inf)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (-b - np.sqrt(np.where(closing, disc, 0.0))) / a
+    hit = closing & (t <= 1.0)
+    toi[hit] = t[hit]
+    toi[c <= 0.0] = 0.0
+    return toi
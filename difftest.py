@@ -0,0 +1,604 @@
+"""
+Differential test of the simulation kernels.
+
+The collision, movement and firing code has fast paths (vectorized sweeps,
+the separation grid, chunked array updates, compiled bullet patterns) and
+will get more. This keeps the plain versions of those kernels as frozen
+references (REFERENCE) and checks that the game as shipped still plays
+exactly like a game running on them:
+
+- Seeded random scenarios (player, enemy clusters, bullets, orbs, powerups,
+  gates, a boss, boss bullets, a move and step-length script) are built
+  twice. One copy steps with the reference kernels patched in and the
+  per-object update path, the other with the shipped kernels and a chunked
+  ChunkPool.
+- After every tick the two are compared: score, lives, state and counters
+  exactly; which enemies are alive (hit sets); positions of everything within
+  --tol px; the gameplay events emitted that tick; and the random stream
+  (a kernel drawing a different number of random numbers shows up here).
+  Enemy positions that pass are copied across before the next tick, so
+  rounding differences are held to --tol per tick instead of compounding
+  through the crowd.
+- A failing scenario is shrunk: ticks are cut after the first divergence and
+  entities are dropped while it still diverges. The smallest case left is
+  printed as JSON and can be replayed.
+
+    python difftest.py --cases 200 --seed 1
+    python difftest.py --reference Enemy.update --cases 50
+    python difftest.py --replay difftest-fail.json
+
+When optimizing one of the kernels, leave its entry here alone: the copy in
+REFERENCE is what the new version is held to.
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+import gametime
+import index
+from autopilot import move_keys
+from bullet_patterns import BulletBuffer, Pattern
+from collision import sweep_toi
+from director import Director
+from parallel import ChunkPool
+from separation import separation_brute
+from telemetry import EventBus
+
+Vector2 = pygame.math.Vector2
+
+ENTITIES = ("enemies", "bullets", "orbs", "powerups", "gates", "bosses", "boss_bullets")
+BOSS_NAMES = {1: "BOSS I", 2: "BOSS II", 3: "BOSS III", 4: "BOSS IV"}
+
+
+# --- Reference kernels: plain versions of the fast paths, kept as they are ---
+
+def sweep_pairs_all(movers, targets):
+    """collision.sweep_pairs without the cheap reject: sweep_toi on every pair."""
+    hits = []
+    for i, a in enumerate(movers):
+        for j, b in enumerate(targets):
+            t = sweep_toi(a.prev_pos, a.pos, a.radius, b.prev_pos, b.pos, b.radius)
+            if t is not None:
+                hits.append((t, i, j))
+    hits.sort()
+    return hits
+
+
+def first_hit_scan(mover, targets):
+    """collision.first_hit: the earliest touching target, one at a time."""
+    best = None
+    for j, b in enumerate(targets):
+        t = sweep_toi(mover.prev_pos, mover.pos, mover.radius, b.prev_pos, b.pos, b.radius)
+        if t is not None and (best is None or t < best[0]):
+            best = (t, j)
+    return best
+
+
+def circle_coll(a, ar, b, br):
+    return a.distance_to(b) <= (ar + br)
+
+
+def buffer_first_hit(self, mover):
+    """BulletBuffer.first_hit, one bullet at a time."""
+    best = None
+    for i in range(self.n):
+        t = sweep_toi(mover.prev_pos, mover.pos, mover.radius,
+                      Vector2(*self.prev[i]), Vector2(*self.pos[i]), self.radius)
+        if t is not None and (best is None or t < best[0]):
+            best = (t, i)
+    return best
+
+
+def buffer_update(self, frames, pool=None):
+    """BulletBuffer.update, one bullet at a time (the pool is ignored)."""
+    x0, y0, x1, y1 = self.bounds
+    kept = 0
+    for i in range(self.n):
+        x, y = self.pos[i]
+        vx, vy = self.vel[i]
+        nx = x + vx * frames
+        ny = y + vy * frames
+        if x0 <= nx <= x1 and y0 <= ny <= y1:
+            self.prev[kept] = (x, y)
+            self.pos[kept] = (nx, ny)
+            self.vel[kept] = (vx, vy)
+            kept += 1
+    self.n = kept
+
+
+def pattern_fire(self, bullets, t, ox, oy, radius, tx, ty):
+    """Pattern.fire with one cos / sin per bullet instead of the rotated table."""
+    angle = self.spin * t + self.step * self.shots
+    if self.aim:
+        if tx == ox and ty == oy:
+            return False
+        angle += math.atan2(ty - oy, tx - ox)
+    origins = []
+    vels = []
+    for k in range(self.count):
+        if self.kind == "ring":
+            a = angle + k * 2 * math.pi / self.count
+        elif self.count > 1:
+            a = angle - self.spread / 2 + k * self.spread / (self.count - 1)
+        else:
+            a = angle
+        dx = math.cos(a)
+        dy = math.sin(a)
+        r = radius if self.from_rim else 0.0
+        origins.append((ox + dx * r, oy + dy * r))
+        vels.append((dx * self.speed, dy * self.speed))
+    bullets.spawn(np.array(origins), np.array(vels))
+    self.shots += 1
+    return True
+
+
+def enemy_update(self, player, dt, field=None, now=None):
+    k = dt / index.SPEED_FRAME_MS
+    self.prev_pos.update(self.pos)
+    flow = field.direction(self.pos.x, self.pos.y) if field is not None else None
+    if flow is not None:
+        dx, dy = flow
+        step = self.speed * k
+        if self.type == "pentagon":
+            t = gametime.get_ticks() if now is None else now
+            wob = math.sin(t / 250 + self.phase) * 1.5 * k
+            self.pos.x += dx * step - dy * wob
+            self.pos.y += dy * step + dx * wob
+        else:
+            self.pos.x += dx * step
+            self.pos.y += dy * step
+        return
+
+    direction = player.pos - self.pos
+    if direction.length_squared() > 0:
+        direction = direction.normalize()
+    if self.type == "pentagon":
+        perp = Vector2(-direction.y, direction.x)
+        t = gametime.get_ticks() if now is None else now
+        wob = math.sin(t / 250 + self.phase) * 1.5
+        self.pos += (direction * self.speed + perp * wob) * k
+    else:
+        self.pos += direction * (self.speed * k)
+
+
+def enemy_update_far(self, player, dt, field=None, now=None):
+    step = self.speed * dt / index.SPEED_FRAME_MS
+    flow = field.direction(self.pos.x, self.pos.y) if field is not None else None
+    if flow is not None:
+        self.pos.x += flow[0] * step
+        self.pos.y += flow[1] * step
+    else:
+        direction = player.pos - self.pos
+        dist = direction.length()
+        if dist > 0:
+            self.pos += direction * (step / dist)
+    self.prev_pos.update(self.pos)
+
+
+def gate_check_trigger(self, player_pos, player_radius):
+    if not self.active:
+        return False
+    ap = player_pos - self.p1
+    ab = self.p2 - self.p1
+    ab_len_sq = ab.length_squared()
+    if ab_len_sq == 0:
+        dist = ap.length()
+    else:
+        t = max(0.0, min(1.0, ap.dot(ab) / ab_len_sq))
+        dist = (player_pos - (self.p1 + ab * t)).length()
+    if dist <= player_radius + index.GATE_THICKNESS * 0.7:
+        self.active = False
+        return True
+    return False
+
+
+def orb_update(self, dt, player_pos):
+    self.prev_pos.update(self.pos)
+    to_player = player_pos - self.pos
+    dist = to_player.length()
+    if 0 < dist <= index.ORB_ATTRACT_RADIUS:
+        self.vel = to_player / dist * index.ORB_ATTRACT_SPEED
+    self.pos += self.vel * (dt / index.SPEED_FRAME_MS)
+
+
+def powerup_update(self, dt, player_pos):
+    self.prev_pos.update(self.pos)
+    to_player = player_pos - self.pos
+    dist = to_player.length()
+    if 0 < dist <= index.POWER_ATTRACT_RADIUS:
+        self.pos += to_player / dist * (index.POWER_ATTRACT_SPEED * dt / index.SPEED_FRAME_MS)
+
+
+# name -> (owner, attribute, reference); patched in for the reference run
+REFERENCE = {
+    "sweep_pairs": (index, "sweep_pairs", sweep_pairs_all),
+    "first_hit": (index, "first_hit", first_hit_scan),
+    "circle_coll": (index, "circle_coll", circle_coll),
+    "separation": (index, "separation", separation_brute),
+    "Enemy.update": (index.Enemy, "update", enemy_update),
+    "Enemy.update_far": (index.Enemy, "update_far", enemy_update_far),
+    "Gate.check_trigger": (index.Gate, "check_trigger", gate_check_trigger),
+    "Orb.update": (index.Orb, "update", orb_update),
+    "FireRatePowerUp.update": (index.FireRatePowerUp, "update", powerup_update),
+    "BulletBuffer.first_hit": (BulletBuffer, "first_hit", buffer_first_hit),
+    "BulletBuffer.update": (BulletBuffer, "update", buffer_update),
+    "Pattern.fire": (Pattern, "fire", pattern_fire),
+}
+
+
+@contextlib.contextmanager
+def reference_kernels(names):
+    """Swap the named REFERENCE kernels in for the duration of the block."""
+    saved = []
+    for name in names:
+        owner, attr, fn = REFERENCE[name]
+        saved.append((owner, attr, owner.__dict__[attr]))
+        setattr(owner, attr, fn)
+    try:
+        yield
+    finally:
+        for owner, attr, fn in reversed(saved):
+            setattr(owner, attr, fn)
+
+
+# --- Scenarios ---
+
+def random_scenario(seed, ticks):
+    """A seeded scenario dict (plain lists, so it round-trips through JSON)."""
+    rng = random.Random(seed)
+    w, h = index.WORLD_W, index.WORLD_H
+    px = rng.uniform(500, w - 500)
+    py = rng.uniform(500, h - 500)
+
+    def near(reach):
+        a = rng.uniform(0, 2 * math.pi)
+        d = rng.uniform(0, reach)
+        return px + math.cos(a) * d, py + math.sin(a) * d
+
+    enemies = []
+    for _ in range(rng.choice((0, 1, 3, 6))):  # clusters, some out in the LOD bands
+        cx, cy = near(rng.choice((400, 900, 1800)))
+        for _ in range(rng.randint(1, 20)):
+            enemies.append([rng.choice(("triangle", "square", "pentagon")),
+                            rng.gauss(cx, 40), rng.gauss(cy, 40),
+                            rng.uniform(0, 2 * math.pi), rng.randrange(8)])
+    bullets = [[*near(300), rng.uniform(0, 2 * math.pi)] for _ in range(rng.randint(0, 30))]
+    orbs = []
+    for _ in range(rng.randint(0, 20)):
+        a = rng.uniform(0, 2 * math.pi)
+        v = rng.uniform(0.3, 0.8)
+        orbs.append([*near(400), math.cos(a) * v, math.sin(a) * v, rng.randint(-7900, 0)])
+    powerups = [list(near(350)) for _ in range(rng.randint(0, 3))]
+    gates = []
+    for _ in range(rng.randint(0, 4)):
+        cx, cy = near(350)
+        a = rng.uniform(0, math.pi)
+        dx = math.cos(a) * index.GATE_LENGTH / 2
+        dy = math.sin(a) * index.GATE_LENGTH / 2
+        b = rng.uniform(0, 2 * math.pi)
+        gates.append([cx - dx, cy - dy, cx + dx, cy + dy,
+                      math.cos(b) * index.GATE_MOVE_SPEED, math.sin(b) * index.GATE_MOVE_SPEED])
+    bosses = []
+    if rng.random() < 0.4:
+        bosses.append([rng.randint(1, 4), *near(600), rng.randint(1, 12), rng.randint(-3000, 0)])
+    boss_bullets = []
+    for _ in range(rng.randint(0, 40)):
+        a = rng.uniform(0, 2 * math.pi)
+        d = rng.uniform(60, 400)
+        s = rng.uniform(3, 8)
+        boss_bullets.append([px + math.cos(a) * d, py + math.sin(a) * d,
+                             -math.cos(a) * s, -math.sin(a) * s])
+
+    step = rng.choice((1000 / 60, 1000 / 30, 100.0))
+    steps = []
+    moves = []
+    move = [0, 0]
+    for tick in range(ticks):
+        if tick % 15 == 0:
+            move = [rng.randint(-1, 1), rng.randint(-1, 1)]
+        moves.append(move)
+        steps.append(step if rng.random() < 0.8 else rng.uniform(1, index.MAX_STEP_MS))
+    return {
+        "seed": seed, "player": [px, py, rng.random() < 0.3],
+        "enemies": enemies, "bullets": bullets, "orbs": orbs, "powerups": powerups,
+        "gates": gates, "bosses": bosses, "boss_bullets": boss_bullets,
+        "steps": steps, "moves": moves,
+    }
+
+
+def build(scenario, pool):
+    """A playing Game in the scenario's opening state, and its event log."""
+    random.seed(scenario["seed"])
+    game = index.Game()
+    game.director = Director([])  # nothing spawns but what the scenario holds
+    game.pool = pool
+    game.state = "playing"
+    game.game_start_time = 0
+    game.last_shot = -10_000
+
+    x, y, invincible = scenario["player"]
+    player = game.player
+    player.pos.update(x, y)
+    player.prev_pos.update(x, y)
+    player.invincible = invincible
+    player.invincible_until = 10 ** 9 if invincible else 0
+
+    game.enemies = []
+    for tag, (kind, ex, ey, phase, slot) in enumerate(scenario["enemies"]):
+        en = index.Enemy(kind, ex, ey)
+        en.phase = phase
+        en.lod_slot = slot
+        en.tag = tag  # to match enemies up between the two runs
+        game.enemies.append(en)
+    game.bullets = [index.Bullet(bx, by, Vector2(math.cos(a), math.sin(a)))
+                    for bx, by, a in scenario["bullets"]]
+    game.orbs = []
+    for ox, oy, vx, vy, spawn in scenario["orbs"]:
+        orb = index.Orb(ox, oy)
+        orb.vel = Vector2(vx, vy)
+        orb.spawn = spawn
+        game.orbs.append(orb)
+    game.fire_powerups = [index.FireRatePowerUp(ux, uy) for ux, uy in scenario["powerups"]]
+    game.gates = []
+    for x1, y1, x2, y2, vx, vy in scenario["gates"]:
+        gate = index.Gate((x1, y1), (x2, y2))
+        gate.vel = Vector2(vx, vy)
+        game.gates.append(gate)
+    game.bosses = []
+    for style, bx, by, health, last_shot in scenario["bosses"]:
+        boss = index.Boss(BOSS_NAMES[style], bx, by, health, 100 * style, style,
+                          ((255, 255, 255), (200, 200, 255)))
+        boss.last_shot_time = last_shot
+        game.bosses.append(boss)
+    rows = scenario["boss_bullets"]
+    if rows:
+        rows = np.array(rows, dtype=np.float64)
+        game.boss_bullets.spawn(rows[:, :2], rows[:, 2:])
+
+    log = []
+    game.events = EventBus()
+    game.events.subscribe(log.append)
+    return game, log
+
+
+def observe(game):
+    """Everything the comparison looks at, as plain values."""
+    player = game.player
+    return {
+        "counters": {
+            "score": game.score, "lives": player.lives, "state": game.state,
+            "multiplier": game.multiplier, "fire_rate": game.fire_rate,
+            "kills": game.enemies_killed, "gate_kills": game.enemies_killed_by_gate,
+            "orbs_collected": game.orbs_collected,
+            "powerups_collected": game.powerups_collected,
+            "gates_triggered": game.gates_triggered,
+            "boss_health": [boss.health for boss in game.bosses],
+        },
+        "enemies": {getattr(en, "tag", None): tuple(en.pos) for en in game.enemies},
+        "positions": {
+            "player": [tuple(player.pos)],
+            "bullets": [tuple(b.pos) for b in game.bullets],
+            "orbs": [tuple(o.pos) for o in game.orbs],
+            "powerups": [tuple(p.pos) for p in game.fire_powerups],
+            "gates": [(*g.p1, *g.p2) for g in game.gates],
+            "bosses": [tuple(b.pos) for b in game.bosses],
+            "boss_bullets": [tuple(row[:2]) for row in game.boss_bullets.rows()],
+        },
+    }
+
+
+def far(a, b, tol):
+    return any(abs(x - y) > tol for x, y in zip(a, b))
+
+
+def same_value(a, b, tol):
+    if isinstance(a, float) or isinstance(b, float):
+        return abs(a - b) <= tol
+    return a == b
+
+
+def compare(ref, opt, ref_events, opt_events, tol):
+    """Differences between two observe()s and the events of one tick, as text."""
+    problems = []
+    for name, value in ref["counters"].items():
+        if value != opt["counters"][name]:
+            problems.append(f"{name}: reference {value!r}, optimized {opt['counters'][name]!r}")
+
+    ref_en = ref["enemies"]
+    opt_en = opt["enemies"]
+    if ref_en.keys() != opt_en.keys():
+        problems.append(f"enemy hit sets differ: only the reference lost "
+                        f"{sorted(opt_en.keys() - ref_en.keys())}, only the optimized run "
+                        f"lost {sorted(ref_en.keys() - opt_en.keys())}")
+    for tag in sorted(ref_en.keys() & opt_en.keys()):
+        if far(ref_en[tag], opt_en[tag], tol):
+            problems.append(f"enemy {tag} at {ref_en[tag]} vs {opt_en[tag]}")
+            break
+
+    for name, rows in ref["positions"].items():
+        other = opt["positions"][name]
+        if len(rows) != len(other):
+            problems.append(f"{name}: {len(rows)} in the reference, {len(other)} optimized")
+            continue
+        for i, (a, b) in enumerate(zip(rows, other)):
+            if far(a, b, tol):
+                problems.append(f"{name}[{i}] at {a} vs {b}")
+                break
+
+    if len(ref_events) != len(opt_events):
+        problems.append(f"events: reference {[ev.kind for ev in ref_events]}, "
+                        f"optimized {[ev.kind for ev in opt_events]}")
+    else:
+        for a, b in zip(ref_events, opt_events):
+            if (a.t != b.t or a.kind != b.kind or far((a.x, a.y), (b.x, b.y), tol)
+                    or a.info.keys() != b.info.keys()
+                    or not all(same_value(v, b.info[k], tol) for k, v in a.info.items())):
+                problems.append(f"event {a} vs {b}")
+                break
+    return problems
+
+
+def run_case(scenario, names, pool, tol):
+    """
+    Step the reference and optimized games through the scenario side by
+    side; (tick, problems) at the first divergence, or None.
+    """
+    clock = {"now": 0.0}
+    gametime.set_source(lambda: int(clock["now"]))
+    try:
+        ref, ref_log = build(scenario, None)
+        ref_rng = random.getstate()
+        opt, opt_log = build(scenario, pool)
+        opt_rng = random.getstate()
+        for tick, (dt, (dx, dy)) in enumerate(zip(scenario["steps"], scenario["moves"])):
+            keys = move_keys(dx, dy)
+            now = clock["now"]
+            del ref_log[:], opt_log[:]
+            # Each game keeps its own random stream, so one kernel drawing
+            # more numbers does not throw off everything after it
+            random.setstate(ref_rng)
+            with reference_kernels(names):
+                ref.update(keys, dt, now)
+            ref_rng = random.getstate()
+            random.setstate(opt_rng)
+            opt.update(keys, dt, now)
+            opt_rng = random.getstate()
+
+            problems = compare(observe(ref), observe(opt), ref_log, opt_log, tol)
+            if ref_rng != opt_rng:
+                problems.append("random streams diverged (a different number of draws)")
+            if problems:
+                return tick, problems
+            # Enemies push each other apart, so a rounding difference (the
+            # separation grid sums in another order) would compound tick after
+            # tick; start both from the same positions again
+            moved = {en.tag: en for en in opt.enemies}
+            for en in ref.enemies:
+                en.pos.update(moved[en.tag].pos)
+                en.prev_pos.update(moved[en.tag].prev_pos)
+            clock["now"] = now + dt
+        return None
+    finally:
+        gametime.set_source(None)
+
+
+def cut(scenario, ticks):
+    return dict(scenario, steps=scenario["steps"][:ticks], moves=scenario["moves"][:ticks])
+
+
+def shrink(scenario, fails):
+    """
+    Smallest scenario found that still diverges: cut after the first bad
+    tick, then drop halves, quarters, ... down to single entities of each
+    kind while fails(scenario) keeps reporting a divergence.
+    """
+    found = fails(scenario)
+    scenario = cut(scenario, found[0] + 1)
+    progress = True
+    while progress:
+        progress = False
+        for key in ENTITIES:
+            size = max(1, len(scenario[key]) // 2)
+            while scenario[key]:
+                items = scenario[key]
+                i = 0
+                while i < len(items):
+                    trial = dict(scenario, **{key: items[:i] + items[i + size:]})
+                    found = fails(trial)
+                    if found is None:
+                        i += size
+                        continue
+                    scenario = cut(trial, found[0] + 1)
+                    items = scenario[key]
+                    progress = True
+                if size == 1:
+                    break
+                size //= 2
+    return scenario
+
+
+def summary(scenario):
+    counts = ", ".join(f"{len(scenario[key])} {key}" for key in ENTITIES if scenario[key])
+    return f"{len(scenario['steps'])} ticks, {counts or 'no entities'}"
+
+
+def report_failure(scenario, found, args, fails):
+    tick, problems = found
+    print(f"case {scenario['seed']}: diverged at tick {tick} ({summary(scenario)})")
+    for problem in problems:
+        print(f"  {problem}")
+    if args.no_shrink:
+        small = scenario
+    else:
+        t0 = time.perf_counter()
+        small = shrink(scenario, fails)
+        tick, problems = fails(small)
+        print(f"\nshrunk in {time.perf_counter() - t0:.1f}s to {summary(small)}; "
+              f"diverges at tick {tick}:")
+        for problem in problems:
+            print(f"  {problem}")
+    # One key per line, still valid JSON
+    text = "{\n" + ",\n".join(f" {json.dumps(k)}: {json.dumps(v)}" for k, v in small.items()) + "\n}"
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+        print(f"\nscenario: {args.out} (python difftest.py --replay {args.out})")
+    else:
+        print(f"\n{text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Differential test: shipped vs reference kernels")
+    parser.add_argument("--cases", type=int, default=100, help="random scenarios to run")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the first case")
+    parser.add_argument("--ticks", type=int, default=120, help="sim steps per case")
+    parser.add_argument("--tol", type=float, default=1e-6, help="position tolerance in px")
+    parser.add_argument("--reference", nargs="+", choices=sorted(REFERENCE),
+                        default=sorted(REFERENCE), metavar="KERNEL",
+                        help=f"kernels to swap in (default all: {', '.join(sorted(REFERENCE))})")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="ChunkPool workers for the optimized run (0 = per-object updates)")
+    parser.add_argument("--chunk", type=int, default=5,
+                        help="ChunkPool rows per chunk (small, so chunking is exercised)")
+    parser.add_argument("--replay", default=None, help="run one scenario from a JSON file")
+    parser.add_argument("--no-shrink", action="store_true")
+    parser.add_argument("--out", default=None, help="write the failing scenario here")
+    args = parser.parse_args()
+
+    pygame.init()
+    pool = ChunkPool(args.workers, chunk=args.chunk) if args.workers else None
+
+    def fails(scenario):
+        return run_case(scenario, args.reference, pool, args.tol)
+
+    if args.replay:
+        with open(args.replay) as f:
+            scenarios = [json.load(f)]
+    else:
+        scenarios = (random_scenario(args.seed + i, args.ticks) for i in range(args.cases))
+
+    t0 = time.perf_counter()
+    n = ticks = 0
+    for n, scenario in enumerate(scenarios, 1):
+        found = fails(scenario)
+        if found is not None:
+            report_failure(scenario, found, args, fails)
+            sys.exit(1)
+        ticks += len(scenario["steps"])
+    print(f"{n} cases, {ticks} ticks: shipped kernels match the reference "
+          f"({time.perf_counter() - t0:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
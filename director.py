@@ -0,0 +1,147 @@
+"""
+Timeline spawn director.
+
+Waves, timed events and score milestones are plain data (index.SPAWN_TIMELINE),
+one dict per event:
+
+    {"action": "enemies", "at": 0, "until": 30, "every": 5000, "count": 7,
+     "kind": "triangle", "jitter": 80}
+
+    action     what to do; the Game maps it to a handler
+    at         seconds into the run it first fires (default 0) ...
+    score      ... or the score at which it first fires
+    every      ms between repeats after that (None = fires once); shrinks by
+               `accel` ms per second of run time, down to `min_every`
+    until      seconds into the run after which it stops repeating
+    count      how many to spawn per firing (handed to the handler as one batch)
+
+Anything else in the dict is for the handler. Pending events sit in two heaps,
+one keyed by run time and one by score threshold, so a tick only looks at the
+front of each and pops what is due. A handler returning False (e.g. no room
+for another powerup) is retried on the next tick.
+
+The director knows nothing about the game, so a timeline can be previewed
+headless against an assumed score curve:
+
+    python director.py --seconds 600 --score-per-sec 1500
+"""
+import argparse
+import heapq
+import itertools
+from collections import Counter, namedtuple
+
+Event = namedtuple("Event", "action at score every min_every accel until count params",
+                   defaults=(0.0, None, None, None, 0.0, None, 1, None))
+
+
+def make_event(spec):
+    """Timeline dict -> Event (unknown keys go to params)."""
+    spec = dict(spec)
+    fields = {name: spec.pop(name) for name in Event._fields[:-1] if name in spec}
+    if "action" not in fields:
+        raise ValueError(f"timeline event without an action: {spec!r}")
+    return Event(params=spec, **fields)
+
+
+class Director:
+    def __init__(self, timeline):
+        self.events = [make_event(spec) for spec in timeline]
+        self._order = itertools.count()  # ties fire in timeline order
+        self._timed = []   # (due ms into the run, order, event)
+        self._scored = []  # (score threshold, order, event)
+        for event in self.events:
+            if event.score is not None:
+                heapq.heappush(self._scored, (event.score, next(self._order), event))
+            else:
+                self._push(event.at * 1000.0, event)
+        self.fired = 0
+
+    def _push(self, due_ms, event):
+        if event.until is None or due_ms < event.until * 1000.0:
+            heapq.heappush(self._timed, (due_ms, next(self._order), event))
+
+    def fork(self):
+        """Independent copy with the same pending events (for Game.fork())."""
+        dup = Director.__new__(Director)
+        dup.__dict__ = self.__dict__.copy()
+        dup._order = itertools.count(next(self._order))
+        dup._timed = list(self._timed)
+        dup._scored = list(self._scored)
+        return dup
+
+    def interval(self, event, run_ms):
+        """Repeat interval of `event` at run_ms into the run."""
+        every = event.every - run_ms / 1000.0 * event.accel
+        return max(event.min_every or 0.0, every)
+
+    def run(self, run_ms, score, fire):
+        """
+        Call fire(event) for every event due at run_ms into the run or at
+        `score`, in due order; repeating ones are rescheduled from now.
+        """
+        timed = self._timed
+        scored = self._scored
+        due = []
+        while timed and timed[0][0] <= run_ms:
+            due.append(heapq.heappop(timed)[2])
+        while scored and scored[0][0] <= score:
+            due.append(heapq.heappop(scored)[2])
+        for event in due:
+            if fire(event) is False:
+                self._push(run_ms + 1.0, event)  # next tick
+                continue
+            self.fired += 1
+            if event.every is not None:
+                self._push(run_ms + self.interval(event, run_ms), event)
+
+    def pending(self):
+        """How many events are still scheduled."""
+        return len(self._timed) + len(self._scored)
+
+
+def preview(timeline, seconds, score_per_sec, step_ms=1000.0 / 60):
+    """Fire a timeline headless; returns [(run sec, event), ...] in firing order."""
+    director = Director(timeline)
+    fired = []
+    run_ms = 0.0
+    while run_ms <= seconds * 1000.0:
+        director.run(run_ms, run_ms / 1000.0 * score_per_sec,
+                     lambda event: fired.append((run_ms / 1000.0, event)))
+        run_ms += step_ms
+    return fired
+
+
+def describe(event):
+    extra = " ".join(f"{k}={v}" for k, v in sorted(event.params.items()))
+    return f"{event.action} x{event.count}" + (f" ({extra})" if extra else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preview the spawn timeline headless")
+    parser.add_argument("--seconds", type=float, default=300.0)
+    parser.add_argument("--score-per-sec", type=float, default=1000.0,
+                        help="assumed score rate, for score-triggered events")
+    parser.add_argument("--bucket", type=float, default=30.0, help="seconds per summary row")
+    args = parser.parse_args()
+    import index  # lazily: index imports this module
+
+    fired = preview(index.SPAWN_TIMELINE, args.seconds, args.score_per_sec)
+    print(f"{len(fired)} firings over {args.seconds:.0f}s at {args.score_per_sec:.0f} points/s")
+    print("\nOne-off events:")
+    for t, event in fired:
+        if event.every is None:
+            print(f"  {t:8.1f}s  {describe(event)}")
+
+    print(f"\nRepeating events per {args.bucket:.0f}s (batch sizes summed):")
+    actions = sorted({event.action for _, event in fired if event.every is not None})
+    buckets = {}
+    for t, event in fired:
+        if event.every is not None:
+            buckets.setdefault(int(t // args.bucket), Counter())[event.action] += event.count
+    print(f"{'from':>8}" + "".join(f"{a:>14}" for a in actions))
+    for b in sorted(buckets):
+        print(f"{b * args.bucket:>7.0f}s" + "".join(f"{buckets[b][a]:>14}" for a in actions))
+
+
+if __name__ == "__main__":
+    main()
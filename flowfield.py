@@ -0,0 +1,164 @@
+"""
+Shared flow field for horde steering.
+
+The world is covered by a coarse grid. Once per tick FlowField.update() works
+out, for every cell, which way to go to reach the target (the player), and
+each enemy then looks its cell up in O(1) instead of doing its own pathing.
+
+Cells carry a traversal cost: 1 is open ground, higher values are places to
+avoid (add_weight(), e.g. around gates) and inf is a wall (block()).
+
+An integration field (cost of the cheapest 8-connected path to the target
+cell) is relaxed with whole-grid NumPy sweeps, and each cell points down its
+slope, weighted over the neighbours that are cheaper; wall cells point out
+to their cheapest open neighbour. This reruns only when the target changes
+cell or the costs change (a few ms on the default 40x30 grid), so the
+per-tick cost is one list lookup per enemy however many follow the field.
+
+direction() returns None, meaning "steer straight at the target", while
+every cell costs 1 (a straight line is then the path, and pygame's own
+vector normalize is cheaper than a lookup) and within NEAR_CELLS of the
+target cell, so the last stretch stays exact.
+"""
+import math
+
+import numpy as np
+
+NEAR_CELLS = 1
+# 8-connected neighbours: (row offset, col offset, step length)
+_NEIGHBOURS = tuple((dr, dc, math.hypot(dr, dc))
+                    for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc)
+
+
+def _shifted(a, dr, dc, fill):
+    """out[r, c] = a[r + dr, c + dc], `fill` outside the grid."""
+    out = np.full_like(a, fill)
+    rows, cols = a.shape
+    out[max(0, -dr):rows - max(0, dr), max(0, -dc):cols - max(0, dc)] = \
+        a[max(0, dr):rows - max(0, -dr), max(0, dc):cols - max(0, -dc)]
+    return out
+
+
+class FlowField:
+    def __init__(self, world_w, world_h, cell=80, x0=0, y0=0):
+        """Covers world_w x world_h from (x0, y0) (the arena in large worlds)."""
+        self.cell = cell
+        self.x0 = x0
+        self.y0 = y0
+        self.cols = math.ceil(world_w / cell)
+        self.rows = math.ceil(world_h / cell)
+        self.cost = np.ones((self.rows, self.cols))
+        centres = (x0 + (np.arange(self.cols) + 0.5) * cell,
+                   y0 + (np.arange(self.rows) + 0.5) * cell)
+        self._cx, self._cy = np.meshgrid(*centres)
+        self._dirty = True
+        self._weighted = False
+        self._target_cell = None
+        self.recomputes = 0
+        # Flat row-major list of (dx, dy) per cell, None near the target, so
+        # a lookup is one list indexing
+        self._dirs = None
+        self.distance = None  # integration field (weighted mode only)
+
+    def fork(self):
+        """
+        Copy for a forked game: the cost grid is copied, the computed field is
+        shared (it is replaced, never changed in place, when recomputed).
+        """
+        dup = FlowField.__new__(FlowField)
+        dup.__dict__ = self.__dict__.copy()
+        dup.cost = self.cost.copy()
+        return dup
+
+    # --- costs ---
+
+    def _cells_in(self, x, y, radius):
+        return (self._cx - x) ** 2 + (self._cy - y) ** 2 <= radius * radius
+
+    def block(self, x, y, radius):
+        """Make the cells whose centres are within `radius` of (x, y) walls."""
+        self.cost[self._cells_in(x, y, radius)] = np.inf
+        self._dirty = True
+
+    def add_weight(self, x, y, radius, weight):
+        """Add `weight` to the cost of cells near (x, y) (e.g. gate avoidance)."""
+        self.cost[self._cells_in(x, y, radius)] += weight
+        self._dirty = True
+
+    def clear(self):
+        self.cost.fill(1.0)
+        self._dirty = True
+
+    # --- field ---
+
+    def cell_of(self, x, y):
+        col = min(self.cols - 1, max(0, int((x - self.x0) // self.cell)))
+        row = min(self.rows - 1, max(0, int((y - self.y0) // self.cell)))
+        return row, col
+
+    def update(self, tx, ty):
+        """Point the field at (tx, ty)."""
+        target_cell = self.cell_of(tx, ty)
+        if self._dirty:
+            self._weighted = bool((self.cost != 1.0).any())
+        if self._weighted and (self._dirty or target_cell != self._target_cell):
+            self._integrate(target_cell)
+        self._target_cell = target_cell
+        self._dirty = False
+
+    def _integrate(self, target_cell):
+        cost = self.cost
+        rows, cols = cost.shape
+        # dist lives inside an inf border, so each neighbour is a plain view
+        padded = np.full((rows + 2, cols + 2), np.inf)
+        dist = padded[1:-1, 1:-1]
+        dist[target_cell] = 0.0
+        views = [(padded[1 + dr:rows + 1 + dr, 1 + dc:cols + 1 + dc], step * cost)
+                 for dr, dc, step in _NEIGHBOURS]
+        # Relax until nothing improves (bounded by the longest possible path)
+        best = np.empty_like(dist)
+        for _ in range(rows * cols):
+            best[:] = dist
+            for view, step_cost in views:
+                np.minimum(best, view + step_cost, out=best)
+            if np.array_equal(best, dist):
+                break
+            dist[:] = best
+        self.distance = dist.copy()
+
+        # Walls (and anything walled in) sit just above their surroundings,
+        # so they drain towards the open cells next to them
+        finite = np.isfinite(dist)
+        dist[~finite] = (dist[finite].max() if finite.any() else 0.0) + 1.0
+        padded[0, :] = padded[-1, :] = padded[:, 0] = padded[:, -1] = np.nan
+
+        # Downhill direction, weighted by how much cheaper each neighbour is
+        dx = np.zeros(cost.shape)
+        dy = np.zeros(cost.shape)
+        with np.errstate(invalid="ignore"):
+            for (dr, dc, step), (view, _) in zip(_NEIGHBOURS, views):
+                drop = (dist - view) / step
+                drop[~(drop > 0)] = 0.0  # uphill, level or off the grid (nan)
+                dx += drop * (dc / step)
+                dy += drop * (dr / step)
+        length = np.hypot(dx, dy)
+        length[length == 0] = 1.0
+        dirs = list(zip((dx / length).ravel().tolist(), (dy / length).ravel().tolist()))
+        tr, tc = target_cell
+        for r in range(max(0, tr - NEAR_CELLS), min(rows, tr + NEAR_CELLS + 1)):
+            for c in range(max(0, tc - NEAR_CELLS), min(cols, tc + NEAR_CELLS + 1)):
+                dirs[r * cols + c] = None
+        self._dirs = dirs
+        self.recomputes += 1
+
+    def direction(self, x, y):
+        """Unit (dx, dy) to follow from (x, y), or None to steer straight."""
+        if not self._weighted:
+            return None
+        cell = self.cell
+        col = int((x - self.x0) // cell)
+        row = int((y - self.y0) // cell)
+        if not (0 <= col < self.cols and 0 <= row < self.rows):
+            col = min(self.cols - 1, max(0, col))
+            row = min(self.rows - 1, max(0, row))
+        return self._dirs[row * self.cols + col]
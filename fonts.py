@@ -0,0 +1,57 @@
+"""
+Font loading without the system font scan.
+
+pygame.font.SysFont() builds its font table by scanning every installed font
+(fc-list on Linux) the first time it is used, which dominates cold start on
+machines with large font collections. FontCache remembers which file each
+(name, bold) resolved to in a small JSON file, so later starts open the file
+directly. Fonts that can't be found fall back to pygame's bundled default font.
+"""
+import json
+import os
+
+import pygame
+
+
+class FontCache:
+    def __init__(self, path):
+        self.path = path
+        self.misses = 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def resolve(self, name, bold=False):
+        """Return (file path or None for the bundled font, whether bold must be faked)."""
+        key = f"{name}|{int(bold)}"
+        entry = self._entries.get(key)
+        if entry is not None and (entry["path"] is None or os.path.exists(entry["path"])):
+            return entry["path"], entry["fake_bold"]
+
+        self.misses += 1
+        path = pygame.font.match_font(name, bold=bold)
+        # match_font falls back to the regular face when there is no bold one;
+        # SysFont then emboldens it, so do the same.
+        fake_bold = bold and (path is None or path == pygame.font.match_font(name))
+        self._entries[key] = {"path": path, "fake_bold": fake_bold}
+        self._save()
+        return path, fake_bold
+
+    def font(self, name, size, bold=False):
+        path, fake_bold = self.resolve(name, bold)
+        font = pygame.font.Font(path, size)
+        if fake_bold:
+            font.set_bold(True)
+        return font
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
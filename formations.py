@@ -0,0 +1,101 @@
+"""
+Star-swarm formations.
+
+A Formation is one swarm group. Once per tick it predicts where the player is
+heading, moves its centre toward that point and lays its slots out in the
+frame facing it; each member then just flies to its own slot. The per-tick
+prediction and frame math is therefore paid per group, not per member, and a
+member's update is one step toward a point.
+
+Shapes are data, like the boss bullet patterns: `slots(n)` gives each
+member's (forward, side) offset in px from the centre, and the layout shrinks
+toward the centre over `close_ms` (down to `tightest`) so the group closes in.
+
+    line     members abreast across the player's path, boxing them in
+    ring     a circle around the player that tightens
+    pincer   two wings from the flanks, with one member as the anvil behind
+    wedge    a V with the tip on the player
+"""
+import math
+
+import pygame
+
+PREDICT_FRAMES = 18      # how far ahead of the player the group aims
+CENTRE_SPEED = 0.8       # formation centre speed, as a share of member speed
+
+
+def _line(n):
+    return [(0.0, (i - (n - 1) / 2) * 110.0) for i in range(n)]
+
+
+def _ring(n):
+    return [(260.0 * math.cos(2 * math.pi * i / n), 260.0 * math.sin(2 * math.pi * i / n))
+            for i in range(n)]
+
+
+def _pincer(n):
+    slots = [(-220.0, 0.0)] if n % 2 else []  # the anvil
+    for rank in range(n // 2):
+        for side in (-1.0, 1.0):
+            slots.append((60.0 - 70.0 * rank, side * 300.0))
+    return slots
+
+
+def _wedge(n):
+    slots = [(0.0, 0.0)]
+    for i in range(1, n):
+        rank = (i + 1) // 2
+        slots.append((-80.0 * rank, (-1.0 if i % 2 else 1.0) * 80.0 * rank))
+    return slots
+
+
+FORMATIONS = {
+    "line": {"slots": _line, "close_ms": 4000, "tightest": 0.3},
+    "ring": {"slots": _ring, "close_ms": 5000, "tightest": 0.1},
+    "pincer": {"slots": _pincer, "close_ms": 3000, "tightest": 0.2},
+    "wedge": {"slots": _wedge, "close_ms": None, "tightest": 1.0},
+}
+
+
+class Formation:
+    VECTORS = ("pos", "forward")  # mutable Vector2s, copied by index.twin()
+
+    def __init__(self, shape, x, y, heading, size, speed):
+        spec = FORMATIONS[shape]
+        self.shape = shape
+        self.offsets = spec["slots"](size)
+        self.close_ms = spec["close_ms"]
+        self.tightest = spec["tightest"]
+        self.pos = pygame.math.Vector2(x, y)  # formation centre
+        self.forward = pygame.math.Vector2(heading).normalize()
+        self.speed = speed * CENTRE_SPEED
+        self.age = 0.0
+        self.slots = []
+        self._layout(1.0)
+
+    def _layout(self, scale):
+        fx, fy = self.forward
+        cx, cy = self.pos
+        fx *= scale
+        fy *= scale
+        # forward offset along (fx, fy), side offset along the perpendicular (-fy, fx);
+        # plain (x, y) tuples, which members read without building vectors
+        self.slots = [(cx + f * fx - s * fy, cy + f * fy + s * fx) for f, s in self.offsets]
+
+    def update(self, player, dt, frame_ms):
+        """Advance the group by dt ms (speeds are per frame_ms frame)."""
+        self.age += dt
+        pos = self.pos
+        px, py = player.pos
+        vx, vy = player.vel
+        dx = px + vx * PREDICT_FRAMES - pos.x
+        dy = py + vy * PREDICT_FRAMES - pos.y
+        dist = math.hypot(dx, dy)
+        if dist > 0:
+            self.forward.update(dx / dist, dy / dist)
+            move = min(dist, self.speed * dt / frame_ms) / dist
+            pos.update(pos.x + dx * move, pos.y + dy * move)
+        scale = 1.0
+        if self.close_ms:
+            scale = max(self.tightest, 1.0 - self.age / self.close_ms)
+        self._layout(scale)
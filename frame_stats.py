@@ -0,0 +1,55 @@
+"""
+Frame time statistics for --frame-stats.
+
+on_present() runs once per presented frame and records the time since the
+previous one, plus how many sim steps the snapshot advanced, so display rate
+and sim rate can be compared directly (with interpolation the first should
+follow the hardware while the second stays at FPS).
+"""
+import time
+from collections import deque
+
+WINDOW = 10_000  # frames kept for percentiles
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+class FrameStats:
+    def __init__(self, window=WINDOW):
+        self.frame_ms = deque(maxlen=window)
+        self.frames = 0
+        self.sim_steps = 0
+        self.wall = 0.0
+        self._last = None
+        self._last_seq = 0
+
+    def on_present(self, snap):
+        now = time.perf_counter()
+        if self._last is not None:
+            dt = now - self._last
+            self.frame_ms.append(dt * 1000.0)
+            self.wall += dt
+            self.frames += 1
+            # seq starts over when a run restarts
+            self.sim_steps += max(0, snap.seq - self._last_seq)
+        self._last = now
+        self._last_seq = snap.seq
+
+    def report(self):
+        if not self.frames:
+            return "frames: 0"
+        times = list(self.frame_ms)
+        mean = sum(times) / len(times)
+        return (
+            f"frames: {self.frames} in {self.wall:.1f}s  "
+            f"({self.frames / self.wall:.1f} fps, sim {self.sim_steps / self.wall:.1f} Hz)\n"
+            f"frame ms: mean {mean:.2f}  p50 {percentile(times, 50):.2f}  "
+            f"p95 {percentile(times, 95):.2f}  p99 {percentile(times, 99):.2f}  "
+            f"max {max(times):.2f}"
+        )
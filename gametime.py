@@ -0,0 +1,27 @@
+"""
+Millisecond game clock.
+
+pygame.time.get_ticks() only counts once pygame.init() has started SDL's timer
+subsystem, and the game deliberately initializes just display and font, so
+everything reads time from here instead.
+
+Headless tools that step the game faster than real time install their own
+source with set_source() so timestamps taken inside the game follow sim time.
+"""
+import time
+
+_EPOCH = time.perf_counter()
+_source = None
+
+
+def get_ticks():
+    """Milliseconds since the game module was imported (or from the installed source)."""
+    if _source is not None:
+        return _source()
+    return int((time.perf_counter() - _EPOCH) * 1000)
+
+
+def set_source(fn):
+    """Read ticks from fn() instead of the wall clock; None restores the wall clock."""
+    global _source
+    _source = fn
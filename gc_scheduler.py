@@ -0,0 +1,107 @@
+"""
+Keeps CPython's cyclic GC out of the way of active play.
+
+- freeze() moves everything allocated during startup (fonts, modules, the
+  window) into the permanent generation so later collections skip it.
+- While playing, thresholds are raised so full (gen 2) collections
+  effectively stop happening mid-fight.
+- When the game reaches a natural break (respawn countdown, pause, game
+  over) one explicit full collection runs there instead.
+- A gc.callbacks hook times every collection. Each presented frame that runs
+  over budget is counted as a GC hitch or a game-work hitch, depending on
+  which took most of the overrun.
+"""
+import gc
+import time
+from collections import Counter, deque
+
+PLAY_THRESHOLDS = (20_000, 50, 1_000)
+BREAK_STATES = ("respawning", "paused", "game_over")
+HITCH_FACTOR = 1.5  # frame counts as a hitch above budget * HITCH_FACTOR
+
+
+class GCScheduler:
+    def __init__(self, fps):
+        self.budget_ms = 1000.0 / fps if fps else 1000.0 / 60
+        self.default_thresholds = gc.get_threshold()
+        self._state = None
+        self._last_present = None
+
+        # GC pause accounting (filled by the gc callback)
+        self._gc_start = None
+        self._frame_gc_ms = 0.0
+        self.gc_pauses = Counter()       # generation -> count
+        self.gc_ms = Counter()           # generation -> total ms
+        self.max_pause_ms = 0.0
+        self.explicit_collections = 0
+
+        # Hitch accounting
+        self.frames = 0
+        self.hitches = Counter()         # "gc" / "game" -> count
+        self.recent_hitches = deque(maxlen=32)  # (frame_ms, gc_ms, cause, state)
+
+    def install(self):
+        gc.callbacks.append(self._on_gc)
+
+    def uninstall(self):
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        gc.set_threshold(*self.default_thresholds)
+
+    def freeze(self):
+        """Call once startup assets are loaded."""
+        gc.collect()
+        gc.freeze()
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+        elif self._gc_start is not None:
+            ms = (time.perf_counter() - self._gc_start) * 1000.0
+            self._gc_start = None
+            gen = info.get("generation", 2)
+            self.gc_pauses[gen] += 1
+            self.gc_ms[gen] += ms
+            self.max_pause_ms = max(self.max_pause_ms, ms)
+            self._frame_gc_ms += ms
+
+    def on_present(self, snap):
+        """Per presented frame: follow state changes and classify slow frames."""
+        now = time.perf_counter()
+        state = snap.state
+        if state != self._state:
+            if state == "playing":
+                gc.set_threshold(*PLAY_THRESHOLDS)
+            elif state in BREAK_STATES:
+                gc.set_threshold(*self.default_thresholds)
+                gc.collect()
+                self.explicit_collections += 1
+            self._state = state
+            # The explicit collection is scheduled, not a hitch
+            self._frame_gc_ms = 0.0
+            self._last_present = now
+            return
+
+        if self._last_present is not None:
+            frame_ms = (now - self._last_present) * 1000.0
+            self.frames += 1
+            if frame_ms > self.budget_ms * HITCH_FACTOR:
+                over = frame_ms - self.budget_ms
+                cause = "gc" if self._frame_gc_ms >= over * 0.5 else "game"
+                self.hitches[cause] += 1
+                self.recent_hitches.append((frame_ms, self._frame_gc_ms, cause, state))
+        self._last_present = now
+        self._frame_gc_ms = 0.0
+
+    def report(self):
+        lines = [f"frames: {self.frames}  hitches: gc={self.hitches['gc']} "
+                 f"game={self.hitches['game']}  (budget {self.budget_ms:.1f} ms)"]
+        for gen in sorted(self.gc_pauses):
+            n = self.gc_pauses[gen]
+            lines.append(f"gen{gen}: {n} collections, {self.gc_ms[gen]:.1f} ms total, "
+                         f"{self.gc_ms[gen] / n:.2f} ms avg")
+        lines.append(f"max pause {self.max_pause_ms:.2f} ms, "
+                     f"{self.explicit_collections} scheduled collections")
+        for frame_ms, gc_ms, cause, state in self.recent_hitches:
+            lines.append(f"  hitch {frame_ms:6.1f} ms ({cause}, gc {gc_ms:.1f} ms, {state})")
+        return "\n".join(lines)
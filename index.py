@@ -1,14 +1,82 @@
+import time
+STARTUP_T0 = time.perf_counter()  # for --measure-startup
+
+import numpy as np
 import pygame
+import os
 import sys
 import random
 import math
+import argparse
+import itertools
+from collections import namedtuple
+
+from bullet_patterns import BOSS_PATTERNS, BulletBuffer, compile_pattern
+from capture import FORMATS as CAPTURE_FORMATS, FrameRecorder
+from collision import first_hit, sweep_pairs
+from director import Director
+from flowfield import FlowField
+from formations import Formation
+from fonts import FontCache
+from frame_stats import FrameStats
+from gametime import get_ticks
+from particles import FADE_LEVELS, ParticleSystem
+from gc_scheduler import GCScheduler
+from lod import SimLod, check_bands
+from leaderboard_client import LeaderboardClient
+from metrics import GameMetrics, MetricsServer
+from minimap import Minimap
+from parallel import ChunkPool, attract, inside, integrate
+from pipeline import run_pipelined
+from profiler import ProfileCapture, parse_spec
+from run_history import RunHistory, bosses_mask
+from separation import separation
+from spectator import SpectatorServer, parse_addr
+from telemetry import EventBus, TelemetryWriter
+from world import ACTIVE_RADIUS, CHUNK_SIZE, ChunkedWorld, arena_of, parse_size as parse_world_size
 
 # --- Settings ---
 FPS = 60
 
-# World size
+# Speeds below are in pixels per 60 Hz frame; updates scale them by
+# dt / SPEED_FRAME_MS so longer sim steps cover the same ground.
+SPEED_FRAME_MS = 1000.0 / 60
+MAX_STEP_MS = 100  # longest single sim step (10 Hz) before the game slows down
+MAX_CATCHUP_STEPS = 5  # sim steps run per frame at most; beyond that time is dropped
+
+# Local data (offline score queue etc.)
+DATA_DIR = os.environ.get(
+    "GEOMETRICA_DATA_DIR", os.path.join(os.path.expanduser("~"), ".geometrica")
+)
+
+# Online leaderboard (site base URL, e.g. http://localhost:5173). Empty = offline.
+LEADERBOARD_URL = os.environ.get("GEOMETRICA_LEADERBOARD_URL", "")
+PLAYER_NAME = os.environ.get("GEOMETRICA_PLAYER_NAME", "Player")
+LEADERBOARD_SHOWN = 10
+
+# Serve Prometheus metrics on 127.0.0.1:<port> (see metrics.py). Empty = off.
+METRICS_PORT = os.environ.get("GEOMETRICA_METRICS_PORT", "")
+
+# Stream the run to spectators on [host:]port (see spectator.py). Empty = off.
+SPECTATE_ADDR = os.environ.get("GEOMETRICA_SPECTATE", "")
+
+# Profile capture started at launch, e.g. "600" or "cprofile:600" (see profiler.py)
+PROFILE_SPEC = os.environ.get("GEOMETRICA_PROFILE", "")
+
+# World size. GEOMETRICA_WORLD=WIDTHxHEIGHT (e.g. 50000x50000) makes a large
+# world of WORLD_CHUNK-sized chunks where only those within WORLD_ACTIVE_RADIUS
+# chunks of the player are simulated and drawn (see world.py).
 WORLD_W = 3200
 WORLD_H = 2400
+WORLD_CHUNK = CHUNK_SIZE
+WORLD_ACTIVE_RADIUS = ACTIVE_RADIUS
+LARGE_WORLD = bool(os.environ.get("GEOMETRICA_WORLD"))
+if LARGE_WORLD:  # rounded up to whole chunks
+    WORLD_W, WORLD_H = (-(-size // WORLD_CHUNK) * WORLD_CHUNK
+                        for size in parse_world_size(os.environ["GEOMETRICA_WORLD"]))
+CHUNK_GATES = 4              # about the small world's gate density
+CHUNK_GATE_MARGIN = 200
+CHUNK_POWERUP_CHANCE = 0.25
 
 PLAYER_BASE_SPEED = 8.0
 PLAYER_RADIUS = 16
@@ -72,29 +140,102 @@ BOSS3_POINTS = 600
 BOSS4_POINTS = 500
 
 BOSS_SPEED = 1.0
-BOSS_SHOOT_INTERVAL_MS = 2000
-BOSS4_SHOOT_INTERVAL_MS = 400        # nerfed (was 200) slower streams
-BOSS_BULLET_SPEED = 6
+# Boss firing patterns (interval, speed, shape) live in bullet_patterns.PATTERNS
+BOSS_BULLET_RADIUS = 6
 
 # Star-swarm enemy
 STAR_ENEMY_SCORE_THRESHOLD = 750_000
 STAR_GROUP_INTERVAL_MS = 5000
 STAR_ENEMY_SPEED = 7.0
 STAR_ENEMY_POINTS = 20
+STAR_GROUP_SIZE = 5
 
 # Bombs
 BOMB_START = 2
 BOMB_SCORE_THRESHOLDS = [500_000, 1_000_000]
 
-# Enemies (+30% speed)
+# Enemies (+30% speed). "separation" is how hard an enemy is pushed away from
+# crowding neighbours, as a share of its own speed per neighbour at full
+# overlap (0 = it stacks freely)
 ENEMY_TYPES = {
-    "triangle": {"color": (0, 255, 255), "speed": 3.8 * 1.3, "radius": 14, "points": 5},
-    "square":   {"color": (255, 255, 0), "speed": 2.0 * 1.3, "radius": 18, "points": 2},
-    "pentagon": {"color": (255, 0, 255), "speed": 2.8 * 1.3, "radius": 20, "points": 10},
+    "triangle": {"color": (0, 255, 255), "speed": 3.8 * 1.3, "radius": 14, "points": 5,
+                 "separation": 1.0},
+    "square":   {"color": (255, 255, 0), "speed": 2.0 * 1.3, "radius": 18, "points": 2,
+                 "separation": 1.5},
+    "pentagon": {"color": (255, 0, 255), "speed": 2.8 * 1.3, "radius": 20, "points": 10,
+                 "separation": 1.2},
 }
 
+ENEMY_SPAWN_WEIGHTS = {"triangle": 0.4, "square": 0.4, "pentagon": 0.2}
+EARLY_GAME_DURATION_SEC = 30
+
+# Waves, timed events and score milestones, fired by the spawn director (see
+# director.py for the keys; `python director.py` previews the timeline)
+SPAWN_TIMELINE = [
+    # Enemy stream from the arena corners, speeding up over the run; early on
+    # it is biased toward triangles to keep the player moving
+    {"action": "enemies", "until": EARLY_GAME_DURATION_SEC, "every": ENEMY_SPAWN_INTERVAL_MS,
+     "min_every": MIN_SPAWN_INTERVAL_MS, "accel": SPAWN_ACCEL_PER_SEC, "triangle_share": 0.6},
+    {"action": "enemies", "at": EARLY_GAME_DURATION_SEC, "every": ENEMY_SPAWN_INTERVAL_MS,
+     "min_every": MIN_SPAWN_INTERVAL_MS, "accel": SPAWN_ACCEL_PER_SEC},
+    # Early-game triangle bursts
+    {"action": "enemies", "until": EARLY_GAME_DURATION_SEC, "every": 5000, "count": 7,
+     "kind": "triangle", "jitter": 80, "emit": "triangle_burst"},
+    {"action": "fire_powerup", "every": FIRE_POWERUP_INTERVAL_MS},
+    {"action": "boss", "at": BOSS1_SPAWN_TIME_SEC, "boss": 1},
+    {"action": "boss", "score": BOSS2_SPAWN_SCORE, "boss": 2},
+    {"action": "boss", "score": BOSS3_SPAWN_SCORE, "boss": 3},
+    {"action": "boss", "score": BOSS4_SPAWN_SCORE, "boss": 4},
+    # Late-game star swarms
+    {"action": "star_swarm", "score": STAR_ENEMY_SCORE_THRESHOLD, "every": STAR_GROUP_INTERVAL_MS,
+     "formations": ("line", "ring", "pincer", "wedge")},
+]
+SPAWN_TIMELINE += [{"action": "extra_life", "score": s} for s in EXTRA_LIFE_THRESHOLDS]
+SPAWN_TIMELINE += [{"action": "fire_rate_x2", "score": s} for s in FIRE_RATE_SCORE_THRESHOLDS]
+SPAWN_TIMELINE += [{"action": "bomb_earned", "score": s} for s in BOMB_SCORE_THRESHOLDS]
+
+# Shared steering field (see flowfield.py). Enemies and homing bosses follow it
+# once any cell costs more than open ground; with FLOW_GATE_WEIGHT > 0 they
+# path around gates (re-weighted every FLOW_GATE_REFRESH_STEPS as gates drift).
+FLOW_CELL = 80
+FLOW_GATE_WEIGHT = 0.0
+FLOW_GATE_REFRESH_STEPS = 30
+
+# Enemy separation (see separation.py): enemies closer than SEPARATION_RADIUS
+# push each other apart. Only the first LOD band is separated, so enemies that
+# LOD leaves at rest stay at rest; 0 turns it off.
+SEPARATION_RADIUS = 44
+SEPARATION_MAX_PUSH = 2.0  # cap on the push, as a share of the enemy's speed
+
+# Chunked updates (see parallel.py): GEOMETRICA_UPDATE_WORKERS=N moves player
+# bullets, boss bullets, orbs and powerups as arrays, in chunks on N threads;
+# unset or 0 keeps the per-object updates.
+UPDATE_WORKERS = int(os.environ.get("GEOMETRICA_UPDATE_WORKERS") or 0)
+UPDATE_POOL = ChunkPool(UPDATE_WORKERS) if UPDATE_WORKERS else None
+
+# Game.fork() copies (see autopilot.LookaheadPilot): forks share one small
+# particle pool, since nothing draws them
+FORK_PARTICLE_BUDGET = 256
+
+# Simulation LOD (see lod.py): (min distance from the player, update every Nth
+# step). Farther enemies chase in a straight line at a reduced rate, unless the
+# camera can see them (Game.view_size).
+ENEMY_LOD_BANDS = ((0, 1), (1000, 4), (1600, 8))
+# Farthest an enemy can be from the player and still be affected by it: a
+# gate's AoE when the player clips the gate's far end.
+LOD_REACH = GATE_LENGTH / 2 + PLAYER_RADIUS + GATE_AOE_RADIUS + max(
+    d["radius"] for d in ENEMY_TYPES.values())
+LOD_CLOSING_SPEED = PLAYER_BASE_SPEED * BOOST_MULTIPLIER + STAR_ENEMY_SPEED
+check_bands(ENEMY_LOD_BANDS, LOD_REACH, closing_speed=LOD_CLOSING_SPEED,
+            max_step_frames=MAX_STEP_MS / SPEED_FRAME_MS)
+# Enemies this far outside the camera already run at full rate, so none can
+# scroll into view before its next turn
+LOD_VIEW_MARGIN = LOD_CLOSING_SPEED * ENEMY_LOD_BANDS[-1][1] * MAX_STEP_MS / SPEED_FRAME_MS
+
 
 class Player:
+    VECTORS = ("pos", "prev_pos", "vel")  # mutable Vector2s, copied by twin()
+
     def __init__(self, x, y):
         self.pos = pygame.math.Vector2(x, y)
         self.radius = PLAYER_RADIUS
@@ -114,12 +255,14 @@ class Player:
 
         # Rotation (radians). 0 means facing +X (to the right).
         self.angle = 0.0
+        self.prev_angle = 0.0
 
     def update_angle(self, target_angle, dt_ms):
         """
         Smoothly rotate towards target_angle using shortest angular path.
         dt_ms is frame time in milliseconds.
         """
+        self.prev_angle = self.angle
         if target_angle is None:
             return
 
@@ -154,7 +297,8 @@ class Player:
         self.vel.xy = (0, 0)
 
     def update(self, keys, dt, now):
-        self.prev_pos = self.pos.copy()
+        k = dt / SPEED_FRAME_MS
+        self.prev_pos.update(self.pos)
 
         move = pygame.math.Vector2(0, 0)
         # WASD + Arrows
@@ -168,10 +312,10 @@ class Player:
             move.x += 1
 
         if move.length_squared() > 0:
-            move = move.normalize() * self.speed
+            move = move.normalize() * (self.speed * k)
 
         self.pos += move
-        self.vel = self.pos - self.prev_pos
+        self.vel = (self.pos - self.prev_pos) / k  # per 60 Hz frame
 
         # Clamp
         self.pos.x = max(self.radius, min(WORLD_W - self.radius, self.pos.x))
@@ -186,12 +330,16 @@ class Player:
 
     def draw(self, surface, cam_offset):
         x, y = self.pos - cam_offset
-        r = self.radius
+        Player.draw_at(surface, x, y, self.angle, self.invincible, self.boost_active)
+
+    @staticmethod
+    def draw_at(surface, x, y, angle, invincible, boost_active):
+        r = PLAYER_RADIUS
         thick = 3
 
-        if self.invincible:
+        if invincible:
             color = (255, 255, 255)
-        elif self.boost_active:
+        elif boost_active:
             color = (0, 255, 100)
         else:
             color = (0, 200, 255)
@@ -204,8 +352,8 @@ class Player:
         bottom_front_local = (r * 0.3, r)
 
         def rotate(px, py):
-            ca = math.cos(self.angle)
-            sa = math.sin(self.angle)
+            ca = math.cos(angle)
+            sa = math.sin(angle)
             return (px * ca - py * sa, px * sa + py * ca)
 
         bt = rotate(*back_top_local)
@@ -225,26 +373,37 @@ class Player:
 
 
 class Bullet:
+    VECTORS = ("pos", "prev_pos")
+
     def __init__(self, x, y, direction):
         self.pos = pygame.math.Vector2(x, y)
+        self.prev_pos = self.pos.copy()
         self.radius = BULLET_RADIUS
         self.vel = direction.normalize() * BULLET_SPEED
 
     def update(self, dt):
-        self.pos += self.vel
+        self.prev_pos.update(self.pos)
+        self.pos += self.vel * (dt / SPEED_FRAME_MS)
 
     def draw(self, surf, cam_offset):
         sx, sy = self.pos - cam_offset
-        pygame.draw.circle(surf, (255, 255, 255), (int(sx), int(sy)), self.radius)
+        Bullet.draw_at(surf, sx, sy)
+
+    @staticmethod
+    def draw_at(surf, sx, sy):
+        pygame.draw.circle(surf, (255, 255, 255), (int(sx), int(sy)), BULLET_RADIUS)
 
-    def offscreen(self):
+    def offscreen(self, bounds):
+        x0, y0, x1, y1 = bounds
         return (
-            self.pos.x < -20 or self.pos.x > WORLD_W + 20 or
-            self.pos.y < -20 or self.pos.y > WORLD_H + 20
+            self.pos.x < x0 - 20 or self.pos.x > x1 + 20 or
+            self.pos.y < y0 - 20 or self.pos.y > y1 + 20
         )
 
 
 class Enemy:
+    VECTORS = ("pos", "prev_pos")
+
     def __init__(self, t, x, y):
         self.type = t
         d = ENEMY_TYPES[t]
@@ -252,137 +411,184 @@ class Enemy:
         self.speed = d["speed"]
         self.radius = d["radius"]
         self.points = d["points"]
+        self.separation = d["separation"]
         self.pos = pygame.math.Vector2(x, y)
+        self.prev_pos = self.pos.copy()
         self.phase = random.uniform(0, math.pi * 2)
+        self.lod_slot = 0  # LOD scheduling state (see lod.py); Game.take_lod_slots()
+        self.lod_due = 0
+        self.lod_time = None
+
+    def update(self, player, dt, field=None, now=None):
+        k = dt / SPEED_FRAME_MS
+        self.prev_pos.update(self.pos)
+        flow = field.direction(self.pos.x, self.pos.y) if field is not None else None
+        if flow is not None:
+            # Same moves as below, on the field's (dx, dy) without a Vector2
+            dx, dy = flow
+            step = self.speed * k
+            if self.type == "pentagon":
+                t = get_ticks() if now is None else now
+                wob = math.sin(t / 250 + self.phase) * 1.5 * k
+                self.pos.x += dx * step - dy * wob
+                self.pos.y += dy * step + dx * wob
+            else:
+                self.pos.x += dx * step
+                self.pos.y += dy * step
+            return
 
-    def update(self, player, dt):
         direction = player.pos - self.pos
         if direction.length_squared() > 0:
             direction = direction.normalize()
 
         if self.type == "pentagon":
             perp = pygame.math.Vector2(-direction.y, direction.x)
-            wob = math.sin(pygame.time.get_ticks() / 250 + self.phase) * 1.5
-            self.pos += direction * self.speed + perp * wob
+            t = get_ticks() if now is None else now
+            wob = math.sin(t / 250 + self.phase) * 1.5
+            self.pos += (direction * self.speed + perp * wob) * k
+        else:
+            self.pos += direction * (self.speed * k)
+
+    def update_far(self, player, dt, field=None, now=None):
+        """
+        Straight-line (or flow field) chase for far LOD bands: no wobble or
+        prediction, and it ends at rest (prev_pos = pos) for the steps until
+        the next call.
+        """
+        step = self.speed * dt / SPEED_FRAME_MS
+        flow = field.direction(self.pos.x, self.pos.y) if field is not None else None
+        if flow is not None:
+            self.pos.x += flow[0] * step
+            self.pos.y += flow[1] * step
         else:
-            self.pos += direction * self.speed
+            direction = player.pos - self.pos
+            dist = direction.length()
+            if dist > 0:
+                self.pos += direction * (step / dist)
+        self.prev_pos.update(self.pos)
 
     def draw(self, surf, cam_offset):
         x, y = self.pos - cam_offset
-        r = self.radius
+        Enemy.draw_at(surf, self.type, self.color, x, y, self.radius)
 
-        if self.type == "triangle":
+    @staticmethod
+    def draw_at(surf, t, color, x, y, r):
+        if t == "triangle":
             pts = [(x, y - r), (x - r, y + r), (x + r, y + r)]
-            pygame.draw.polygon(surf, self.color, pts, 2)
-        elif self.type == "square":
+            pygame.draw.polygon(surf, color, pts, 2)
+        elif t == "square":
             rect = pygame.Rect(0, 0, r * 2, r * 2)
             rect.center = (x, y)
-            pygame.draw.rect(surf, self.color, rect, 2)
+            pygame.draw.rect(surf, color, rect, 2)
+        elif t == "star":
+            StarEnemy.draw_at(surf, color, x, y, r)
         else:
             pts = []
             for i in range(5):
                 ang = math.radians(90 + i * 72)
                 pts.append((x + r * math.cos(ang), y + r * math.sin(ang)))
-            pygame.draw.polygon(surf, self.color, pts, 2)
+            pygame.draw.polygon(surf, color, pts, 2)
 
 
 class StarEnemy:
-    """Very fast star-shaped enemies that try to box the player in as a group."""
+    """Very fast star-shaped enemies that fly in formation (see formations.py)."""
+
+    VECTORS = ("pos", "prev_pos")
 
-    def __init__(self, x, y, index_in_group):
+    def __init__(self, x, y, formation, slot):
         self.type = "star"
         self.color = (255, 255, 255)
         self.speed = STAR_ENEMY_SPEED
         self.radius = 16
         self.points = STAR_ENEMY_POINTS
+        self.separation = 0.0  # formation slots keep them apart
         self.pos = pygame.math.Vector2(x, y)
-        self.group_index = index_in_group  # 0..4
-
-    def update(self, player, dt):
-        # Predict future player position based on current velocity
-        prediction_factor = 18  # frames ahead-ish
-        predicted_pos = player.pos + player.vel * prediction_factor
-
-        to_target = predicted_pos - self.pos
-        if to_target.length_squared() == 0:
-            return
-        dir_norm = to_target.normalize()
-        perp = pygame.math.Vector2(-dir_norm.y, dir_norm.x)
-
-        # Spread the group laterally around the predicted line to box in
-        side_scale = (self.group_index - 2) * 0.9  # -2,-1,0,1,2
-        desired = dir_norm + perp * side_scale
-        if desired.length_squared() > 0:
-            desired = desired.normalize() * self.speed
+        self.prev_pos = self.pos.copy()
+        self.formation = formation
+        self.slot = slot  # index into formation.slots
+        self.lod_slot = 0
+        self.lod_due = 0
+        self.lod_time = None
+
+    def update(self, player, dt, field=None, now=None):
+        # The formation already aimed ahead of the player this step (and
+        # ignores the field); a member just flies to its slot
+        pos = self.pos
+        self.prev_pos.update(pos)
+        sx, sy = self.formation.slots[self.slot]
+        dx = sx - pos.x
+        dy = sy - pos.y
+        d2 = dx * dx + dy * dy
+        step = self.speed * dt / SPEED_FRAME_MS
+        if d2 <= step * step:
+            pos.update(sx, sy)
+        else:
+            f = step / math.sqrt(d2)
+            pos.update(pos.x + dx * f, pos.y + dy * f)
 
-        self.pos += desired
+    update_far = Enemy.update_far
 
     def draw(self, surf, cam_offset):
         x, y = self.pos - cam_offset
-        r_outer = self.radius
-        r_inner = self.radius * 0.5
+        StarEnemy.draw_at(surf, self.color, x, y, self.radius)
+
+    @staticmethod
+    def draw_at(surf, color, x, y, radius):
+        r_outer = radius
+        r_inner = radius * 0.5
 
         pts = []
         for i in range(10):
             ang = math.radians(90 + i * 36)
             r = r_outer if i % 2 == 0 else r_inner
             pts.append((x + r * math.cos(ang), y + r * math.sin(ang)))
-        pygame.draw.polygon(surf, self.color, pts, 2)
-
-
-class Explosion:
-    def __init__(self, x, y, radius, color):
-        self.pos = pygame.math.Vector2(x, y)
-        self.base = radius
-        self.color = color
-        self.start = pygame.time.get_ticks()
-        self.duration = 400
-
-    def done(self, now):
-        return now - self.start >= self.duration
-
-    def draw(self, surf, cam_offset, now):
-        t = (now - self.start) / self.duration
-        t = max(0, min(1, t))
-        radius = self.base + 25 * t
-        thick = max(1, int(4 * (1 - t)))
-
-        x, y = self.pos - cam_offset
-        pygame.draw.circle(surf, self.color, (int(x), int(y)), int(radius), thick)
+        pygame.draw.polygon(surf, color, pts, 2)
 
 
 class Orb:
-    def __init__(self, x, y):
+    VECTORS = ("pos", "prev_pos", "vel")
+
+    def __init__(self, x, y, now=None):
         self.pos = pygame.math.Vector2(x, y)
+        self.prev_pos = self.pos.copy()
         self.radius = 6
         self.color = (255, 255, 0)
-        self.spawn = pygame.time.get_ticks()
+        self.spawn = get_ticks() if now is None else now
         self.life = 8000
         ang = random.uniform(0, 2 * math.pi)
         self.vel = pygame.math.Vector2(math.cos(ang), math.sin(ang)) * random.uniform(0.3, 0.8)
 
     def update(self, dt, player_pos):
+        self.prev_pos.update(self.pos)
         # Attraction toward player if within radius
         to_player = player_pos - self.pos
         dist = to_player.length()
         if dist <= ORB_ATTRACT_RADIUS and dist > 0:
             direction = to_player / dist
             self.vel = direction * ORB_ATTRACT_SPEED
-        self.pos += self.vel
+        self.pos += self.vel * (dt / SPEED_FRAME_MS)
 
     def expired(self, now):
         return now - self.spawn >= self.life
 
     def draw(self, surf, cam_offset):
         x, y = self.pos - cam_offset
-        pygame.draw.circle(surf, self.color, (int(x), int(y)), self.radius, 2)
-        pygame.draw.circle(surf, self.color, (int(x), int(y)), self.radius // 2)
+        Orb.draw_at(surf, x, y)
+
+    @staticmethod
+    def draw_at(surf, x, y):
+        pygame.draw.circle(surf, (255, 255, 0), (int(x), int(y)), 6, 2)
+        pygame.draw.circle(surf, (255, 255, 0), (int(x), int(y)), 3)
 
 
 class Gate:
+    VECTORS = ("p1", "p2", "prev_p1", "prev_p2", "vel")
+
     def __init__(self, p1, p2):
         self.p1 = pygame.math.Vector2(p1)
         self.p2 = pygame.math.Vector2(p2)
+        self.prev_p1 = self.p1.copy()
+        self.prev_p2 = self.p2.copy()
         self.active = True
         # Give gate a small random velocity for drifting / bouncing
         angle = random.uniform(0, 2 * math.pi)
@@ -392,9 +598,13 @@ class Gate:
         if not self.active:
             return
 
+        self.prev_p1.update(self.p1)
+        self.prev_p2.update(self.p2)
+
         # Move both endpoints
-        self.p1 += self.vel
-        self.p2 += self.vel
+        step = self.vel * (dt / SPEED_FRAME_MS)
+        self.p1 += step
+        self.p2 += step
 
         # Bounce when center gets near edges
         center = (self.p1 + self.p2) * 0.5
@@ -423,6 +633,10 @@ class Gate:
             return
         p1 = self.p1 - cam_offset
         p2 = self.p2 - cam_offset
+        Gate.draw_at(surf, p1, p2)
+
+    @staticmethod
+    def draw_at(surf, p1, p2):
         pygame.draw.line(surf, (0, 255, 0), p1, p2, GATE_THICKNESS)
 
     def center(self):
@@ -450,31 +664,41 @@ class Gate:
 
 
 class FireRatePowerUp:
+    VECTORS = ("pos", "prev_pos")
+
     def __init__(self, x, y):
         self.pos = pygame.math.Vector2(x, y)
+        self.prev_pos = self.pos.copy()
         self.radius = FIRE_POWERUP_RADIUS
         self.color = (0, 180, 255)
 
     def update(self, dt, player_pos):
+        self.prev_pos.update(self.pos)
         to_player = player_pos - self.pos
         dist = to_player.length()
         if dist <= POWER_ATTRACT_RADIUS and dist > 0:
             direction = to_player / dist
-            self.pos += direction * POWER_ATTRACT_SPEED
+            self.pos += direction * (POWER_ATTRACT_SPEED * dt / SPEED_FRAME_MS)
 
     def draw(self, surf, cam_offset):
         x, y = self.pos - cam_offset
-        pygame.draw.circle(surf, (0, 0, 0), (int(x), int(y)), self.radius + 3)
-        pygame.draw.circle(surf, self.color, (int(x), int(y)), self.radius)
-        pygame.draw.circle(surf, (255, 255, 255), (int(x), int(y)), self.radius // 2)
+        FireRatePowerUp.draw_at(surf, x, y)
+
+    @staticmethod
+    def draw_at(surf, x, y):
+        r = FIRE_POWERUP_RADIUS
+        pygame.draw.circle(surf, (0, 0, 0), (int(x), int(y)), r + 3)
+        pygame.draw.circle(surf, (0, 180, 255), (int(x), int(y)), r)
+        pygame.draw.circle(surf, (255, 255, 255), (int(x), int(y)), r // 2)
 
 
 class FloatingText:
-    def __init__(self, text, x, y, color=(255, 255, 255), duration_ms=1000, scale=1.0):
+    def __init__(self, text, x, y, color=(255, 255, 255), duration_ms=1000, scale=1.0,
+                 now=None):
         self.text = text
         self.pos = pygame.math.Vector2(x, y)
         self.color = color
-        self.start = pygame.time.get_ticks()
+        self.start = get_ticks() if now is None else now
         self.duration = duration_ms
         self.scale = scale
 
@@ -482,19 +706,24 @@ class FloatingText:
         return now - self.start >= self.duration
 
     def draw(self, surf, cam_offset, now, font):
-        t = (now - self.start) / self.duration
+        x, y = self.pos - cam_offset
+        FloatingText.draw_at(surf, font, self.text, x, y, self.color,
+                             now - self.start, self.duration, self.scale)
+
+    @staticmethod
+    def draw_at(surf, font, text, x, y, color, age, duration, scale):
+        t = age / duration
         t = max(0, min(1, t))
         alpha = int(255 * (1 - t))
         offset_y = -40 * t
 
-        x, y = self.pos - cam_offset
         y += offset_y
 
-        base_surf = font.render(self.text, True, self.color)
-        if self.scale != 1.0:
+        base_surf = font.render(text, True, color)
+        if scale != 1.0:
             w, h = base_surf.get_size()
             base_surf = pygame.transform.smoothscale(
-                base_surf, (int(w * self.scale), int(h * self.scale))
+                base_surf, (int(w * scale), int(h * scale))
             )
 
         base_surf.set_alpha(alpha)
@@ -509,9 +738,12 @@ class FloatingText:
 
 
 class Boss:
-    def __init__(self, name, x, y, max_health, base_points, style_id, colors):
+    VECTORS = ("pos", "prev_pos", "base_pos")
+
+    def __init__(self, name, x, y, max_health, base_points, style_id, colors, now=None):
         self.name = name
         self.pos = pygame.math.Vector2(x, y)
+        self.prev_pos = self.pos.copy()
         base_radius = 80 if style_id == 1 else (100 if style_id == 2 else (130 if style_id == 3 else 260))
         self.radius = base_radius
         self.max_health = max_health
@@ -520,55 +752,48 @@ class Boss:
         self.style_id = style_id
         self.colors = colors  # tuple of main colors
         self.last_shot_time = 0
+        self.pattern = compile_pattern(BOSS_PATTERNS[style_id])
 
         # For oscillation (style 4)
-        self.spawn_time = pygame.time.get_ticks()
+        self.spawn_time = get_ticks() if now is None else now
         self.base_pos = self.pos.copy()
 
-    def update(self, player, now, boss_bullets):
+    def update(self, player, now, boss_bullets, dt, field=None):
+        self.prev_pos.update(self.pos)
+        t = (now - self.spawn_time) / 1000.0
         if self.style_id == 4:
             # Horizontal oscillation bullet-hell boss
-            t = (now - self.spawn_time) / 1000.0
             amplitude = 350
             freq = 0.4
             self.pos.x = self.base_pos.x + math.sin(t * 2 * math.pi * freq) * amplitude
             self.pos.y = self.base_pos.y
-
-            if now - self.last_shot_time >= BOSS4_SHOOT_INTERVAL_MS:
-                # Fire bullets from 8 equally spaced emitters, rotating slowly
-                base_angle = t * 1.5  # rotation over time
-                emitters = 8
-                for i in range(emitters):
-                    ang = base_angle + (2 * math.pi / emitters) * i
-                    dir_vec = pygame.math.Vector2(math.cos(ang), math.sin(ang))
-                    boss_bullets.append(BossBullet(self.pos.x + dir_vec.x * self.radius,
-                                                   self.pos.y + dir_vec.y * self.radius,
-                                                   dir_vec))
-                self.last_shot_time = now
         else:
             # Homing movement toward player
-            direction = player.pos - self.pos
-            if direction.length_squared() > 0:
-                self.pos += direction.normalize() * BOSS_SPEED
-
-            # Slow aimed shots toward player
-            if now - self.last_shot_time >= BOSS_SHOOT_INTERVAL_MS:
+            step = BOSS_SPEED * dt / SPEED_FRAME_MS
+            flow = field.direction(self.pos.x, self.pos.y) if field is not None else None
+            if flow is not None:
+                self.pos.x += flow[0] * step
+                self.pos.y += flow[1] * step
+            else:
                 direction = player.pos - self.pos
                 if direction.length_squared() > 0:
-                    boss_bullets.append(BossBullet(self.pos.x, self.pos.y, direction))
-                    self.last_shot_time = now
+                    self.pos += direction.normalize() * step
 
-    def draw_mandala(self, surf, cam_offset):
-        cx, cy = self.pos - cam_offset
-        R = self.radius
-        c1, c2, c3 = self.colors
+        if now - self.last_shot_time >= self.pattern.interval_ms:
+            if self.pattern.fire(boss_bullets, t, self.pos.x, self.pos.y, self.radius,
+                                 player.pos.x, player.pos.y):
+                self.last_shot_time = now
+
+    @staticmethod
+    def draw_mandala(surf, cx, cy, R, style_id, colors):
+        c1, c2, c3 = colors
 
         # Base circles
         pygame.draw.circle(surf, c1, (int(cx), int(cy)), int(R), 2)
         pygame.draw.circle(surf, c2, (int(cx), int(cy)), int(R * 0.7), 2)
         pygame.draw.circle(surf, c3, (int(cx), int(cy)), int(R * 0.4), 1)
 
-        if self.style_id >= 1:
+        if style_id >= 1:
             # Overlapping square/star
             sq_r = R * 0.7
             pts1 = [
@@ -585,7 +810,7 @@ class Boss:
                 pts2.append((cx + sq_r * math.cos(ang), cy + sq_r * math.sin(ang)))
             pygame.draw.polygon(surf, c3, pts2, 1)
 
-        if self.style_id >= 2:
+        if style_id >= 2:
             # Extra ring & petals
             pygame.draw.circle(surf, c2, (int(cx), int(cy)), int(R * 0.9), 1)
             for angle_deg in range(0, 360, 30):
@@ -594,7 +819,7 @@ class Boss:
                 y2 = cy + R * 0.9 * math.sin(ang)
                 pygame.draw.circle(surf, c3, (int(x2), int(y2)), 6, 1)
 
-        if self.style_id >= 3:
+        if style_id >= 3:
             # Dense radial lines + inner star
             for angle_deg in range(0, 360, 15):
                 ang = math.radians(angle_deg)
@@ -610,7 +835,7 @@ class Boss:
                 star_pts.append((cx + r * math.cos(ang), cy + r * math.sin(ang)))
             pygame.draw.polygon(surf, c1, star_pts, 1)
 
-        if self.style_id >= 4:
+        if style_id >= 4:
             # Extra mandala layers for the final boss
             pygame.draw.circle(surf, c3, (int(cx), int(cy)), int(R * 0.2), 1)
             for angle_deg in range(0, 360, 22):
@@ -619,12 +844,12 @@ class Boss:
                 y2 = cy + R * 0.6 * math.sin(ang)
                 pygame.draw.circle(surf, c1, (int(x2), int(y2)), 4, 0)
 
-    def draw_healthbar(self, surf, cam_offset):
-        cx, cy = self.pos - cam_offset
-        bar_width = self.radius * 2
+    @staticmethod
+    def draw_healthbar(surf, cx, cy, radius, health, max_health):
+        bar_width = radius * 2
         bar_height = 10
         bar_x = cx - bar_width / 2
-        bar_y = cy - self.radius - 20
+        bar_y = cy - radius - 20
 
         # Background
         pygame.draw.rect(
@@ -637,7 +862,7 @@ class Boss:
             2
         )
 
-        ratio = max(0.0, self.health / self.max_health)
+        ratio = max(0.0, health / max_health)
         if ratio > 0:
             pygame.draw.rect(
                 surf, (0, 255, 100),
@@ -645,400 +870,696 @@ class Boss:
             )
 
     def draw(self, surf, cam_offset, font_small):
-        self.draw_mandala(surf, cam_offset)
-        self.draw_healthbar(surf, cam_offset)
+        cx, cy = self.pos - cam_offset
+        Boss.draw_at(surf, font_small, self.name, cx, cy, self.radius, self.style_id,
+                     self.colors, self.health, self.max_health)
+
+    @staticmethod
+    def draw_at(surf, font_small, name, cx, cy, radius, style_id, colors, health, max_health):
+        Boss.draw_mandala(surf, cx, cy, radius, style_id, colors)
+        Boss.draw_healthbar(surf, cx, cy, radius, health, max_health)
 
         # Name label
-        cx, cy = self.pos - cam_offset
-        label = font_small.render(self.name, True, (255, 255, 255))
-        rect = label.get_rect(center=(int(cx), int(cy + self.radius + 18)))
+        label = font_small.render(name, True, (255, 255, 255))
+        rect = label.get_rect(center=(int(cx), int(cy + radius + 18)))
         surf.blit(label, rect)
 
 
 class BossBullet:
-    def __init__(self, x, y, direction):
-        self.pos = pygame.math.Vector2(x, y)
-        self.radius = 6
-        if direction.length_squared() == 0:
-            direction = pygame.math.Vector2(0, 1)
-        self.vel = direction.normalize() * BOSS_BULLET_SPEED
-
-    def update(self, dt):
-        self.pos += self.vel
+    """Boss bullets themselves live in a bullet_patterns.BulletBuffer."""
 
-    def draw(self, surf, cam_offset):
-        x, y = self.pos - cam_offset
-        pygame.draw.circle(surf, (255, 80, 200), (int(x), int(y)), self.radius)
-
-    def offscreen(self):
-        return (
-            self.pos.x < -50 or self.pos.x > WORLD_W + 50 or
-            self.pos.y < -50 or self.pos.y > WORLD_H + 50
-        )
+    @staticmethod
+    def draw_at(surf, x, y):
+        pygame.draw.circle(surf, (255, 80, 200), (int(x), int(y)), BOSS_BULLET_RADIUS)
 
 
-def spawn_enemy():
-    corner = random.choice(["tl", "tr", "bl", "br"])
+def spawn_enemies(bounds, count, kind=None, triangle_share=0.0, jitter=0):
+    """
+    A batch of `count` enemies, each at a random corner of `bounds` (x0, y0,
+    x1, y1), up to `jitter` px inward. Kinds are `kind`, or drawn from
+    ENEMY_SPAWN_WEIGHTS with `triangle_share` of them forced to triangles.
+    """
+    x0, y0, x1, y1 = bounds
     m = 40
-    if corner == "tl":
-        x, y = m, m
-    elif corner == "tr":
-        x, y = WORLD_W - m, m
-    elif corner == "bl":
-        x, y = m, WORLD_H - m
+    if kind is not None:
+        kinds = [kind] * count
     else:
-        x, y = WORLD_W - m, WORLD_H - m
-
-    t = random.choices(["triangle", "square", "pentagon"], weights=[0.4, 0.4, 0.2])[0]
-    return Enemy(t, x, y)
+        kinds = random.choices(list(ENEMY_SPAWN_WEIGHTS), list(ENEMY_SPAWN_WEIGHTS.values()),
+                               k=count)
+        if triangle_share:
+            kinds = ["triangle" if random.random() < triangle_share else t for t in kinds]
+    enemies = []
+    for t, corner in zip(kinds, random.choices(("tl", "tr", "bl", "br"), k=count)):
+        dx = random.randint(0, jitter) if jitter else 0
+        dy = random.randint(0, jitter) if jitter else 0
+        x = x0 + m + dx if corner in ("tl", "bl") else x1 - m - dx
+        y = y0 + m + dy if corner in ("tl", "tr") else y1 - m - dy
+        enemies.append(Enemy(t, x, y))
+    return enemies
+
+
+def move_chunked(items, pool, frames, target=None, radius=0.0, speed=0.0, steer=True,
+                 cull=None):
+    """
+    The array path of the movers' update(): gathers pos (and vel, if they have
+    one) into arrays, runs the parallel.py kernels on `pool` and writes the
+    result back. With a target, items within `radius` of it are attracted
+    like Orb (steer) or FireRatePowerUp does. Returns the items inside `cull`
+    (x0, y0, x1, y1), or all of them.
+    """
+    n = len(items)
+    if not n:
+        return items
+    chain = itertools.chain.from_iterable
+    pos = np.fromiter(chain(it.pos for it in items), np.float64, 2 * n).reshape(n, 2)
+    has_vel = hasattr(items[0], "vel")
+    if has_vel:
+        vel = np.fromiter(chain(it.vel for it in items), np.float64, 2 * n).reshape(n, 2)
+    else:
+        vel = np.zeros((n, 2))
+    prev = np.empty_like(pos)
+    if target is None:
+        pool.run(integrate, n, pos, prev, vel, frames)
+    else:
+        pool.run(attract, n, pos, prev, vel, target[0], target[1], radius, speed, frames, steer)
+    for it, (x, y), (px, py) in zip(items, pos.tolist(), prev.tolist()):
+        it.prev_pos.update(px, py)
+        it.pos.update(x, y)
+    if target is not None and steer and has_vel:
+        for it, (vx, vy) in zip(items, vel.tolist()):
+            it.vel.update(vx, vy)
+    if cull is None:
+        return items
+    keep = np.empty(n, bool)
+    pool.run(inside, n, pos, cull, keep)
+    return list(itertools.compress(items, keep.tolist()))
+
+
+def twin(obj):
+    """
+    Copy of an entity for Game.fork(): a new instance sharing the plain
+    attributes, with its own copy of each Vector2 named in its VECTORS.
+    """
+    dup = object.__new__(obj.__class__)
+    attrs = dup.__dict__ = obj.__dict__.copy()
+    for name in obj.VECTORS:
+        attrs[name] = attrs[name].copy()
+    return dup
 
 
 def circle_coll(a, ar, b, br):
     return a.distance_to(b) <= (ar + br)
 
 
-def spawn_single_gate():
-    margin = 400
-    cx = random.randint(margin, WORLD_W - margin)
-    cy = random.randint(margin, WORLD_H - margin)
+def gate_ends(bounds, margin=400, rng=random):
+    """Endpoints for a new gate somewhere inside `bounds`."""
+    x0, y0, x1, y1 = bounds
+    cx = rng.randint(x0 + margin, x1 - margin)
+    cy = rng.randint(y0 + margin, y1 - margin)
     center = pygame.math.Vector2(cx, cy)
-    if random.random() < 0.5:
+    if rng.random() < 0.5:
         dir_vec = pygame.math.Vector2(1, 0)
     else:
         dir_vec = pygame.math.Vector2(0, 1)
     half = (GATE_LENGTH / 2) * dir_vec
-    p1 = center - half
-    p2 = center + half
-    return Gate(p1, p2)
+    return center - half, center + half
+
+
+def spawn_single_gate(bounds, margin=400):
+    return Gate(*gate_ends(bounds, margin))
 
 
 def spawn_gates():
     gates = []
     for _ in range(12):
-        gates.append(spawn_single_gate())
+        gates.append(spawn_single_gate((0, 0, WORLD_W, WORLD_H)))
     return gates
 
 
-def spawn_fire_powerup():
+def spawn_fire_powerup(bounds):
+    x0, y0, x1, y1 = bounds
     margin = 200
-    x = random.randint(margin, WORLD_W - margin)
-    y = random.randint(margin, WORLD_H - margin)
+    x = random.randint(x0 + margin, x1 - margin)
+    y = random.randint(y0 + margin, y1 - margin)
     return FireRatePowerUp(x, y)
 
 
-def spawn_star_group(player_pos):
-    """Spawn 5 star enemies in a group attempting to encircle the player."""
+def populate_chunk(rng, bounds):
+    """Gate and powerup rows for a newly visited chunk of a large world."""
+    x0, y0, x1, y1 = bounds
+    gates = []
+    for _ in range(CHUNK_GATES):
+        p1, p2 = gate_ends(bounds, CHUNK_GATE_MARGIN, rng)
+        gates.append((p1.x, p1.y, p2.x, p2.y))
+    powerups = []
+    if rng.random() < CHUNK_POWERUP_CHANCE:
+        powerups.append((rng.uniform(x0 + CHUNK_GATE_MARGIN, x1 - CHUNK_GATE_MARGIN),
+                         rng.uniform(y0 + CHUNK_GATE_MARGIN, y1 - CHUNK_GATE_MARGIN)))
+    return gates, powerups
+
+
+def spawn_star_group(player_pos, shape="line", size=STAR_GROUP_SIZE):
+    """A Formation of `size` star enemies 700 px from the player; returns (formation, members)."""
     group = []
     base_dist = 700
     angle = random.uniform(0, 2 * math.pi)
     center = player_pos + pygame.math.Vector2(math.cos(angle), math.sin(angle)) * base_dist
-    for i in range(5):
-        offset_angle = angle + (i - 2) * math.radians(10)
+    formation = Formation(shape, center.x, center.y, player_pos - center, size, STAR_ENEMY_SPEED)
+    for i in range(size):
+        offset_angle = angle + (i - (size - 1) / 2) * math.radians(10)
         spawn_pos = center + pygame.math.Vector2(
             math.cos(offset_angle), math.sin(offset_angle)
         ) * 60
-        group.append(StarEnemy(spawn_pos.x, spawn_pos.y, i))
-    return group
-
-
-def main():
-    pygame.init()
-    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-    screen_w, screen_h = screen.get_size()
-    pygame.display.set_caption("Geometrica")
-
-    clock = pygame.time.Clock()
-    hud_font = pygame.font.SysFont("consolas", 28)
-    timer_font = pygame.font.SysFont("consolas", 64, bold=True)
-    small_font = pygame.font.SysFont("consolas", 22)
-    tiny_font = pygame.font.SysFont("consolas", 18)
-    title_font = pygame.font.SysFont("consolas", 96, bold=True)
-
-    player = Player(WORLD_W / 2, WORLD_H / 2)
+        group.append(StarEnemy(spawn_pos.x, spawn_pos.y, formation, i))
+    return formation, group
+
+
+# Immutable per-frame view of the game, built by the sim and consumed by the renderer.
+# Entity fields are tuples of plain tuples so a snapshot can be handed to another
+# thread without copying or locking.
+RenderSnapshot = namedtuple("RenderSnapshot", [
+    "seq",             # sim step counter
+    "now",             # sim tick (ms) the snapshot was taken at
+    "published_at",    # time.perf_counter() when built (latency measurement)
+    "step_ms",         # length of the sim step that produced this state
+    "state",
+    "elapsed_sec",
+    # Moving things carry their position before the last step too (px, py),
+    # so the renderer can interpolate between the last two sim states.
+    "player",          # (x, y, px, py, angle, prev_angle, invincible, boost_active)
+    "gates",           # ((x1, y1, x2, y2, px1, py1, px2, py2), ...)
+    "fire_powerups",   # ((x, y, px, py), ...)
+    "bullets",         # ((x, y, px, py), ...)
+    "enemies",         # ((type, x, y, px, py, radius, color), ...)
+    "bosses",          # ((name, x, y, px, py, radius, style_id, colors, health, max_health), ...)
+    "boss_bullets",    # ((x, y, px, py), ...)
+    "orbs",            # ((x, y, px, py), ...)
+    "particles",       # ((x, y, px, py, color, fade level), ...)
+    "floating_texts",  # ((text, x, y, color, start, duration, scale), ...)
+    "hud",             # (score, multiplier, fire_rate, lives, bombs, last_boost_time)
+    "respawn_start_time",
+    "stats",           # pause-screen stat lines (only filled while paused)
+    "event_log",       # last 14 event log lines (only filled while paused)
+])
+
+
+def format_time_str(sec):
+    m = int(sec // 60)
+    s = int(sec % 60)
+    return f"{m:02d}:{s:02d}"
+
+
+class Game:
+    """All state for a single run, plus the per-frame simulation step."""
+
+    RESPAWN_DURATION_MS = 3000
+    fork_particles = None  # scratch particle pool for forks (see fork())
+    view_size = None  # (w, h) of the screen, set by whoever draws the game
+
+    def __init__(self):
+        self.player = Player(WORLD_W / 2, WORLD_H / 2)
+
+        self.bullets = []
+        self.enemies = []
+        self.particles = ParticleSystem(seed=random.getrandbits(32))
+        self.enemy_lod = SimLod(ENEMY_LOD_BANDS)
+        self.lod_slots = 0  # next LOD stagger slot (per game, so forks don't shift it)
+        self.formations = []  # star swarm groups, stepped before their members
+        self.flow = FlowField(WORLD_W, WORLD_H, FLOW_CELL)
+        self.orbs = []
+        self.gates = [] if LARGE_WORLD else spawn_gates()
+        self.fire_powerups = []
+        self.floating_texts = []
+        self.bosses = []
+        self.boss_bullets = BulletBuffer(WORLD_W, WORLD_H, BOSS_BULLET_RADIUS)
+        self.pool = UPDATE_POOL  # chunked array updates, or None for per-object ones
+
+        # Rectangle that is simulated: the whole world, or in a large world
+        # the live chunks around the player (paged by page_world())
+        self.arena = (0, 0, WORLD_W, WORLD_H)
+        self.world = None
+        if LARGE_WORLD:
+            self.world = ChunkedWorld(WORLD_W, WORLD_H, populate_chunk, WORLD_CHUNK,
+                                      WORLD_ACTIVE_RADIUS, seed=random.getrandbits(32))
+            self.page_world()
+
+        # Boss spawn flags
+        self.boss1_spawned = False
+        self.boss2_spawned = False
+        self.boss3_spawned = False
+        self.boss4_spawned = False
+
+        self.score = 0
+        self.multiplier = MULTIPLIER_START
+        self.fire_rate = FIRE_RATE_START
+        self.last_shot = 0
+
+        # Spawns, bosses and milestones (see SPAWN_TIMELINE)
+        self.director = Director(SPAWN_TIMELINE)
+        self.timeline_actions = {
+            "enemies": self.spawn_enemy_batch,
+            "fire_powerup": self.add_fire_powerup,
+            "boss": self.spawn_boss,
+            "star_swarm": self.spawn_star_swarm,
+            "extra_life": self.award_extra_life,
+            "fire_rate_x2": self.award_fire_rate_x2,
+            "bomb_earned": self.award_bomb,
+        }
+
+        self.state = "start_menu"  # "start_menu", "playing", "paused", "respawning", "game_over"
+        self.game_start_time = None  # set when leaving start_menu
+        self.respawn_start_time = None
+
+        # Bombs
+        self.bombs = BOMB_START
+        self.bombs_used = 0
+
+        # --- Stats tracking ---
+        self.enemies_killed = 0
+        self.enemies_killed_by_gate = 0
+        self.boss1_killed = False
+        self.boss2_killed = False
+        self.boss3_killed = False
+        self.boss4_killed = False
+        self.orbs_collected = 0
+        self.powerups_collected = 0
+        self.gates_triggered = 0
+        self.boost_uses = 0
+        self.extra_lives_earned = 0
+        self.fire_rate_doubles = 0
+        self.events = EventBus()
+
+        self.seq = 0
+        self.step_ms = SPEED_FRAME_MS
+        self.now = 0  # tick of the current update() / handle_key(), for entity timestamps
+
+        # Called as fn(game) once, when the run ends
+        self.game_over_listeners = []
+        self.final_elapsed_sec = 0.0
+
+    def elapsed_sec(self, now):
+        if self.game_start_time is None:
+            return 0.0
+        return (now - self.game_start_time) / 1000.0
+
+    def take_lod_slots(self, enemies):
+        """Give newly added enemies their LOD stagger slots; returns them."""
+        for en in enemies:
+            en.lod_slot = self.lod_slots
+            self.lod_slots += 1
+        return enemies
 
-    bullets = []
-    enemies = []
-    explosions = []
-    orbs = []
-    gates = spawn_gates()
-    fire_powerups = []
-    floating_texts = []
-    bosses = []
-    boss_bullets = []
-
-    # Boss spawn flags
-    boss1_spawned = False
-    boss2_spawned = False
-    boss3_spawned = False
-    boss4_spawned = False
-
-    score = 0
-    multiplier = MULTIPLIER_START
-    fire_rate = FIRE_RATE_START
-    last_shot = 0
-    last_spawn = 0
-    last_fire_power_spawn = -FIRE_POWERUP_INTERVAL_MS
-
-    # Star swarm
-    last_star_spawn = 0
+    def emit(self, kind, elapsed_sec, pos, **info):
+        """Publish a gameplay event at world position `pos` (see telemetry.MESSAGES)."""
+        self.events.emit(int(elapsed_sec * 1000), kind, pos.x, pos.y, **info)
 
-    # Early-game triangle bursts
-    last_triangle_burst = 0
-    TRIANGLE_BURST_INTERVAL_MS = 5000  # every 5 seconds in early game
-    EARLY_GAME_DURATION_SEC = 30
-
-    extra_index = 0
-    state = "start_menu"  # "start_menu", "playing", "paused", "respawning", "game_over"
-    game_start_time = None  # set when leaving start_menu
-    respawn_start_time = None
-    respawn_duration_ms = 3000
-
-    fire_rate_bonus_index = 0  # for score-based 2x milestones
-
-    # Bombs
-    bombs = BOMB_START
-    bomb_bonus_index = 0
-    bombs_used = 0
-
-    # --- Stats tracking ---
-    enemies_killed = 0
-    enemies_killed_by_gate = 0
-    boss1_killed = False
-    boss2_killed = False
-    boss3_killed = False
-    boss4_killed = False
-    orbs_collected = 0
-    powerups_collected = 0
-    gates_triggered = 0
-    boost_uses = 0
-    extra_lives_earned = 0
-    fire_rate_doubles = 0
-    event_log = []
-
-    def format_time_str(sec):
-        m = int(sec // 60)
-        s = int(sec % 60)
-        return f"{m:02d}:{s:02d}"
-
-    def log_event(message, elapsed_seconds):
-        nonlocal event_log
-        ts = format_time_str(elapsed_seconds)
-        event_log.append(f"{ts}  {message}")
-        if len(event_log) > 40:
-            event_log.pop(0)
-
-    def clear_playfield_for_respawn(now):
+    def clear_playfield_for_respawn(self, now):
         """Clear enemies/projectiles, reset player position & invincibility."""
-        nonlocal bullets, enemies, explosions, orbs, fire_powerups, boss_bullets
-        bullets = []
+        self.bullets = []
+        self.enemies = []
+        self.formations = []
+        self.particles.clear()
+        self.orbs = []
+        self.fire_powerups = []
+        self.boss_bullets.clear()
+        self.player.reset_to_center()
+        self.player.invincible = True
+        self.player.invincible_until = now + self.RESPAWN_DURATION_MS + 1000
+        if self.world is not None:
+            self.page_world()
+
+    def fork(self):
+        """
+        An independent copy of the run, for lookahead and what-if runs (see
+        autopilot.LookaheadPilot). Entities are copied with twin(), arrays
+        and heaps are copied, and the fork reports to nobody: it has a fresh
+        event bus, no game-over listeners, and puts its particles in one
+        scratch pool shared by all forks (nothing reads them).
+        """
+        g = Game.__new__(Game)
+        g.__dict__.update(self.__dict__)
+        g.player = twin(self.player)
+        formations = {id(f): twin(f) for f in self.formations}
+        g.formations = list(formations.values())
+        enemies = g.enemies = [twin(en) for en in self.enemies]
+        for en in enemies:
+            if en.type == "star":
+                key = id(en.formation)
+                if key not in formations:  # a group that is no longer stepped
+                    formations[key] = twin(en.formation)
+                en.formation = formations[key]
+        g.bullets = [twin(b) for b in self.bullets]
+        g.orbs = [twin(o) for o in self.orbs]
+        g.fire_powerups = [twin(p) for p in self.fire_powerups]
+        g.gates = [twin(gate) for gate in self.gates]
+        g.bosses = [twin(boss) for boss in self.bosses]
+        for boss in g.bosses:
+            boss.pattern = boss.pattern.fork()
+        g.floating_texts = list(self.floating_texts)
+        g.boss_bullets = self.boss_bullets.fork()
+        g.enemy_lod = self.enemy_lod.fork()
+        g.flow = self.flow.fork()
+        g.director = self.director.fork()
+        g.timeline_actions = {action: getattr(g, fn.__name__)
+                              for action, fn in self.timeline_actions.items()}
+        if self.world is not None:
+            g.world = self.world.fork()
+        if Game.fork_particles is None:
+            Game.fork_particles = ParticleSystem(FORK_PARTICLE_BUDGET, seed=0)
+        g.particles = Game.fork_particles
+        g.events = EventBus()
+        g.game_over_listeners = []
+        return g
+
+    def arena_center(self):
+        x0, y0, x1, y1 = self.arena
+        return (x0 + x1) / 2, (y0 + y1) / 2
+
+    def view_rect(self):
+        """
+        World rect the Renderer's camera shows, grown by LOD_VIEW_MARGIN
+        (None when nothing draws this game).
+        """
+        if self.view_size is None:
+            return None
+        w, h = self.view_size
+        px, py = self.player.pos
+        x0 = max(0, min(WORLD_W - w, px - w / 2)) - LOD_VIEW_MARGIN
+        y0 = max(0, min(WORLD_H - h, py - h / 2)) - LOD_VIEW_MARGIN
+        m = 2 * LOD_VIEW_MARGIN
+        return x0, y0, x0 + w + m, y0 + h + m
+
+    def weight_gates(self):
+        """Re-weight the flow field around the current gates."""
+        self.flow.clear()
+        for gate in self.gates:
+            c = gate.center()
+            self.flow.add_weight(c.x, c.y, GATE_AOE_RADIUS, FLOW_GATE_WEIGHT)
+
+    def separate_enemies(self, dt):
+        """
+        Push crowding enemies apart after they have moved. Positions go to
+        separation.py as arrays; only enemies that actually get pushed are
+        touched again.
+        """
+        enemies = self.enemies
+        n = len(enemies)
+        if n < 2:
+            return
+        xs = np.fromiter((en.pos.x for en in enemies), np.float64, n)
+        ys = np.fromiter((en.pos.y for en in enemies), np.float64, n)
+        speed = np.fromiter((en.speed for en in enemies), np.float64, n)
+        weight = np.fromiter((en.separation * en.speed for en in enemies), np.float64, n)
+        px, py = self.player.pos
+        reach = ENEMY_LOD_BANDS[1][0] if len(ENEMY_LOD_BANDS) > 1 else math.inf
+        full = (xs - px) ** 2 + (ys - py) ** 2 < reach * reach
+        view = self.enemy_lod.view
+        if view is not None:
+            full |= (xs >= view[0]) & (xs <= view[2]) & (ys >= view[1]) & (ys <= view[3])
+        near = np.flatnonzero((weight > 0) & full)
+        if len(near) < 2:
+            return
+        sx, sy = separation(xs[near], ys[near], SEPARATION_RADIUS)
+        # However crowded, the push per frame stays under the cap
+        w = weight[near]
+        limit = SEPARATION_MAX_PUSH * speed[near]
+        scale = w * np.minimum(1.0, limit / np.maximum(np.hypot(sx, sy) * w, 1e-9))
+        scale *= dt / SPEED_FRAME_MS
+        pushed = np.flatnonzero((sx != 0.0) | (sy != 0.0))
+        for i, dx, dy in zip(near[pushed].tolist(), (sx * scale)[pushed].tolist(),
+                             (sy * scale)[pushed].tolist()):
+            pos = enemies[i].pos
+            pos.update(pos.x + dx, pos.y + dy)
+
+    def page_world(self):
+        """
+        Large worlds: when the player changes chunk, freeze everything outside
+        the new live chunks into rows and load the chunks that became live.
+        Orbs and star swarms outside are dropped (they are short-lived).
+        """
+        world = self.world
+        entered, left = world.page(self.player.pos.x, self.player.pos.y)
+        if not (entered or left):
+            return
+        self.arena = x0, y0, x1, y1 = world.bounds
+        self.boss_bullets.bounds = (x0 - 50, y0 - 50, x1 + 50, y1 + 50)
+        active = world.active
+        key_of = world.key_of
+        cold = {}
+
+        gates = []
+        for gate in self.gates:
+            c = gate.center()
+            key = key_of(c.x, c.y)
+            if key in active:
+                gates.append(gate)
+            else:
+                cold.setdefault(key, ([], [], []))[0].append(
+                    (gate.p1.x, gate.p1.y, gate.p2.x, gate.p2.y))
+        powerups = []
+        for pwr in self.fire_powerups:
+            key = key_of(pwr.pos.x, pwr.pos.y)
+            if key in active:
+                powerups.append(pwr)
+            else:
+                cold.setdefault(key, ([], [], []))[1].append((pwr.pos.x, pwr.pos.y))
         enemies = []
-        explosions = []
-        orbs = []
-        fire_powerups = []
-        boss_bullets = []
-        player.reset_to_center()
-        player.invincible = True
-        player.invincible_until = now + respawn_duration_ms + 1000
-
-    def spawn_boss1(elapsed_sec):
-        nonlocal bosses, boss1_spawned
-        boss1_spawned = True
+        for en in self.enemies:
+            key = key_of(en.pos.x, en.pos.y)
+            if key in active:
+                enemies.append(en)
+            elif isinstance(en, Enemy):
+                cold.setdefault(key, ([], [], []))[2].append((en.type, en.pos.x, en.pos.y))
+        self.orbs = [o for o in self.orbs if key_of(o.pos.x, o.pos.y) in active]
+        for key, rows in cold.items():
+            world.store(key, *rows)
+
+        for key in entered:
+            gate_rows, powerup_rows, enemy_rows = world.load(key)
+            gates += [Gate((gx1, gy1), (gx2, gy2)) for gx1, gy1, gx2, gy2 in gate_rows]
+            powerups += [FireRatePowerUp(x, y) for x, y in powerup_rows]
+            enemies += self.take_lod_slots([Enemy(t, x, y) for t, x, y in enemy_rows])
+        self.gates = gates
+        self.fire_powerups = powerups
+        self.enemies = enemies
+
+        self.flow = FlowField(x1 - x0, y1 - y0, FLOW_CELL, x0, y0)
+        if FLOW_GATE_WEIGHT:
+            self.weight_gates()
+
+    def spawn_boss1(self, elapsed_sec):
+        self.boss1_spawned = True
+        cx, cy = self.arena_center()
         colors = ((170, 120, 255), (200, 200, 255), (255, 255, 255))
-        bosses.append(
-            Boss("BOSS I", WORLD_W / 2, WORLD_H / 2, BOSS1_HEALTH, BOSS1_POINTS, 1, colors)
+        self.bosses.append(
+            Boss("BOSS I", cx, cy, BOSS1_HEALTH, BOSS1_POINTS, 1, colors, now=self.now)
         )
-        log_event("Boss I appeared", elapsed_sec)
+        self.emit("boss_spawn", elapsed_sec, self.bosses[-1].pos, boss="Boss I")
 
-    def spawn_boss2(elapsed_sec):
-        nonlocal bosses, boss2_spawned
-        boss2_spawned = True
+    def spawn_boss2(self, elapsed_sec):
+        self.boss2_spawned = True
+        cx, cy = self.arena_center()
         colors = ((255, 255, 255), (200, 200, 220), (255, 105, 180))  # white/silver/pink
-        bosses.append(
-            Boss("BOSS II", WORLD_W / 2 + 300, WORLD_H / 2 - 200,
-                 BOSS2_HEALTH, BOSS2_POINTS, 2, colors)
+        self.bosses.append(
+            Boss("BOSS II", cx + 300, cy - 200,
+                 BOSS2_HEALTH, BOSS2_POINTS, 2, colors, now=self.now)
         )
-        log_event("Boss II appeared", elapsed_sec)
+        self.emit("boss_spawn", elapsed_sec, self.bosses[-1].pos, boss="Boss II")
 
-    def spawn_boss3(elapsed_sec):
-        nonlocal bosses, boss3_spawned
-        boss3_spawned = True
+    def spawn_boss3(self, elapsed_sec):
+        self.boss3_spawned = True
+        cx, cy = self.arena_center()
         colors = ((255, 215, 0), (200, 30, 30), (0, 0, 0))  # gold/red/black
-        bosses.append(
-            Boss("BOSS III", WORLD_W / 2 - 350, WORLD_H / 2 + 250,
-                 BOSS3_HEALTH, BOSS3_POINTS, 3, colors)
+        self.bosses.append(
+            Boss("BOSS III", cx - 350, cy + 250,
+                 BOSS3_HEALTH, BOSS3_POINTS, 3, colors, now=self.now)
         )
-        log_event("Boss III appeared", elapsed_sec)
+        self.emit("boss_spawn", elapsed_sec, self.bosses[-1].pos, boss="Boss III")
 
-    def spawn_boss4(elapsed_sec):
-        nonlocal bosses, boss4_spawned
-        boss4_spawned = True
+    def spawn_boss4(self, elapsed_sec):
+        self.boss4_spawned = True
+        cx, cy = self.arena_center()
         colors = ((255, 215, 0), (255, 50, 50), (0, 0, 0))  # intense gold/red/black
-        bosses.append(
-            Boss("BOSS IV", WORLD_W / 2, WORLD_H / 2 - 150,
-                 BOSS4_HEALTH, BOSS4_POINTS, 4, colors)
+        self.bosses.append(
+            Boss("BOSS IV", cx, cy - 150,
+                 BOSS4_HEALTH, BOSS4_POINTS, 4, colors, now=self.now)
+        )
+        self.emit("boss_spawn", elapsed_sec, self.bosses[-1].pos, boss="Boss IV")
+
+    # --- spawn timeline handlers (see SPAWN_TIMELINE) ---
+
+    def run_timeline(self, now):
+        """Fire whatever the spawn director has due at this run time and score."""
+        elapsed_sec = self.elapsed_sec(now)
+        actions = self.timeline_actions
+        self.director.run(elapsed_sec * 1000.0, self.score,
+                          lambda event: actions[event.action](event, elapsed_sec))
+
+    def spawn_enemy_batch(self, event, elapsed_sec):
+        p = event.params
+        self.enemies.extend(self.take_lod_slots(spawn_enemies(
+            self.arena, event.count, p.get("kind"),
+            p.get("triangle_share", 0.0), p.get("jitter", 0))))
+        if "emit" in p:
+            self.emit(p["emit"], elapsed_sec, self.player.pos, count=event.count)
+
+    def spawn_boss(self, event, elapsed_sec):
+        spawn = (self.spawn_boss1, self.spawn_boss2, self.spawn_boss3, self.spawn_boss4)
+        spawn[event.params["boss"] - 1](elapsed_sec)
+
+    def add_fire_powerup(self, event, elapsed_sec):
+        if len(self.fire_powerups) >= MAX_FIRE_POWERUPS:
+            return False  # try again once one is picked up
+        for _ in range(event.count):
+            self.fire_powerups.append(spawn_fire_powerup(self.arena))
+
+    def spawn_star_swarm(self, event, elapsed_sec):
+        # Groups whose members are all gone stop being stepped from here on
+        live = {id(en.formation) for en in self.enemies if en.type == "star"}
+        self.formations = [f for f in self.formations if id(f) in live]
+        shape = random.choice(event.params.get("formations", ("line",)))
+        formation, members = spawn_star_group(self.player.pos, shape)
+        self.formations.append(formation)
+        self.enemies.extend(self.take_lod_slots(members))
+        self.emit("star_swarm", elapsed_sec, formation.pos, count=len(members))
+
+    def award_extra_life(self, event, elapsed_sec):
+        self.player.lives += 1
+        self.extra_lives_earned += 1
+        self.emit("extra_life", elapsed_sec, self.player.pos, score=self.score)
+
+    def award_fire_rate_x2(self, event, elapsed_sec):
+        player = self.player
+        self.fire_rate *= 2.0
+        self.fire_rate_doubles += 1
+        self.emit("fire_rate_x2", elapsed_sec, player.pos, fire_rate=self.fire_rate)
+        self.floating_texts.append(
+            FloatingText(
+                "FIRE RATE x2!", player.pos.x, player.pos.y - 40,
+                (255, 100, 0), duration_ms=1200, scale=1.6, now=self.now
+            )
         )
-        log_event("Boss IV appeared", elapsed_sec)
 
-    def use_bomb(elapsed_sec):
-        nonlocal enemies, bullets, boss_bullets, bombs, bombs_used, orbs
-        if bombs <= 0:
-            return
-        bombs -= 1
-        bombs_used += 1
+    def award_bomb(self, event, elapsed_sec):
+        player = self.player
+        self.bombs += 1
+        self.floating_texts.append(
+            FloatingText(
+                "+BOMB", player.pos.x, player.pos.y - 60,
+                (255, 255, 0), duration_ms=1200, scale=1.6, now=self.now
+            )
+        )
+        self.emit("bomb_earned", elapsed_sec, player.pos, bombs=self.bombs)
 
-        # Make all non-boss enemies drop orbs and explode, even when cleared by bomb
-        for en in enemies:
-            explosions.append(Explosion(en.pos.x, en.pos.y, en.radius, en.color))
-            orbs.append(Orb(en.pos.x, en.pos.y))
+    def use_bomb(self, elapsed_sec):
+        if self.bombs <= 0:
+            return
+        self.bombs -= 1
+        self.bombs_used += 1
 
-        enemies = []       # enemies cleared
-        bullets = []       # clear player bullets
-        boss_bullets = []  # clear boss bullets, but bosses remain
+        player = self.player
+        cleared = len(self.enemies)
 
-        explosions.append(
-            Explosion(player.pos.x, player.pos.y, 300, (255, 255, 255))
-        )
-        floating_texts.append(
+        # Make all non-boss enemies drop orbs and explode, even when cleared by bomb
+        for en in self.enemies:
+            self.particles.explode(en.pos.x, en.pos.y, en.radius, en.color)
+            self.orbs.append(Orb(en.pos.x, en.pos.y, self.now))
+            self.emit("kill", elapsed_sec, en.pos, enemy=en.type, cause="bomb", points=0)
+
+        self.enemies = []       # enemies cleared
+        self.formations = []
+        self.bullets = []       # clear player bullets
+        self.boss_bullets.clear()  # clear boss bullets, but bosses remain
+
+        self.particles.shockwave(player.pos.x, player.pos.y, 300, (255, 255, 255))
+        self.floating_texts.append(
             FloatingText("BOMB!", player.pos.x, player.pos.y - 40,
-                         (255, 80, 80), duration_ms=1200, scale=1.8)
+                         (255, 80, 80), duration_ms=1200, scale=1.8, now=self.now)
         )
-        log_event("Bomb detonated", elapsed_sec)
-
-    running = True
-    while running:
-        dt = clock.tick(FPS)
-        now = pygame.time.get_ticks()
-
-        if game_start_time is None:
-            elapsed_ms = 0
+        self.emit("bomb", elapsed_sec, player.pos, cleared=cleared)
+
+    def handle_key(self, key, now):
+        """Apply one KEYDOWN. Returns "quit", "restart" or None."""
+        self.now = now
+        elapsed_sec = self.elapsed_sec(now)
+
+        if key == pygame.K_ESCAPE:
+            if self.state == "playing":
+                self.state = "paused"
+            elif self.state == "paused":
+                self.state = "playing"
+            elif self.state == "respawning":
+                # ignore ESC during respawn
+                pass
+            elif self.state == "game_over":
+                return "quit"
+            elif self.state == "start_menu":
+                return "quit"
+        # Start menu: select START
+        elif self.state == "start_menu" and key in (pygame.K_RETURN, pygame.K_SPACE):
+            self.state = "playing"
+            if self.game_start_time is None:
+                self.game_start_time = now
+        elif key == pygame.K_SPACE and self.state == "playing":
+            if self.player.try_activate_boost(now):
+                self.boost_uses += 1
+                self.emit("boost", elapsed_sec, self.player.pos)
+        elif key == pygame.K_e and self.state == "playing":
+            self.use_bomb(elapsed_sec)
+
+        if self.state == "paused" and key == pygame.K_q:
+            return "quit"
+
+        if self.state == "game_over" and key == pygame.K_r:
+            return "restart"
+        return None
+
+    def lose_life(self, now, cause):
+        self.player.lives -= 1
+        self.emit("death", self.elapsed_sec(now), self.player.pos,
+                  cause=cause, lives=self.player.lives)
+        if self.player.lives <= 0:
+            self.state = "game_over"
+            self.final_elapsed_sec = self.elapsed_sec(now)
+            for listener in self.game_over_listeners:
+                listener(self)
         else:
-            elapsed_ms = now - game_start_time
-        elapsed_sec = elapsed_ms / 1000.0
+            self.state = "respawning"
+            self.respawn_start_time = now
+            self.clear_playfield_for_respawn(now)
 
-        for e in pygame.event.get():
-            if e.type == pygame.QUIT:
-                running = False
-            elif e.type == pygame.KEYDOWN:
-                if e.key == pygame.K_ESCAPE:
-                    if state == "playing":
-                        state = "paused"
-                    elif state == "paused":
-                        state = "playing"
-                    elif state == "respawning":
-                        # ignore ESC during respawn
-                        pass
-                    elif state == "game_over":
-                        running = False
-                    elif state == "start_menu":
-                        running = False
-                # Start menu: select START
-                elif state == "start_menu" and e.key in (pygame.K_RETURN, pygame.K_SPACE):
-                    state = "playing"
-                    if game_start_time is None:
-                        game_start_time = pygame.time.get_ticks()
-                elif e.key == pygame.K_SPACE and state == "playing":
-                    if player.try_activate_boost(now):
-                        boost_uses += 1
-                        log_event("Boost activated", elapsed_sec)
-                elif e.key == pygame.K_e and state == "playing":
-                    use_bomb(elapsed_sec)
-
-                if state == "paused" and e.key == pygame.K_q:
-                    running = False
-
-                if state == "game_over" and e.key == pygame.K_r:
-                    return main()
-
-        keys = pygame.key.get_pressed()
+    def update(self, keys, dt, now):
+        """Advance the simulation by one step of dt milliseconds."""
+        dt = max(1, min(MAX_STEP_MS, dt))
+        self.now = now
+        self.seq += 1
+        self.step_ms = dt
+        elapsed_sec = self.elapsed_sec(now)
+        player = self.player
 
         # --- STATE: PLAYING ---
-        if state == "playing":
+        if self.state == "playing":
             player.update(keys, dt, now)
 
+            if self.world is not None:
+                self.page_world()
+
             # Move gates (bouncy)
-            for gate in gates:
+            for gate in self.gates:
                 gate.update(dt)
 
-            # Spawn scaling
-            current_spawn_interval = max(
-                MIN_SPAWN_INTERVAL_MS,
-                ENEMY_SPAWN_INTERVAL_MS - elapsed_sec * SPAWN_ACCEL_PER_SEC,
-            )
-            if now - last_spawn >= current_spawn_interval:
-                # Early game: bias toward triangles to keep player moving
-                if elapsed_sec < EARLY_GAME_DURATION_SEC and random.random() < 0.6:
-                    # Triangle-only spawn from a corner
-                    corner = random.choice(["tl", "tr", "bl", "br"])
-                    m = 40
-                    if corner == "tl":
-                        x, y = m, m
-                    elif corner == "tr":
-                        x, y = WORLD_W - m, m
-                    elif corner == "bl":
-                        x, y = m, WORLD_H - m
-                    else:
-                        x, y = WORLD_W - m, WORLD_H - m
-                    enemies.append(Enemy("triangle", x, y))
-                else:
-                    enemies.append(spawn_enemy())
-                last_spawn = now
-
-            # Early-game triangle bursts
-            if elapsed_sec < EARLY_GAME_DURATION_SEC and now - last_triangle_burst >= TRIANGLE_BURST_INTERVAL_MS:
-                for _ in range(7):
-                    corner = random.choice(["tl", "tr", "bl", "br"])
-                    m = 40
-                    jitter = 80
-                    if corner == "tl":
-                        x = m + random.randint(0, jitter)
-                        y = m + random.randint(0, jitter)
-                    elif corner == "tr":
-                        x = WORLD_W - m - random.randint(0, jitter)
-                        y = m + random.randint(0, jitter)
-                    elif corner == "bl":
-                        x = m + random.randint(0, jitter)
-                        y = WORLD_H - m - random.randint(0, jitter)
-                    else:
-                        x = WORLD_W - m - random.randint(0, jitter)
-                        y = WORLD_H - m - random.randint(0, jitter)
-                    enemies.append(Enemy("triangle", x, y))
-                last_triangle_burst = now
-                log_event("Triangle burst wave", elapsed_sec)
-
-            # Fire-rate powerups
-            if (now - last_fire_power_spawn >= FIRE_POWERUP_INTERVAL_MS and
-                    len(fire_powerups) < MAX_FIRE_POWERUPS):
-                fire_powerups.append(spawn_fire_powerup())
-                last_fire_power_spawn = now
-
-            # Boss spawns
-            if (not boss1_spawned) and elapsed_sec >= BOSS1_SPAWN_TIME_SEC:
-                spawn_boss1(elapsed_sec)
-
-            if (not boss2_spawned) and score >= BOSS2_SPAWN_SCORE:
-                spawn_boss2(elapsed_sec)
-
-            if (not boss3_spawned) and score >= BOSS3_SPAWN_SCORE:
-                spawn_boss3(elapsed_sec)
-
-            if (not boss4_spawned) and score >= BOSS4_SPAWN_SCORE:
-                spawn_boss4(elapsed_sec)
-
-            # Star swarm spawns (late-game)
-            if score >= STAR_ENEMY_SCORE_THRESHOLD and now - last_star_spawn >= STAR_GROUP_INTERVAL_MS:
-                enemies.extend(spawn_star_group(player.pos))
-                last_star_spawn = now
-                log_event("Star swarm appeared", elapsed_sec)
+            # Enemy waves, powerups, bosses and star swarms due by now
+            self.run_timeline(now)
 
             # Auto-shoot: rotate ship toward target, fire from actual nose
-            cooldown_ms = 1000.0 / fire_rate
+            cooldown_ms = 1000.0 / self.fire_rate
             target_pos = None
 
-            if bosses:
-                nearest_boss = min(bosses, key=lambda b: b.pos.distance_to(player.pos))
+            if self.bosses:
+                nearest_boss = min(self.bosses, key=lambda b: b.pos.distance_to(player.pos))
                 target_pos = nearest_boss.pos
-            elif enemies:
-                nearest = min(enemies, key=lambda e: e.pos.distance_to(player.pos))
+            elif self.enemies:
+                nearest = min(self.enemies, key=lambda e: e.pos.distance_to(player.pos))
                 target_pos = nearest.pos
 
             desired_angle = None
@@ -1051,297 +1572,417 @@ def main():
             player.update_angle(desired_angle, dt)
 
             # Fire in facing direction from front opening
-            if target_pos is not None and now - last_shot >= cooldown_ms:
+            if target_pos is not None and now - self.last_shot >= cooldown_ms:
                 forward = pygame.math.Vector2(math.cos(player.angle), math.sin(player.angle))
                 if forward.length_squared() > 0:
                     # spawn at nose tip (front of U)
                     spawn_pos = player.pos + forward.normalize() * player.radius
-                    bullets.append(Bullet(spawn_pos.x, spawn_pos.y, forward))
-                    last_shot = now
-
-            for b in bullets:
-                b.update(dt)
-            bullets = [b for b in bullets if not b.offscreen()]
-
-            for en in enemies:
-                en.update(player, dt)
-
-            for boss in bosses:
-                boss.update(player, now, boss_bullets)
-
-            for bb in boss_bullets:
-                bb.update(dt)
-            boss_bullets = [bb for bb in boss_bullets if not bb.offscreen()]
-
-            explosions = [ex for ex in explosions if not ex.done(now)]
-
-            for o in orbs:
-                o.update(dt, player.pos)
-            orbs = [o for o in orbs if not o.expired(now)]
-
-            for pwr in fire_powerups:
-                pwr.update(dt, player.pos)
-
-            floating_texts = [ft for ft in floating_texts if not ft.done(now)]
-
-            # Gates + AoE
-            for gate in gates:
+                    self.bullets.append(Bullet(spawn_pos.x, spawn_pos.y, forward))
+                    self.last_shot = now
+
+            arena = self.arena
+            frames = dt / SPEED_FRAME_MS
+            if self.pool is None:
+                for b in self.bullets:
+                    b.update(dt)
+                self.bullets = [b for b in self.bullets if not b.offscreen(arena)]
+            else:
+                x0, y0, x1, y1 = arena  # Bullet.offscreen()'s 20 px slack
+                self.bullets = move_chunked(self.bullets, self.pool, frames,
+                                            cull=(x0 - 20, y0 - 20, x1 + 20, y1 + 20))
+
+            if FLOW_GATE_WEIGHT and self.seq % FLOW_GATE_REFRESH_STEPS == 1:
+                self.weight_gates()
+            self.flow.update(player.pos.x, player.pos.y)
+            for formation in self.formations:
+                formation.update(player, dt, SPEED_FRAME_MS)
+            self.enemy_lod.view = self.view_rect()
+            self.enemy_lod.update(self.enemies, player, dt, self.flow, now)
+            if SEPARATION_RADIUS:
+                self.separate_enemies(dt)
+
+            for boss in self.bosses:
+                boss.update(player, now, self.boss_bullets, dt, self.flow)
+
+            self.boss_bullets.update(frames, self.pool)
+
+            self.particles.update(dt)
+
+            if self.pool is None:
+                for o in self.orbs:
+                    o.update(dt, player.pos)
+                for pwr in self.fire_powerups:
+                    pwr.update(dt, player.pos)
+            else:
+                move_chunked(self.orbs, self.pool, frames, player.pos,
+                             ORB_ATTRACT_RADIUS, ORB_ATTRACT_SPEED)
+                move_chunked(self.fire_powerups, self.pool, frames, player.pos,
+                             POWER_ATTRACT_RADIUS, POWER_ATTRACT_SPEED, steer=False)
+            self.orbs = [o for o in self.orbs if not o.expired(now)]
+
+            self.floating_texts = [ft for ft in self.floating_texts if not ft.done(now)]
+
+            # Gates + AoE (a triggered gate is replaced by a fresh one)
+            gates_before = self.gates_triggered
+            for gate in self.gates:
                 if gate.check_trigger(player.pos, player.radius):
-                    gates_triggered += 1
-                    log_event("Gate triggered", elapsed_sec)
-
+                    self.gates_triggered += 1
                     center = gate.center()
-                    explosions.append(Explosion(center.x, center.y, GATE_AOE_RADIUS, (0, 255, 0)))
+                    self.emit("gate", elapsed_sec, center)
+                    self.particles.shockwave(center.x, center.y, GATE_AOE_RADIUS, (0, 255, 0))
 
-                    for en in enemies[:]:
+                    for en in self.enemies[:]:
                         if en.pos.distance_to(center) <= GATE_AOE_RADIUS:
-                            explosions.append(Explosion(en.pos.x, en.pos.y, en.radius, en.color))
-                            orbs.append(Orb(en.pos.x, en.pos.y))
-                            gained = int(en.points * multiplier)
-                            score += gained
-                            enemies_killed += 1
-                            enemies_killed_by_gate += 1
-                            floating_texts.append(
+                            self.particles.explode(en.pos.x, en.pos.y, en.radius, en.color)
+                            self.orbs.append(Orb(en.pos.x, en.pos.y, self.now))
+                            gained = int(en.points * self.multiplier)
+                            self.score += gained
+                            self.enemies_killed += 1
+                            self.enemies_killed_by_gate += 1
+                            self.emit("kill", elapsed_sec, en.pos, enemy=en.type,
+                                      cause="gate", points=gained)
+                            self.floating_texts.append(
                                 FloatingText(
                                     str(gained), en.pos.x, en.pos.y,
-                                    (255, 215, 0), duration_ms=1000, scale=1.4
+                                    (255, 215, 0), duration_ms=1000, scale=1.4, now=self.now
                                 )
                             )
-                            enemies.remove(en)
-
-                    gates.append(spawn_single_gate())
-
-            # Bullet-enemy collisions
-            for b in bullets[:]:
-                hit = False
-                for en in enemies[:]:
-                    if circle_coll(b.pos, b.radius, en.pos, en.radius):
-                        explosions.append(Explosion(en.pos.x, en.pos.y, en.radius, en.color))
-                        orbs.append(Orb(en.pos.x, en.pos.y))
-                        gained = int(en.points * multiplier)
-                        score += gained
-                        enemies_killed += 1
-                        floating_texts.append(
-                            FloatingText(
-                                str(gained), en.pos.x, en.pos.y,
-                                (255, 215, 0), duration_ms=1000, scale=1.4
-                            )
-                        )
-                        bullets.remove(b)
-                        enemies.remove(en)
-                        hit = True
-                        break
-                if hit:
+                            self.enemies.remove(en)
+
+                    if self.world is None:
+                        self.gates.append(spawn_single_gate(self.arena))
+                    else:  # stays in the same chunk
+                        key = self.world.key_of(center.x, center.y)
+                        self.gates.append(spawn_single_gate(self.world.chunk_bounds(key),
+                                                            CHUNK_GATE_MARGIN))
+            if self.gates_triggered != gates_before:
+                self.gates = [gate for gate in self.gates if gate.active]
+
+            # Projectile and enemy hits use swept circles over the whole step
+            # (see collision.py) and are resolved in time-of-impact order, so a
+            # bullet hits the first thing along its path even on long steps.
+            # Bullet-enemy and bullet-boss collisions
+            hits = [(t, i, 0, j) for t, i, j in sweep_pairs(self.bullets, self.enemies)]
+            hits += [(t, i, 1, j) for t, i, j in sweep_pairs(self.bullets, self.bosses)]
+            hits.sort()
+            spent = set()
+            killed = set()
+            dead_bosses = set()
+            for _, i, is_boss, j in hits:
+                if i in spent:
+                    continue
+                if is_boss:
+                    if j in dead_bosses:
+                        continue
+                    boss = self.bosses[j]
+                    spent.add(i)
+                    boss.health -= 1
+                    if boss.health <= 0:
+                        dead_bosses.add(j)
                     continue
 
-            # Bullet-boss collisions
-            for b in bullets[:]:
-                hit_boss = False
-                for boss in bosses[:]:
-                    if circle_coll(b.pos, b.radius, boss.pos, boss.radius):
-                        boss.health -= 1
-                        bullets.remove(b)
-                        hit_boss = True
-                        if boss.health <= 0:
-                            explosions.append(
-                                Explosion(boss.pos.x, boss.pos.y, boss.radius, boss.colors[0])
-                            )
-
-                            # Boss death: lots of orbs + large points
-                            if boss.name == "BOSS I":
-                                orb_count = 15
-                            elif boss.name == "BOSS II":
-                                orb_count = 25
-                            elif boss.name == "BOSS III":
-                                orb_count = 40
-                            else:  # BOSS IV
-                                orb_count = 70
-
-                            for i in range(orb_count):
-                                ang = (2 * math.pi * i) / orb_count
-                                dist = boss.radius * random.uniform(0.3, 0.9)
-                                pos = boss.pos + pygame.math.Vector2(
-                                    math.cos(ang), math.sin(ang)
-                                ) * dist
-                                orbs.append(Orb(pos.x, pos.y))
-
-                            gained = int(boss.base_points * multiplier)
-                            score += gained
-                            floating_texts.append(
-                                FloatingText(
-                                    str(gained), boss.pos.x, boss.pos.y,
-                                    (255, 200, 255), duration_ms=1200, scale=1.6
-                                )
-                            )
-                            if boss.name == "BOSS I":
-                                boss1_killed = True
-                                log_event("Boss I defeated", elapsed_sec)
-                            elif boss.name == "BOSS II":
-                                boss2_killed = True
-                                log_event("Boss II defeated", elapsed_sec)
-                            elif boss.name == "BOSS III":
-                                boss3_killed = True
-                                log_event("Boss III defeated", elapsed_sec)
-                            elif boss.name == "BOSS IV":
-                                boss4_killed = True
-                                log_event("Boss IV defeated", elapsed_sec)
-
-                            bosses.remove(boss)
-                        break
-                if hit_boss:
+                if j in killed:
                     continue
+                en = self.enemies[j]
+                spent.add(i)
+                killed.add(j)
+                self.particles.explode(en.pos.x, en.pos.y, en.radius, en.color)
+                self.orbs.append(Orb(en.pos.x, en.pos.y, self.now))
+                gained = int(en.points * self.multiplier)
+                self.score += gained
+                self.enemies_killed += 1
+                self.emit("kill", elapsed_sec, en.pos, enemy=en.type,
+                          cause="bullet", points=gained)
+                self.floating_texts.append(
+                    FloatingText(
+                        str(gained), en.pos.x, en.pos.y,
+                        (255, 215, 0), duration_ms=1000, scale=1.4, now=self.now
+                    )
+                )
+            if spent:
+                self.bullets = [b for i, b in enumerate(self.bullets) if i not in spent]
+            if killed:
+                self.enemies = [en for j, en in enumerate(self.enemies) if j not in killed]
+            for boss in [self.bosses[j] for j in sorted(dead_bosses)]:
+                self.kill_boss(boss, elapsed_sec)
 
             # Player-enemy collisions
             if not player.invincible:
-                for en in enemies[:]:
-                    if circle_coll(player.pos, player.radius, en.pos, en.radius):
-                        player.lives -= 1
-                        enemies.remove(en)
-                        if player.lives <= 0:
-                            state = "game_over"
-                        else:
-                            state = "respawning"
-                            respawn_start_time = now
-                            clear_playfield_for_respawn(now)
-                        break
+                hit = first_hit(player, self.enemies)
+                if hit is not None:
+                    en = self.enemies.pop(hit[1])
+                    self.lose_life(now, en.type)
 
             # Player-boss collisions
-            if state == "playing" and not player.invincible:
-                for boss in bosses:
+            if self.state == "playing" and not player.invincible:
+                for boss in self.bosses:
                     if circle_coll(player.pos, player.radius, boss.pos, boss.radius):
-                        player.lives -= 1
-                        if player.lives <= 0:
-                            state = "game_over"
-                        else:
-                            state = "respawning"
-                            respawn_start_time = now
-                            clear_playfield_for_respawn(now)
+                        self.lose_life(now, "boss")
                         break
 
             # Player-boss-bullet collisions
-            if state == "playing" and not player.invincible:
-                for bb in boss_bullets[:]:
-                    if circle_coll(player.pos, player.radius, bb.pos, bb.radius):
-                        player.lives -= 1
-                        boss_bullets.remove(bb)
-                        if player.lives <= 0:
-                            state = "game_over"
-                        else:
-                            state = "respawning"
-                            respawn_start_time = now
-                            clear_playfield_for_respawn(now)
-                        break
+            if self.state == "playing" and not player.invincible:
+                hit = self.boss_bullets.first_hit(player)
+                if hit is not None:
+                    self.boss_bullets.remove(hit[1])
+                    self.lose_life(now, "boss_bullet")
 
             # Orb pickup
-            for o in orbs[:]:
+            for o in self.orbs[:]:
                 if circle_coll(player.pos, player.radius, o.pos, o.radius):
-                    multiplier += 1.0
-                    orbs_collected += 1
-                    orbs.remove(o)
+                    self.multiplier += 1.0
+                    self.orbs_collected += 1
+                    self.orbs.remove(o)
 
             # Fire-rate powerup pickup
-            for pwr in fire_powerups[:]:
+            for pwr in self.fire_powerups[:]:
                 if circle_coll(player.pos, player.radius, pwr.pos, FIRE_POWERUP_RADIUS):
-                    fire_rate += FIRE_RATE_INCREASE_PER_POWER
-                    powerups_collected += 1
-                    fire_powerups.remove(pwr)
+                    self.fire_rate += FIRE_RATE_INCREASE_PER_POWER
+                    self.powerups_collected += 1
+                    self.fire_powerups.remove(pwr)
                     text = f"+{FIRE_RATE_INCREASE_PER_POWER:.2f}/s"
-                    floating_texts.append(
+                    self.floating_texts.append(
                         FloatingText(
                             text, pwr.pos.x, pwr.pos.y,
-                            (0, 200, 255), duration_ms=1000, scale=1.2
+                            (0, 200, 255), duration_ms=1000, scale=1.2, now=self.now
                         )
                     )
-                    log_event(
-                        f"Fire rate increased to {fire_rate:.2f}/s", elapsed_sec
-                    )
-
-            # Extra lives
-            if extra_index < len(EXTRA_LIFE_THRESHOLDS):
-                if score >= EXTRA_LIFE_THRESHOLDS[extra_index]:
-                    player.lives += 1
-                    extra_lives_earned += 1
-                    log_event(
-                        f"Extra life earned (score {score})", elapsed_sec
-                    )
-                    extra_index += 1
-
-            # Fire-rate score milestones (2x)
-            while fire_rate_bonus_index < len(FIRE_RATE_SCORE_THRESHOLDS) and \
-                    score >= FIRE_RATE_SCORE_THRESHOLDS[fire_rate_bonus_index]:
-                fire_rate *= 2.0
-                fire_rate_doubles += 1
-                log_event("Fire rate x2 milestone reached", elapsed_sec)
-                fire_rate_bonus_index += 1
-                floating_texts.append(
-                    FloatingText(
-                        "FIRE RATE x2!", player.pos.x, player.pos.y - 40,
-                        (255, 100, 0), duration_ms=1200, scale=1.6
-                    )
-                )
+                    self.emit("powerup", elapsed_sec, pwr.pos, fire_rate=self.fire_rate)
 
-            # Bomb score milestones (+1 bomb)
-            while bomb_bonus_index < len(BOMB_SCORE_THRESHOLDS) and \
-                    score >= BOMB_SCORE_THRESHOLDS[bomb_bonus_index]:
-                bombs += 1
-                bomb_bonus_index += 1
-                floating_texts.append(
-                    FloatingText(
-                        "+BOMB", player.pos.x, player.pos.y - 60,
-                        (255, 255, 0), duration_ms=1200, scale=1.6
-                    )
-                )
-                log_event("Bomb +1 earned", elapsed_sec)
+            # Score milestones reached this step
+            if self.state == "playing":
+                self.run_timeline(now)
 
         # --- STATE: RESPAWNING (countdown, no updates/spawns) ---
-        elif state == "respawning":
-            if respawn_start_time is not None:
-                elapsed_respawn = now - respawn_start_time
-                if elapsed_respawn >= respawn_duration_ms:
-                    state = "playing"
-
-        # --- START MENU RENDER & LOOP SHORT-CIRCUIT ---
-        if state == "start_menu":
-            screen.fill((0, 0, 0))
-
-            # Title
-            title_surf = title_font.render("GEOMETRICA", True, (0, 200, 255))
-            title_rect = title_surf.get_rect(center=(screen_w // 2, screen_h // 2 - 80))
-            screen.blit(title_surf, title_rect)
-
-            # Subtle glow rectangle behind title
-            glow_pad_x, glow_pad_y = 40, 30
-            glow_rect = pygame.Rect(
-                title_rect.left - glow_pad_x // 2,
-                title_rect.top - glow_pad_y // 2,
-                title_rect.width + glow_pad_x,
-                title_rect.height + glow_pad_y,
+        elif self.state == "respawning":
+            if self.respawn_start_time is not None:
+                elapsed_respawn = now - self.respawn_start_time
+                if elapsed_respawn >= self.RESPAWN_DURATION_MS:
+                    self.state = "playing"
+
+    def kill_boss(self, boss, elapsed_sec):
+        self.particles.explode(boss.pos.x, boss.pos.y, boss.radius, boss.colors[0])
+        for color in boss.colors[1:]:
+            self.particles.burst(boss.pos.x, boss.pos.y, color, 120, 420, 1400)
+        self.particles.shockwave(boss.pos.x, boss.pos.y, boss.radius * 1.5, (255, 255, 255))
+
+        # Boss death: lots of orbs + large points
+        if boss.name == "BOSS I":
+            orb_count = 15
+        elif boss.name == "BOSS II":
+            orb_count = 25
+        elif boss.name == "BOSS III":
+            orb_count = 40
+        else:  # BOSS IV
+            orb_count = 70
+
+        for i in range(orb_count):
+            ang = (2 * math.pi * i) / orb_count
+            dist = boss.radius * random.uniform(0.3, 0.9)
+            pos = boss.pos + pygame.math.Vector2(
+                math.cos(ang), math.sin(ang)
+            ) * dist
+            self.orbs.append(Orb(pos.x, pos.y, self.now))
+
+        gained = int(boss.base_points * self.multiplier)
+        self.score += gained
+        self.floating_texts.append(
+            FloatingText(
+                str(gained), boss.pos.x, boss.pos.y,
+                (255, 200, 255), duration_ms=1200, scale=1.6, now=self.now
             )
-            glow_surf = pygame.Surface(glow_rect.size, pygame.SRCALPHA)
-            glow_surf.fill((10, 10, 30, 220))
-            pygame.draw.rect(glow_surf, (0, 200, 255), glow_surf.get_rect(), 4)
-            screen.blit(glow_surf, glow_rect.topleft)
-            screen.blit(title_surf, title_rect)  # redraw on top
+        )
+        if boss.name == "BOSS I":
+            self.boss1_killed = True
+        elif boss.name == "BOSS II":
+            self.boss2_killed = True
+        elif boss.name == "BOSS III":
+            self.boss3_killed = True
+        elif boss.name == "BOSS IV":
+            self.boss4_killed = True
+        self.emit("boss_defeat", elapsed_sec, boss.pos,
+                  boss=boss.name.replace("BOSS", "Boss"), points=gained)
+
+        self.bosses.remove(boss)
+
+    def run_record(self):
+        """End-of-run stats in the shape RunHistory stores."""
+        return {
+            "ended_at": time.time(),
+            "duration_s": self.final_elapsed_sec,
+            "score": self.score,
+            "multiplier": self.multiplier,
+            "fire_rate": self.fire_rate,
+            "enemies_killed": self.enemies_killed,
+            "enemies_killed_by_gate": self.enemies_killed_by_gate,
+            "orbs_collected": self.orbs_collected,
+            "powerups_collected": self.powerups_collected,
+            "gates_triggered": self.gates_triggered,
+            "boost_uses": self.boost_uses,
+            "bombs_used": self.bombs_used,
+            "extra_lives_earned": self.extra_lives_earned,
+            "fire_rate_doubles": self.fire_rate_doubles,
+            "bosses_killed": bosses_mask(self.boss1_killed, self.boss2_killed,
+                                         self.boss3_killed, self.boss4_killed),
+        }
+
+    def stats_lines(self, elapsed_sec):
+        return [
+            f"Time: {format_time_str(elapsed_sec)}",
+            f"Score: {self.score}",
+            f"Multiplier: {self.multiplier:.1f}x",
+            f"Fire Rate: {self.fire_rate:.2f}/s",
+            f"Lives: {self.player.lives}  (+{self.extra_lives_earned} extra)",
+            f"Bombs: {self.bombs}  (Used: {self.bombs_used})",
+            f"Enemies Killed: {self.enemies_killed}",
+            f"  via Gates: {self.enemies_killed_by_gate}",
+            f"Orbs Collected: {self.orbs_collected}",
+            f"Fire Powerups: {self.powerups_collected}",
+            f"Gates Triggered: {self.gates_triggered}",
+            f"Boost Uses: {self.boost_uses}",
+            f"Boss I Defeated: {'Yes' if self.boss1_killed else 'No'}",
+            f"Boss II Defeated: {'Yes' if self.boss2_killed else 'No'}",
+            f"Boss III Defeated: {'Yes' if self.boss3_killed else 'No'}",
+            f"Boss IV Defeated: {'Yes' if self.boss4_killed else 'No'}",
+            f"Fire Rate x2 Milestones: {self.fire_rate_doubles}",
+        ]
+
+    def snapshot(self, now):
+        """Build an immutable RenderSnapshot of the current frame."""
+        p = self.player
+        elapsed_sec = self.elapsed_sec(now)
+        paused = self.state == "paused"
+        return RenderSnapshot(
+            seq=self.seq,
+            now=now,
+            published_at=time.perf_counter(),
+            step_ms=self.step_ms,
+            state=self.state,
+            elapsed_sec=elapsed_sec,
+            player=(p.pos.x, p.pos.y, p.prev_pos.x, p.prev_pos.y, p.angle, p.prev_angle,
+                    p.invincible, p.boost_active),
+            gates=tuple((g.p1.x, g.p1.y, g.p2.x, g.p2.y,
+                         g.prev_p1.x, g.prev_p1.y, g.prev_p2.x, g.prev_p2.y)
+                        for g in self.gates if g.active),
+            fire_powerups=tuple((pw.pos.x, pw.pos.y, pw.prev_pos.x, pw.prev_pos.y)
+                                for pw in self.fire_powerups),
+            bullets=tuple((b.pos.x, b.pos.y, b.prev_pos.x, b.prev_pos.y) for b in self.bullets),
+            enemies=tuple((en.type, en.pos.x, en.pos.y, en.prev_pos.x, en.prev_pos.y,
+                           en.radius, en.color) for en in self.enemies),
+            bosses=tuple((bs.name, bs.pos.x, bs.pos.y, bs.prev_pos.x, bs.prev_pos.y,
+                          bs.radius, bs.style_id, bs.colors, bs.health, bs.max_health)
+                         for bs in self.bosses),
+            boss_bullets=self.boss_bullets.rows(),
+            orbs=tuple((o.pos.x, o.pos.y, o.prev_pos.x, o.prev_pos.y) for o in self.orbs),
+            particles=self.particles.rows(),
+            floating_texts=tuple((ft.text, ft.pos.x, ft.pos.y, ft.color, ft.start,
+                                  ft.duration, ft.scale) for ft in self.floating_texts),
+            hud=(self.score, self.multiplier, self.fire_rate, p.lives, self.bombs,
+                 p.last_boost_time),
+            respawn_start_time=self.respawn_start_time,
+            stats=tuple(self.stats_lines(elapsed_sec)) if paused else (),
+            event_log=self.events.recent_lines(14) if paused else (),
+        )
 
-            # "Start" label (select with ENTER / SPACE)
-            start_text = hud_font.render("START", True, (255, 255, 255))
-            start_rect = start_text.get_rect(center=(screen_w // 2, screen_h // 2 + 40))
-            screen.blit(start_text, start_rect)
 
-            # Hint text
-            hint_text = tiny_font.render("Press ENTER or SPACE to begin", True, (200, 200, 200))
-            hint_rect = hint_text.get_rect(center=(screen_w // 2, screen_h // 2 + 90))
-            screen.blit(hint_text, hint_rect)
+class Renderer:
+    """Draws RenderSnapshots to the display surface."""
+
+    def __init__(self, screen, fonts):
+        self.screen = screen
+        self.screen_w, self.screen_h = screen.get_size()
+        Game.view_size = (self.screen_w, self.screen_h)  # keeps on-screen enemies at full LOD
+        self.hud_font = fonts.font("consolas", 28)
+        self.timer_font = fonts.font("consolas", 64, bold=True)
+        self.small_font = fonts.font("consolas", 22)
+        self.tiny_font = fonts.font("consolas", 18)
+        self.title_font = fonts.font("consolas", 96, bold=True)
+
+        self.particle_sprites = {}  # (color, fade level) -> Surface
+        if LARGE_WORLD:  # the map covers the live chunks
+            span = (2 * WORLD_ACTIVE_RADIUS + 1) * WORLD_CHUNK
+            self.minimap = Minimap(min(span, WORLD_W), min(span, WORLD_H))  # M toggles
+        else:
+            self.minimap = Minimap(WORLD_W, WORLD_H)
+
+        # Optional LeaderboardClient / RunHistory shown on the game-over screen
+        self.leaderboard = None
+        self.history = None
+
+    def particle_sprite(self, color, level):
+        """Soft dot for a particle, shrinking and fading as level drops to 0."""
+        f = (level + 1) / FADE_LEVELS
+        r = 1 + int(2 * f)
+        sprite = pygame.Surface((2 * r + 1, 2 * r + 1), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, (*color, int(255 * f)), (r, r), r)
+        self.particle_sprites[(color, level)] = sprite
+        return sprite
+
+    def draw_start_menu(self):
+        screen = self.screen
+        screen_w, screen_h = self.screen_w, self.screen_h
+        screen.fill((0, 0, 0))
+
+        # Title
+        title_surf = self.title_font.render("GEOMETRICA", True, (0, 200, 255))
+        title_rect = title_surf.get_rect(center=(screen_w // 2, screen_h // 2 - 80))
+        screen.blit(title_surf, title_rect)
+
+        # Subtle glow rectangle behind title
+        glow_pad_x, glow_pad_y = 40, 30
+        glow_rect = pygame.Rect(
+            title_rect.left - glow_pad_x // 2,
+            title_rect.top - glow_pad_y // 2,
+            title_rect.width + glow_pad_x,
+            title_rect.height + glow_pad_y,
+        )
+        glow_surf = pygame.Surface(glow_rect.size, pygame.SRCALPHA)
+        glow_surf.fill((10, 10, 30, 220))
+        pygame.draw.rect(glow_surf, (0, 200, 255), glow_surf.get_rect(), 4)
+        screen.blit(glow_surf, glow_rect.topleft)
+        screen.blit(title_surf, title_rect)  # redraw on top
+
+        # "Start" label (select with ENTER / SPACE)
+        start_text = self.hud_font.render("START", True, (255, 255, 255))
+        start_rect = start_text.get_rect(center=(screen_w // 2, screen_h // 2 + 40))
+        screen.blit(start_text, start_rect)
+
+        # Hint text
+        hint_text = self.tiny_font.render("Press ENTER or SPACE to begin", True, (200, 200, 200))
+        hint_rect = hint_text.get_rect(center=(screen_w // 2, screen_h // 2 + 90))
+        screen.blit(hint_text, hint_rect)
+
+    def draw(self, snap, alpha=1.0):
+        """
+        Draw `snap`. alpha in [0, 1] places moving things between their
+        previous and current sim positions (1 = exactly the sim state).
+        """
+        if snap.state == "start_menu":
+            self.draw_start_menu()
+            return
 
-            pygame.display.flip()
-            continue  # Skip rest of drawing/logic this frame
+        screen = self.screen
+        screen_w, screen_h = self.screen_w, self.screen_h
+        if snap.state != "playing":
+            alpha = 1.0  # nothing moved since the last step
+        b = 1.0 - alpha
+        # Animations follow the same interpolated clock as positions
+        now = snap.now - b * snap.step_ms
+        hud_font = self.hud_font
+        timer_font = self.timer_font
+        small_font = self.small_font
+        tiny_font = self.tiny_font
+
+        x, y, px, py, angle, prev_angle, invincible, boost_active = snap.player
+        px = px * b + x * alpha
+        py = py * b + y * alpha
+        angle += ((prev_angle - angle + math.pi) % (2 * math.pi) - math.pi) * b
 
         # Camera
-        cam_x = player.pos.x - screen_w / 2
-        cam_y = player.pos.y - screen_h / 2
+        cam_x = px - screen_w / 2
+        cam_y = py - screen_h / 2
         cam_x = max(0, min(WORLD_W - screen_w, cam_x))
         cam_y = max(0, min(WORLD_H - screen_h, cam_y))
-        cam_offset = pygame.math.Vector2(cam_x, cam_y)
 
         # Draw background grid
         screen.fill((0, 0, 0))
@@ -1359,30 +2000,43 @@ def main():
             pygame.draw.line(screen, grid_color, (0, sy), (screen_w, sy))
 
         # Draw entities
-        for gate in gates:
-            gate.draw(screen, cam_offset)
-        for pwr in fire_powerups:
-            pwr.draw(screen, cam_offset)
-        for b in bullets:
-            b.draw(screen, cam_offset)
-        for en in enemies:
-            en.draw(screen, cam_offset)
-        for boss in bosses:
-            boss.draw(screen, cam_offset, tiny_font)
-        for bb in boss_bullets:
-            bb.draw(screen, cam_offset)
-        for o in orbs:
-            o.draw(screen, cam_offset)
-        for ex in explosions:
-            ex.draw(screen, cam_offset, now)
-        for ft in floating_texts:
-            ft.draw(screen, cam_offset, now, hud_font)
-        player.draw(screen, cam_offset)
+        # Screen position = previous * b + current * alpha - camera
+        for x1, y1, x2, y2, px1, py1, px2, py2 in snap.gates:
+            Gate.draw_at(screen, (px1 * b + x1 * alpha - cam_x, py1 * b + y1 * alpha - cam_y),
+                         (px2 * b + x2 * alpha - cam_x, py2 * b + y2 * alpha - cam_y))
+        for x, y, ox, oy in snap.fire_powerups:
+            FireRatePowerUp.draw_at(screen, ox * b + x * alpha - cam_x, oy * b + y * alpha - cam_y)
+        for x, y, ox, oy in snap.bullets:
+            Bullet.draw_at(screen, ox * b + x * alpha - cam_x, oy * b + y * alpha - cam_y)
+        for t, x, y, ox, oy, r, color in snap.enemies:
+            Enemy.draw_at(screen, t, color, ox * b + x * alpha - cam_x,
+                          oy * b + y * alpha - cam_y, r)
+        for name, x, y, ox, oy, r, style_id, colors, health, max_health in snap.bosses:
+            Boss.draw_at(screen, tiny_font, name, ox * b + x * alpha - cam_x,
+                         oy * b + y * alpha - cam_y, r, style_id, colors, health, max_health)
+        for x, y, ox, oy in snap.boss_bullets:
+            BossBullet.draw_at(screen, ox * b + x * alpha - cam_x, oy * b + y * alpha - cam_y)
+        for x, y, ox, oy in snap.orbs:
+            Orb.draw_at(screen, ox * b + x * alpha - cam_x, oy * b + y * alpha - cam_y)
+        sprites = self.particle_sprites
+        blits = []
+        for x, y, ox, oy, color, level in snap.particles:
+            sprite = sprites.get((color, level)) or self.particle_sprite(color, level)
+            r = sprite.get_width() // 2
+            blits.append((sprite, (ox * b + x * alpha - cam_x - r, oy * b + y * alpha - cam_y - r)))
+        screen.blits(blits, False)
+        for text, x, y, color, start, duration, scale in snap.floating_texts:
+            FloatingText.draw_at(screen, hud_font, text, x - cam_x, y - cam_y, color,
+                                 now - start, duration, scale)
+        Player.draw_at(screen, px - cam_x, py - cam_y, angle, invincible, boost_active)
+        origin = (0, 0)
+        if LARGE_WORLD:
+            origin = arena_of(snap.player[0], snap.player[1], WORLD_W, WORLD_H,
+                              WORLD_CHUNK, WORLD_ACTIVE_RADIUS)[:2]
+        self.minimap.draw(screen, snap, px, py, cam_x, cam_y, origin)
 
         # --- HUD: big scoreboard timer ---
-        minutes = int(elapsed_sec // 60)
-        seconds = int(elapsed_sec % 60)
-        time_str = f"{minutes:02d}:{seconds:02d}"
+        time_str = format_time_str(snap.elapsed_sec)
         time_surf = timer_font.render(time_str, True, (255, 255, 255))
         pad_x, pad_y = 30, 20
         bg_w = time_surf.get_width() + pad_x
@@ -1397,13 +2051,14 @@ def main():
         screen.blit(time_surf, (timer_x + pad_x // 2, timer_y + pad_y // 2))
 
         # Other HUD
+        score, multiplier, fire_rate, lives, bombs, last_boost_time = snap.hud
         score_text = hud_font.render(f"Score: {score}", True, (255, 255, 255))
         mult_text = hud_font.render(f"Mult: {multiplier:.1f}x", True, (255, 255, 0))
         fire_text = hud_font.render(f"Fire: {fire_rate:.2f}/s", True, (0, 200, 255))
-        lives_text = hud_font.render(f"Lives: {player.lives}", True, (255, 255, 255))
+        lives_text = hud_font.render(f"Lives: {lives}", True, (255, 255, 255))
         bombs_text = hud_font.render(f"Bombs: {bombs} (E)", True, (255, 100, 100))
 
-        time_since_boost = now - player.last_boost_time
+        time_since_boost = now - last_boost_time
         if time_since_boost >= BOOST_COOLDOWN_MS:
             boost_str = "Boost: READY (SPACE)"
             boost_color = (0, 255, 0)
@@ -1421,13 +2076,13 @@ def main():
         screen.blit(lives_text, (screen_w - lives_text.get_width() - 10, 10))
 
         # Respawn countdown overlay
-        if state == "respawning" and respawn_start_time is not None:
+        if snap.state == "respawning" and snap.respawn_start_time is not None:
             overlay = pygame.Surface((screen_w, screen_h), pygame.SRCALPHA)
             overlay.fill((0, 0, 0, 200))
             screen.blit(overlay, (0, 0))
 
-            elapsed_respawn = now - respawn_start_time
-            remaining = max(0, respawn_duration_ms - elapsed_respawn)
+            elapsed_respawn = now - snap.respawn_start_time
+            remaining = max(0, Game.RESPAWN_DURATION_MS - elapsed_respawn)
             countdown_number = int(remaining / 1000) + 1
             if countdown_number < 1:
                 countdown_number = 1
@@ -1436,7 +2091,7 @@ def main():
             screen.blit(cd_surf, cd_rect)
 
         # Pause & stats / catalogue screen
-        if state == "paused":
+        if snap.state == "paused":
             overlay = pygame.Surface((screen_w, screen_h), pygame.SRCALPHA)
             overlay.fill((0, 0, 0, 200))
             screen.blit(overlay, (0, 0))
@@ -1447,35 +2102,10 @@ def main():
                 ((screen_w - title.get_width()) // 2, screen_h // 2 - 260),
             )
 
-            def fmt_time(sec):
-                m = int(sec // 60)
-                s = int(sec % 60)
-                return f"{m:02d}:{s:02d}"
-
             # Stats block (left)
-            stats_lines = [
-                f"Time: {fmt_time(elapsed_sec)}",
-                f"Score: {score}",
-                f"Multiplier: {multiplier:.1f}x",
-                f"Fire Rate: {fire_rate:.2f}/s",
-                f"Lives: {player.lives}  (+{extra_lives_earned} extra)",
-                f"Bombs: {bombs}  (Used: {bombs_used})",
-                f"Enemies Killed: {enemies_killed}",
-                f"  via Gates: {enemies_killed_by_gate}",
-                f"Orbs Collected: {orbs_collected}",
-                f"Fire Powerups: {powerups_collected}",
-                f"Gates Triggered: {gates_triggered}",
-                f"Boost Uses: {boost_uses}",
-                f"Boss I Defeated: {'Yes' if boss1_killed else 'No'}",
-                f"Boss II Defeated: {'Yes' if boss2_killed else 'No'}",
-                f"Boss III Defeated: {'Yes' if boss3_killed else 'No'}",
-                f"Boss IV Defeated: {'Yes' if boss4_killed else 'No'}",
-                f"Fire Rate x2 Milestones: {fire_rate_doubles}",
-            ]
-
             left_x = 60
             y = screen_h // 2 - 210
-            for line in stats_lines:
+            for line in snap.stats:
                 txt = small_font.render(line, True, (255, 255, 255))
                 screen.blit(txt, (left_x, y))
                 y += txt.get_height() + 3
@@ -1526,12 +2156,12 @@ def main():
             screen.blit(header, (log_x, y))
             y += header.get_height() + 4
 
-            for entry in event_log[-14:]:
+            for entry in snap.event_log:
                 txt = tiny_font.render(entry, True, (220, 220, 220))
                 screen.blit(txt, (log_x, y))
                 y += txt.get_height() + 2
 
-        elif state == "game_over":
+        elif snap.state == "game_over":
             overlay = pygame.Surface((screen_w, screen_h), pygame.SRCALPHA)
             overlay.fill((0, 0, 0, 200))
             screen.blit(overlay, (0, 0))
@@ -1540,9 +2170,288 @@ def main():
             screen.blit(go, ((screen_w - go.get_width()) // 2, screen_h // 2 - 30))
             screen.blit(info, ((screen_w - info.get_width()) // 2, screen_h // 2 + 10))
 
+            y = screen_h // 2 + 60
+            summary = self.history.summary if self.history is not None else None
+            if summary is not None and summary["score"] == score:
+                best = summary["best"]
+                line = (f"Personal best: {best}  |  Better than "
+                        f"{summary['percentile']:.0f}% of your {summary['runs']} runs")
+                if score >= best:
+                    line = f"NEW PERSONAL BEST!  ({summary['runs']} runs)"
+                txt = self.small_font.render(line, True, (0, 255, 100))
+                screen.blit(txt, ((screen_w - txt.get_width()) // 2, y))
+                y += txt.get_height() + 10
+
+            if self.leaderboard is not None:
+                self.draw_leaderboard(y)
+
+    def draw_leaderboard(self, y):
+        screen = self.screen
+        lb = self.leaderboard
+        if lb.status:
+            status = self.small_font.render(lb.status, True, (255, 215, 0))
+            screen.blit(status, ((self.screen_w - status.get_width()) // 2, y))
+            y += status.get_height() + 10
+
+        for rank, (name, score) in enumerate(lb.top[:LEADERBOARD_SHOWN], start=1):
+            color = (0, 255, 100) if rank == lb.last_rank else (220, 220, 220)
+            txt = self.tiny_font.render(f"{rank:>2}. {name:<24} {score:>10}", True, color)
+            screen.blit(txt, ((self.screen_w - txt.get_width()) // 2, y))
+            y += txt.get_height() + 2
+
+
+def run_serial(game, renderer, fps=FPS, on_present=None, max_fps=None, hotkeys=None,
+               on_phase=None):
+    """
+    Classic loop on one thread: events, then as many fixed sim steps at `fps`
+    as real time calls for, then a draw interpolated between the last two sim
+    states. Frames are capped at max_fps (None = fps, 0 = uncapped).
+    `hotkeys` maps keys to callbacks handled outside the game (e.g. F9).
+    `on_phase(name, seconds)` receives per-frame timings of the loop phases.
+    """
+    hotkeys = hotkeys or {}
+    step_ms = 1000.0 / fps
+    cap = fps if max_fps is None else max_fps
+    clock = pygame.time.Clock()
+    acc = step_ms  # run one step before the first frame
+    last = time.perf_counter()
+    snap = None
+    while True:
+        clock.tick(cap)
+        t = time.perf_counter()
+        acc = min(acc + (t - last) * 1000.0, step_ms * MAX_CATCHUP_STEPS)
+        last = t
+        now = get_ticks()
+        dirty = snap is None
+
+        for e in pygame.event.get():
+            if e.type == pygame.QUIT:
+                return "quit"
+            elif e.type == pygame.KEYDOWN and e.key in hotkeys:
+                hotkeys[e.key]()
+            elif e.type == pygame.KEYDOWN:
+                action = game.handle_key(e.key, now)
+                if action is not None:
+                    return action
+                dirty = True
+
+        keys = pygame.key.get_pressed()
+        t_update = time.perf_counter()
+        while acc >= step_ms:
+            acc -= step_ms
+            game.update(keys, step_ms, now - acc)
+            dirty = True
+
+        t_snapshot = time.perf_counter()
+        if dirty:
+            snap = game.snapshot(now - acc)
+        t_draw = time.perf_counter()
+        renderer.draw(snap, acc / step_ms)
+        t_flip = time.perf_counter()
         pygame.display.flip()
+        if on_phase is not None:
+            t_end = time.perf_counter()
+            on_phase("events", t_update - t)
+            on_phase("update", t_snapshot - t_update)
+            on_phase("snapshot", t_draw - t_snapshot)
+            on_phase("draw", t_flip - t_draw)
+            on_phase("flip", t_end - t_flip)
+        if on_present is not None:
+            on_present(snap)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Geometrica")
+    parser.add_argument(
+        "--pipelined", action="store_true",
+        help="run the simulation on its own thread and render the latest snapshot",
+    )
+    parser.add_argument(
+        "--measure-startup", action="store_true",
+        help="print a time-to-first-frame breakdown and exit after the first frame",
+    )
+    parser.add_argument(
+        "--gc-report", action="store_true",
+        help="print GC pause and frame hitch statistics on exit",
+    )
+    parser.add_argument(
+        "--max-fps", type=int, default=None, metavar="N",
+        help=f"cap the frame rate at N (0 = uncapped, default {FPS}); "
+             f"the simulation always steps at {FPS} Hz",
+    )
+    parser.add_argument(
+        "--frame-stats", action="store_true",
+        help="print frame time statistics on exit",
+    )
+    parser.add_argument(
+        "--record", nargs="?", const="raw", choices=CAPTURE_FORMATS, metavar="FORMAT",
+        help="record video from launch (raw or png, default raw); F10 toggles in game",
+    )
+    return parser.parse_args(argv)
+
+
+class StartupTimer:
+    """Collects (label, seconds since STARTUP_T0) marks for --measure-startup."""
+
+    def __init__(self):
+        self.marks = [("imports", time.perf_counter() - STARTUP_T0)]
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter() - STARTUP_T0))
+
+    def report(self):
+        prev = 0.0
+        for label, t in self.marks:
+            print(f"{label:<16}{(t - prev) * 1000:>9.1f} ms")
+            prev = t
+        print(f"{'time to frame':<16}{prev * 1000:>9.1f} ms")
+
+
+def main():
+    args = parse_args()
+    startup = StartupTimer()
+
+    # Only the modules the game uses; pygame.init() would also bring up audio,
+    # joysticks etc.
+    pygame.display.init()
+    pygame.font.init()
+    startup.mark("pygame init")
 
-    pygame.quit()
+    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    pygame.display.set_caption("Geometrica")
+    startup.mark("display")
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    fonts = FontCache(os.path.join(DATA_DIR, "font_cache.json"))
+    renderer = Renderer(screen, fonts)
+    startup.mark("fonts" if not fonts.misses else "fonts (scanned)")
+
+    leaderboard = None
+    if LEADERBOARD_URL:
+        leaderboard = LeaderboardClient(
+            LEADERBOARD_URL, os.path.join(DATA_DIR, "leaderboard_queue.json")
+        )
+        leaderboard.start()
+        renderer.leaderboard = leaderboard
+
+    history = RunHistory(os.path.join(DATA_DIR, "runs.sqlite3"))
+    history.start()
+    renderer.history = history
+
+    telemetry_dir = os.path.join(DATA_DIR, "telemetry")
+    os.makedirs(telemetry_dir, exist_ok=True)
+    telemetry = TelemetryWriter(os.path.join(
+        telemetry_dir, time.strftime("run-%Y%m%d-%H%M%S.jsonl.gz")
+    ))
+    telemetry.start()
+    startup.mark("services")
+
+    gc_scheduler = GCScheduler(FPS if args.max_fps is None else args.max_fps)
+    gc_scheduler.install()
+    gc_scheduler.freeze()
+    present_hooks = [gc_scheduler.on_present]
+
+    # F9 captures a profile of the next frames; GEOMETRICA_PROFILE starts one at launch
+    profile = ProfileCapture(os.path.join(DATA_DIR, "profiles"),
+                             **(parse_spec(PROFILE_SPEC) if PROFILE_SPEC else {}))
+    present_hooks.append(profile.on_present)
+    hotkeys = {pygame.K_F9: profile.toggle}
+    if PROFILE_SPEC:
+        profile.start()
+
+    # F10 records video; --record starts at launch
+    recorder = FrameRecorder(screen, os.path.join(DATA_DIR, "captures"), args.record or "raw")
+    present_hooks.append(recorder.on_present)
+    hotkeys[pygame.K_F10] = recorder.toggle
+    hotkeys[pygame.K_m] = renderer.minimap.toggle
+    if args.record:
+        recorder.start()
+
+    metrics = metrics_server = None
+    if METRICS_PORT:
+        metrics = GameMetrics()
+        metrics.install_gc()
+        present_hooks.append(metrics.on_present)
+        metrics_server = MetricsServer(metrics.registry, int(METRICS_PORT))
+        metrics_server.start()
+
+    spectators = None
+    if SPECTATE_ADDR and max(WORLD_W, WORLD_H) > 32767:
+        print("spectating disabled: positions go out as int16, which this world "
+              "does not fit", flush=True)
+    elif SPECTATE_ADDR:
+        spectators = SpectatorServer(*parse_addr(SPECTATE_ADDR, "0.0.0.0"))
+        spectators.start()
+        present_hooks.append(spectators.publish)
+
+    frame_stats = None
+    if args.frame_stats:
+        frame_stats = FrameStats()
+        present_hooks.append(frame_stats.on_present)
+
+    if args.measure_startup:
+        def report_startup(snap):
+            if startup.marks[-1][0] != "first frame":
+                startup.mark("first frame")
+                startup.report()
+                pygame.event.post(pygame.event.Event(pygame.QUIT))
+        present_hooks.append(report_startup)
+
+    def on_present(snap):
+        for hook in present_hooks:
+            hook(snap)
+
+    # Restarting reuses the window, fonts and background services; only the
+    # run state is rebuilt. The services are shut down however the loop ends,
+    # so queued telemetry, history and scores are flushed even after a crash.
+    try:
+        while True:
+            game = Game()
+            if leaderboard is not None:
+                game.game_over_listeners.append(
+                    lambda g: leaderboard.submit(PLAYER_NAME, g.score)
+                )
+            game.game_over_listeners.append(lambda g: history.record(g.run_record()))
+            game.events.subscribe(telemetry.put)
+            if metrics is not None:
+                game.events.subscribe(metrics.on_event)
+                game.game_over_listeners.append(metrics.on_game_over)
+            on_phase = metrics.on_phase if metrics is not None else None
+
+            if args.pipelined:
+                result = run_pipelined(game, renderer, FPS, on_present=on_present,
+                                       max_fps=args.max_fps, hotkeys=hotkeys,
+                                       on_phase=on_phase)
+            else:
+                result = run_serial(game, renderer, on_present=on_present,
+                                    max_fps=args.max_fps, hotkeys=hotkeys, on_phase=on_phase)
+            if result != "restart":
+                break
+    finally:
+        profile.stop()
+        recorder.stop()
+        if metrics is not None:
+            metrics_server.close()
+            metrics.uninstall_gc()
+        if spectators is not None:
+            spectators.close()
+            if spectators.error is not None:
+                print(f"spectate: {spectators.errors} tick(s) not sent, last error: "
+                      f"{spectators.error!r}")
+        if leaderboard is not None:
+            leaderboard.close()
+        history.close()
+        telemetry.close()
+        if telemetry.error is not None:
+            print(f"telemetry: writer stopped early: {telemetry.error!r}")
+
+        gc_scheduler.uninstall()
+        if args.gc_report:
+            print(gc_scheduler.report())
+        if frame_stats is not None:
+            print(frame_stats.report())
+
+        pygame.quit()
     sys.exit()
 
 
@@ -0,0 +1,364 @@
+"""
+Background client for the site's leaderboard API (src/routes/api/leaderboard).
+
+All network I/O runs on a private asyncio loop in a daemon thread, so the game
+only ever calls cheap, non-blocking methods:
+
+    client = LeaderboardClient("http://localhost:5173", "/path/queue.json")
+    client.start()              # also prefetches the top-N
+    client.submit("Rhett", 1564893)
+    client.top                  # latest ((name, score), ...) for display
+    client.status               # short human-readable status line
+    client.close()
+
+Submissions go into an offline queue that is persisted to disk and retried
+with exponential backoff, so scores made while the server is unreachable are
+sent on a later run. Requests share a small pool of keep-alive connections.
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+API_PATH = "/api/leaderboard"
+
+REQUEST_TIMEOUT_S = 5.0
+BACKOFF_BASE_S = 1.0
+BACKOFF_MAX_S = 300.0
+REFRESH_INTERVAL_S = 60.0
+
+
+class HTTPError(Exception):
+    """Transport-level failure (connection refused, reset, timeout, bad reply)."""
+
+
+class ConnectionPool:
+    """A few keep-alive HTTP/1.1 connections to a single host."""
+
+    def __init__(self, host, port, use_ssl, size=4):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.size = size
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def _open(self):
+        return await asyncio.open_connection(
+            self.host, self.port, ssl=True if self.use_ssl else None
+        )
+
+    async def request(self, method, path, body=None):
+        """Send one request; returns (status, parsed JSON body or None)."""
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        head = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Connection: keep-alive\r\n"
+            "Accept: application/json\r\n"
+        )
+        if body is not None:
+            head += "Content-Type: application/json\r\n"
+        head += f"Content-Length: {len(payload)}\r\n\r\n"
+        raw = head.encode("ascii") + payload
+
+        async with self._slots:
+            # A pooled connection may have been closed by the server while idle;
+            # retry once on a fresh one in that case.
+            for attempt in range(2):
+                reused = bool(self._idle)
+                reader, writer = self._idle.pop() if reused else await self._open()
+                try:
+                    writer.write(raw)
+                    await writer.drain()
+                    status, headers, data = await _read_response(reader)
+                except (ConnectionError, asyncio.IncompleteReadError, HTTPError) as exc:
+                    writer.close()
+                    if reused and attempt == 0:
+                        continue
+                    raise HTTPError(str(exc) or exc.__class__.__name__) from exc
+                except BaseException:
+                    # Cancelled mid-request (wait_for's timeout): the reply may
+                    # still arrive, so the connection can't go back to the pool
+                    writer.close()
+                    raise
+
+                if headers.get("connection", "").lower() == "close":
+                    writer.close()
+                else:
+                    self._idle.append((reader, writer))
+                break
+
+        try:
+            parsed = json.loads(data) if data else None
+        except ValueError:
+            parsed = None
+        return status, parsed
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise HTTPError("connection closed")
+    parts = status_line.decode("latin-1").split(" ", 2)
+    try:
+        status = int(parts[1])
+    except (IndexError, ValueError):
+        raise HTTPError(f"bad status line {status_line!r}") from None
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            try:
+                size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            except ValueError:
+                raise HTTPError(f"bad chunk size {size_line!r}") from None
+            if size == 0:
+                # Trailers end with an empty line
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        data = b"".join(chunks)
+    elif "content-length" in headers:
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise HTTPError(f"bad content-length {headers['content-length']!r}") from None
+        data = await reader.readexactly(length)
+    else:
+        data = await reader.read()
+        headers["connection"] = "close"
+    return status, headers, data
+
+
+class LeaderboardClient:
+    """Non-blocking leaderboard submission and top-N prefetch."""
+
+    def __init__(self, base_url, queue_path, pool_size=4):
+        url = urlsplit(base_url)
+        self.use_ssl = url.scheme == "https"
+        self.host = url.hostname or "localhost"
+        self.port = url.port or (443 if self.use_ssl else 80)
+        self.path = url.path.rstrip("/") + API_PATH
+        self.queue_path = queue_path
+        self.pool_size = pool_size
+
+        # Read from the game thread(s); only ever replaced, never mutated.
+        self.top = ()
+        self.cap = None
+        self.status = ""
+        self.last_rank = None
+
+        self._pending = self._load_queue()
+        self._loop = None
+        self._thread = None
+        self._wake = None
+        self._pool = None
+        self._ready = threading.Event()
+
+    # --- Game-facing API (any thread) ---
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="geometrica-leaderboard", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait(2.0)
+
+    def submit(self, name, score):
+        """Queue a score for submission. Never blocks."""
+        entry = {"name": name, "score": int(score), "ts": int(time.time() * 1000),
+                 "attempts": 0, "next_at": 0.0}
+        self.status = "Submitting score..."
+        self._call(self._enqueue, entry)
+
+    def refresh(self):
+        """Ask for a fresh copy of the top-N. Never blocks."""
+        self._call(self._schedule_refresh)
+
+    def close(self, timeout=2.0):
+        """Stop the background loop, persisting anything still queued."""
+        if self._loop is None:
+            return
+        fut = asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        try:
+            fut.result(timeout)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._loop = None
+
+    @property
+    def queued(self):
+        return len(self._pending)
+
+    # --- Background loop ---
+
+    def _call(self, fn, *args):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._wake = asyncio.Event()
+        self._pool = ConnectionPool(self.host, self.port, self.use_ssl, self.pool_size)
+        self._loop.create_task(self._sender())
+        self._loop.create_task(self._refresher())
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    def _enqueue(self, entry):
+        self._pending.append(entry)
+        self._save_queue()
+        self._wake.set()
+
+    def _schedule_refresh(self):
+        self._loop.create_task(self._fetch_top())
+
+    async def _refresher(self):
+        while True:
+            try:
+                await self._fetch_top()
+            except Exception:
+                pass  # whatever the reply was, keep refreshing
+            await asyncio.sleep(REFRESH_INTERVAL_S)
+
+    async def _fetch_top(self):
+        try:
+            status, body = await asyncio.wait_for(
+                self._pool.request("GET", self.path), REQUEST_TIMEOUT_S
+            )
+        except (HTTPError, OSError, asyncio.TimeoutError):
+            return
+        if status == 200 and isinstance(body, dict):
+            self._apply_entries(body)
+
+    def _apply_entries(self, body):
+        entries = body.get("entries")
+        top = []
+        for e in entries if isinstance(entries, list) else ():
+            # Entries that don't parse are skipped, not fatal
+            try:
+                top.append((str(e.get("name", "Player")), int(e.get("score", 0))))
+            except (AttributeError, TypeError, ValueError):
+                pass
+        self.top = tuple(top)
+        self.cap = body.get("cap", self.cap)
+
+    async def _sender(self):
+        while True:
+            now = time.monotonic()
+            due = [e for e in self._pending if e["next_at"] <= now]
+            if not due:
+                wait = None
+                if self._pending:
+                    wait = max(0.0, min(e["next_at"] for e in self._pending) - now)
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            entry = due[0]
+            try:
+                done = await self._send(entry)
+            except Exception:
+                done = False  # an unexpected failure retries like any other
+            if done:
+                self._pending.remove(entry)
+            else:
+                entry["attempts"] += 1
+                delay = min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** entry["attempts"])
+                entry["next_at"] = time.monotonic() + delay * random.uniform(0.5, 1.0)
+                self.status = f"Offline - {len(self._pending)} score(s) queued"
+            self._save_queue()
+
+    async def _send(self, entry):
+        """Try one submission. Returns True when the entry is finished with."""
+        try:
+            status, body = await asyncio.wait_for(
+                self._pool.request("POST", self.path,
+                                   {"name": entry["name"], "score": entry["score"]}),
+                REQUEST_TIMEOUT_S,
+            )
+        except (HTTPError, OSError, asyncio.TimeoutError):
+            return False
+
+        body = body if isinstance(body, dict) else {}
+        if status == 201:
+            self.last_rank = body.get("rank")
+            self._apply_entries(body)
+            self.status = f"Leaderboard rank #{self.last_rank}"
+            return True
+        if status == 409:
+            self.status = f"Not a top score (min {body.get('min', 0)})"
+            return True
+        if 400 <= status < 500:
+            # The server rejected the payload itself; retrying won't help.
+            self.status = body.get("message", f"Rejected ({status})")
+            return True
+        return False
+
+    async def _shutdown(self):
+        self._save_queue()
+        for task in asyncio.all_tasks(self._loop):
+            if task is not asyncio.current_task():
+                task.cancel()
+        await self._pool.close()
+
+    # --- Offline queue persistence ---
+
+    def _load_queue(self):
+        try:
+            with open(self.queue_path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return []
+        pending = []
+        for e in raw if isinstance(raw, list) else []:
+            if isinstance(e, dict) and "score" in e:
+                pending.append({"name": str(e.get("name", "Player")),
+                                "score": int(e["score"]), "ts": int(e.get("ts", 0)),
+                                "attempts": 0, "next_at": 0.0})
+        return pending
+
+    def _save_queue(self):
+        # Same temp file + rename pattern the server uses for leaderboard.json
+        data = [{"name": e["name"], "score": e["score"], "ts": e["ts"]} for e in self._pending]
+        try:
+            os.makedirs(os.path.dirname(self.queue_path) or ".", exist_ok=True)
+            tmp_path = self.queue_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.queue_path)
+        except OSError:
+            pass
@@ -0,0 +1,109 @@
+"""
+Distance-based simulation level of detail.
+
+Far from the player nothing can touch an enemy, so off screen it does not
+need full steering every step. SimLod sorts entities into bands by distance
+to a target (the player):
+
+    bands = ((0, 1), (1000, 4), (1600, 8))  # (min distance, update every Nth step)
+
+Entities in the first band, and any inside SimLod.view (the camera's world
+rect plus a margin, when something draws the game), run their full update()
+every step. Any other entity is not looked at again until its next turn: it
+does no work at all on the steps in between, and on its turn spends all the
+sim time it skipped in one dt-scaled update_far() call (a cheap straight-line
+chase that leaves it at rest, so it does not sweep through the steps it
+skipped). Turns are staggered by a per-entity slot so a band's work is spread
+evenly over its period. Bands and the view are re-evaluated on every turn, so
+an entity moving inwards is promoted and runs its skipped time through the
+full update.
+
+Entities carry lod_slot (handed out by their owner, e.g. Game.take_lod_slots()),
+lod_due (step of the next turn, 0 = now) and lod_time (sim time of the last
+update, None = never).
+check_bands() verifies that a reduced band starts far enough out that nothing
+in it can reach interaction range before its next turn.
+"""
+def check_bands(bands, reach, closing_speed, max_step_frames):
+    """
+    Raise ValueError unless every reduced band starts beyond `reach` plus the
+    distance the player and an entity can close (`closing_speed` px per 60 Hz
+    frame) over one full period of the longest sim step.
+    """
+    if not bands or bands[0] != (0, 1):
+        raise ValueError("the first LOD band must be (0, 1)")
+    for (start, period), (prev_start, _) in zip(bands[1:], bands):
+        if start <= prev_start:
+            raise ValueError("LOD bands must be sorted by distance")
+        needed = reach + closing_speed * period * max_step_frames
+        if start < needed:
+            raise ValueError(
+                f"LOD band at {start} px (every {period} steps) must start at "
+                f">= {needed:.0f} px")
+
+
+class SimLod:
+    """Updates entities at a rate chosen by their distance to a target."""
+
+    def __init__(self, bands):
+        self.bands = tuple(bands)
+        # Checked far to near, by squared distance
+        self._far_first = tuple((start * start, period)
+                                for start, period in reversed(self.bands))
+        self.view = None   # (x0, y0, x1, y1) kept at full rate, or None
+        self.step = 0
+        self.clock = 0.0   # sim ms stepped so far
+        self.updated = 0   # entities updated in the last step
+
+    def fork(self):
+        """Copy of the step counters (for Game.fork(); per-entity state is on the entities)."""
+        dup = SimLod.__new__(SimLod)
+        dup.__dict__ = self.__dict__.copy()
+        return dup
+
+    def update(self, entities, target, dt, *args):
+        """Advance entities by dt; extra args go to their update methods."""
+        self.step += 1
+        step = self.step
+        last_clock = self.clock
+        clock = self.clock = last_clock + dt
+        tx, ty = target.pos
+        bands = self._far_first
+        view = self.view
+        updated = 0
+        for en in entities:
+            if en.lod_due > step:
+                continue
+            pos = en.pos
+            dx = pos.x - tx
+            dy = pos.y - ty
+            d2 = dx * dx + dy * dy
+            for start2, period in bands:
+                if d2 >= start2:
+                    break
+            if (period != 1 and view is not None and view[0] <= pos.x <= view[2]
+                    and view[1] <= pos.y <= view[3]):
+                period = 1
+            # Exactly dt when it was updated last step (no float drift)
+            seen = en.lod_time
+            dt_en = dt if seen is None or seen == last_clock else clock - seen
+            en.lod_time = clock
+            if period == 1:
+                en.update(target, dt_en, *args)
+            else:
+                en.update_far(target, dt_en, *args)
+                en.lod_due = step + period - (step + en.lod_slot) % period
+            updated += 1
+        self.updated = updated
+
+    def counts(self, entities, target):
+        """Entities per band right now (for benchmarks and metrics)."""
+        tx, ty = target.pos
+        counts = [0] * len(self.bands)
+        for en in entities:
+            d2 = (en.pos.x - tx) ** 2 + (en.pos.y - ty) ** 2
+            for band, (start2, _) in enumerate(self._far_first):
+                if d2 >= start2:
+                    counts[-1 - band] += 1
+                    break
+        return counts
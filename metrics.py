@@ -0,0 +1,296 @@
+"""
+Prometheus-style metrics for a running game.
+
+A Registry holds counters, gauges and histograms; render() produces the
+Prometheus text exposition format and MetricsServer serves it from a
+background thread on localhost:
+
+    GEOMETRICA_METRICS_PORT=9464 python index.py
+    curl localhost:9464/metrics
+
+Updates happen on the frame loop, so they are kept to plain attribute and
+list-slot arithmetic: labelled children are created once up front (or on
+first use of a new label value) and looked up by key afterwards, histogram
+buckets are a fixed list indexed via bisect, and nothing takes a lock. The
+server thread only reads, so a slow scrape can never stall a frame.
+
+GameMetrics feeds a registry from the places the game already exposes:
+present hooks, per-phase loop timings, the event bus and gc.callbacks.
+"""
+import gc
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FRAME_BUCKETS_MS = (4, 8, 12, 16.7, 20, 25, 33.3, 50, 100, 250)
+PHASE_BUCKETS_MS = (0.25, 0.5, 1, 2, 4, 8, 16, 33, 100)
+GC_BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100)
+BOSS_FIGHT_BUCKETS_S = (10, 20, 30, 45, 60, 90, 120, 180, 300, 600)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, values)) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, doc, labelnames=()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def labels(self, *values):
+        """Child for one combination of label values (created on first use)."""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            yield from child.samples(self.name, _format_labels(self.labelnames, values))
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def samples(self, name, labels):
+        yield f"{name}{labels} {self.value}"
+
+
+class _CounterChild(_Value):
+    __slots__ = ()
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class _GaugeChild(_Value):
+    __slots__ = ()
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def samples(self, name, labels):
+        inner = labels[1:-1] + "," if labels else ""
+        total = 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            yield f'{name}_bucket{{{inner}le="{bound}"}} {total}'
+        total += self.counts[-1]
+        yield f'{name}_bucket{{{inner}le="+Inf"}} {total}'
+        yield f"{name}_sum{labels} {self.sum}"
+        yield f"{name}_count{labels} {total}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._children[()].inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._children[()].value = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, doc, buckets, labelnames=()):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, doc, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._children[()].observe(value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, doc, labelnames=()):
+        return self._add(Counter(name, doc, labelnames))
+
+    def gauge(self, name, doc, labelnames=()):
+        return self._add(Gauge(name, doc, labelnames))
+
+    def histogram(self, name, doc, buckets, labelnames=()):
+        return self._add(Histogram(name, doc, buckets, labelnames))
+
+    def render(self):
+        lines = []
+        for m in self._metrics:
+            lines.append(f"# HELP {m.name} {m.doc}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.samples())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves a registry at http://127.0.0.1:<port>/metrics from a daemon thread."""
+
+    def __init__(self, registry, port, host="127.0.0.1"):
+        registry_ref = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry_ref.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="geometrica-metrics", daemon=True
+        )
+        self._thread.start()
+
+    def close(self):
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+
+class GameMetrics:
+    """The game's metric set and the hooks that feed it."""
+
+    ENTITY_FIELDS = ("enemies", "bullets", "boss_bullets", "orbs", "particles",
+                     "bosses", "floating_texts", "gates", "fire_powerups")
+
+    def __init__(self, registry=None):
+        r = self.registry = registry or Registry()
+        self.frame_ms = r.histogram(
+            "geometrica_frame_ms", "Time between presented frames", FRAME_BUCKETS_MS)
+        self.frames = r.counter("geometrica_frames_total", "Frames presented")
+        self.phase_ms = r.histogram(
+            "geometrica_phase_ms", "Time spent per loop phase", PHASE_BUCKETS_MS, ("phase",))
+        self.entities = r.gauge(
+            "geometrica_entities", "Live entities in the latest frame", ("kind",))
+        self.kills = r.counter("geometrica_kills_total", "Enemies killed", ("enemy", "cause"))
+        self.deaths = r.counter("geometrica_deaths_total", "Lives lost", ("cause",))
+        self.runs = r.counter("geometrica_runs_total", "Runs finished")
+        self.bosses_active = r.gauge("geometrica_bosses_active", "Bosses on the field")
+        self.boss_fight_s = r.histogram(
+            "geometrica_boss_fight_seconds", "Time from boss spawn to defeat",
+            BOSS_FIGHT_BUCKETS_S, ("boss",))
+        self.gc_pause_ms = r.histogram(
+            "geometrica_gc_pause_ms", "Cyclic GC pauses", GC_BUCKETS_MS, ("generation",))
+        self.score = r.gauge("geometrica_score", "Score of the current run")
+
+        # Children resolved once so per-frame updates are lookups only
+        self._entity_children = tuple(
+            (field, self.entities.labels(field)) for field in self.ENTITY_FIELDS)
+        self._phase_children = {}
+        self._gc_children = tuple(self.gc_pause_ms.labels(str(g)) for g in range(3))
+        self._boss_spawned_at = {}
+        self._last_present = None
+        self._gc_start = None
+
+    # --- hooks ---
+
+    def on_present(self, snap):
+        now = time.perf_counter()
+        if self._last_present is not None:
+            self.frame_ms.observe((now - self._last_present) * 1000.0)
+        self._last_present = now
+        self.frames.inc()
+        for field, child in self._entity_children:
+            child.value = len(getattr(snap, field))
+        self.bosses_active.set(len(snap.bosses))
+        self.score.set(snap.hud[0])
+
+    def on_phase(self, phase, seconds):
+        child = self._phase_children.get(phase)
+        if child is None:
+            child = self._phase_children[phase] = self.phase_ms.labels(phase)
+        child.observe(seconds * 1000.0)
+
+    def on_event(self, ev):
+        kind = ev.kind
+        if kind == "kill":
+            self.kills.labels(ev.info.get("enemy"), ev.info.get("cause")).inc()
+        elif kind == "death":
+            self.deaths.labels(ev.info.get("cause", "unknown")).inc()
+        elif kind == "boss_spawn":
+            self._boss_spawned_at[ev.info["boss"]] = ev.t
+        elif kind == "boss_defeat":
+            start = self._boss_spawned_at.pop(ev.info["boss"], None)
+            if start is not None:
+                self.boss_fight_s.labels(ev.info["boss"]).observe((ev.t - start) / 1000.0)
+
+    def on_game_over(self, game):
+        self.runs.inc()
+        self._boss_spawned_at.clear()
+
+    def install_gc(self):
+        gc.callbacks.append(self._on_gc)
+
+    def uninstall_gc(self):
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+        elif self._gc_start is not None:
+            ms = (time.perf_counter() - self._gc_start) * 1000.0
+            self._gc_start = None
+            self._gc_children[info.get("generation", 2)].observe(ms)
@@ -0,0 +1,86 @@
+"""
+Chunked entity updates on a thread pool.
+
+Array-backed entity state (boss bullets, and orbs / powerups / player bullets
+gathered into arrays for the step) is cut into fixed runs of CHUNK_ROWS rows
+and each run is handed to a kernel on a ThreadPoolExecutor. The kernels are
+plain NumPy expressions on row slices, which release the GIL for the
+arithmetic, so chunks really run side by side on several cores.
+
+Results do not depend on the worker count: chunk boundaries depend only on
+the row count, every kernel is elementwise (a row's result never depends on
+another row) and writes only its own slice, and anything that changes the
+row order (dropping culled rows) is done afterwards on one thread, in order.
+
+    kernel(lo, hi, *args)   updates rows lo:hi of the arrays in args in place
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+CHUNK_ROWS = 4096
+
+
+class ChunkPool:
+    def __init__(self, workers=1, chunk=CHUNK_ROWS):
+        self.workers = max(1, workers)
+        self.chunk = chunk
+        self._executor = None
+        if self.workers > 1:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="chunk")
+
+    def run(self, kernel, n, *args):
+        """Apply kernel to rows [0, n) chunk by chunk; returns once all are done."""
+        chunk = self.chunk
+        if self._executor is None or n <= chunk:
+            for lo in range(0, n, chunk):
+                kernel(lo, min(n, lo + chunk), *args)
+            return
+        futures = [self._executor.submit(kernel, lo, min(n, lo + chunk), *args)
+                   for lo in range(0, n, chunk)]
+        for future in futures:
+            future.result()  # re-raises a kernel's exception here
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def integrate(lo, hi, pos, prev, vel, frames):
+    """Move rows by vel * frames, remembering where they were."""
+    p = pos[lo:hi]
+    prev[lo:hi] = p
+    p += vel[lo:hi] * frames
+
+
+def attract(lo, hi, pos, prev, vel, tx, ty, radius, speed, frames, steer):
+    """
+    Rows within `radius` of (tx, ty) head for it at `speed` px per frame.
+    steer=True turns their velocity toward it for good (orbs keep drifting
+    that way); otherwise the pull only moves them this step (powerups).
+    """
+    p = pos[lo:hi]
+    v = vel[lo:hi]
+    prev[lo:hi] = p
+    dx = tx - p[:, 0]
+    dy = ty - p[:, 1]
+    dist = np.hypot(dx, dy)
+    pull = (dist <= radius) & (dist > 0)
+    k = np.divide(speed, dist, out=np.zeros_like(dist), where=pull)
+    if steer:
+        v[pull, 0] = dx[pull] * k[pull]
+        v[pull, 1] = dy[pull] * k[pull]
+        p += v * frames
+    else:
+        p += v * frames
+        p[:, 0] += dx * (k * frames)
+        p[:, 1] += dy * (k * frames)
+
+
+def inside(lo, hi, pos, bounds, keep):
+    """keep[lo:hi] = whether each row is within bounds (x0, y0, x1, y1)."""
+    x0, y0, x1, y1 = bounds
+    x = pos[lo:hi, 0]
+    y = pos[lo:hi, 1]
+    keep[lo:hi] = (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
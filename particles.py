@@ -0,0 +1,108 @@
+"""
+Explosion debris and shockwaves as one pool of particles in numpy arrays.
+
+Every effect writes into the same fixed-size ring of slots (position,
+previous position, velocity, remaining and total life, colour index), so the
+whole pool moves and ages in a handful of array operations per step. The ring
+is the particle budget: when it is full, new particles overwrite the oldest
+ones instead of growing the pool.
+
+rows() exports the live particles for a RenderSnapshot; the Renderer draws
+them as blits of small cached sprites (one per colour and fade level).
+"""
+import math
+
+import numpy as np
+
+PARTICLE_BUDGET = 4000
+FADE_LEVELS = 8
+DRAG_PER_SEC = 0.15  # fraction of velocity left after one second
+
+
+class ParticleSystem:
+    def __init__(self, budget=PARTICLE_BUDGET, seed=None):
+        self.budget = budget
+        self.pos = np.zeros((budget, 2))
+        self.prev = np.zeros((budget, 2))
+        self.vel = np.zeros((budget, 2))
+        self.life = np.zeros(budget)       # ms left; <= 0 means the slot is free
+        self.max_life = np.ones(budget)
+        self.color = np.zeros(budget, dtype=np.int16)
+        self.palette = []
+        self._color_index = {}
+        self.head = 0      # next slot to write; the oldest particle lives here
+        self.evicted = 0   # live particles overwritten because the pool was full
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.life > 0))
+
+    def clear(self):
+        self.life[:] = 0
+
+    def _color(self, color):
+        idx = self._color_index.get(color)
+        if idx is None:
+            idx = len(self.palette)
+            self.palette.append(color)
+            self._color_index[color] = idx
+        return idx
+
+    def _emit(self, pos, vel, life_ms, color):
+        n = min(len(pos), self.budget)
+        slots = (self.head + np.arange(n)) % self.budget
+        self.head = (self.head + n) % self.budget
+        self.evicted += int(np.count_nonzero(self.life[slots] > 0))
+        self.pos[slots] = pos[:n]
+        self.prev[slots] = pos[:n]
+        self.vel[slots] = vel[:n]
+        self.life[slots] = life_ms[:n]
+        self.max_life[slots] = life_ms[:n]
+        self.color[slots] = self._color(color)
+
+    def burst(self, x, y, color, count, speed, life_ms):
+        """Debris flying out in random directions; speed in px/s."""
+        ang = self.rng.uniform(0, 2 * math.pi, count)
+        spd = self.rng.uniform(0.3, 1.0, count) * speed
+        vel = np.column_stack((np.cos(ang) * spd, np.sin(ang) * spd))
+        pos = np.empty((count, 2))
+        pos[:] = (x, y)
+        self._emit(pos, vel, self.rng.uniform(0.5, 1.0, count) * life_ms, color)
+
+    def ring(self, x, y, color, count, radius, speed, life_ms):
+        """An expanding ring of `count` particles starting at `radius`."""
+        ang = np.arange(count) * (2 * math.pi / count)
+        dirs = np.column_stack((np.cos(ang), np.sin(ang)))
+        self._emit(dirs * radius + (x, y), dirs * speed, np.full(count, float(life_ms)), color)
+
+    def explode(self, x, y, radius, color):
+        """Standard death effect for something of the given radius."""
+        self.burst(x, y, color, min(48, 6 + int(radius)), 160 * math.sqrt(radius / 14), 700)
+        self.ring(x, y, color, max(12, min(96, int(radius * 0.9))), radius, 60, 400)
+
+    def shockwave(self, x, y, radius, color):
+        """Bomb / gate area effect: a dense ring at `radius`."""
+        count = max(16, min(256, int(2 * math.pi * radius / 10)))
+        self.ring(x, y, color, count, radius, 90, 450)
+
+    def update(self, dt):
+        # Free slots are moved too: cheaper than masking, and nothing reads them
+        if self.life.max() <= 0:
+            return
+        self.prev[:] = self.pos
+        self.pos += self.vel * (dt / 1000.0)
+        self.vel *= DRAG_PER_SEC ** (dt / 1000.0)
+        self.life -= dt
+
+    def rows(self):
+        """((x, y, px, py, color, fade level), ...) for a RenderSnapshot."""
+        idx = np.flatnonzero(self.life > 0)
+        if not len(idx):
+            return ()
+        pos = self.pos[idx]
+        prev = self.prev[idx]
+        level = (self.life[idx] / self.max_life[idx] * FADE_LEVELS).astype(np.int16)
+        np.clip(level, 0, FADE_LEVELS - 1, out=level)
+        palette = self.palette
+        colors = [palette[c] for c in self.color[idx].tolist()]
+        return tuple(zip(*pos.T.tolist(), *prev.T.tolist(), colors, level.tolist()))
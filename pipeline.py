@@ -0,0 +1,197 @@
+"""
+Pipelined main loop: the simulation steps on a worker thread and publishes
+immutable RenderSnapshots into a double buffer, while the main thread pumps
+events and draws whatever snapshot is newest.
+
+pygame requires the window and event queue to stay on the thread that created
+them, so the main thread is the render/input thread and the sim runs beside it.
+Drawing and display.flip() release the GIL inside SDL, which is where the
+overlap between the two threads comes from.
+"""
+import queue
+import threading
+import time
+
+import pygame
+
+from gametime import get_ticks
+
+MAX_LAG_STEPS = 5  # a sim further behind than this skips ahead instead of catching up
+
+
+class SnapshotBuffer:
+    """Two-slot buffer: the sim fills the back slot, then flips it to the front."""
+
+    def __init__(self):
+        self._slots = [None, None]
+        self._front = 0
+        self._cond = threading.Condition()
+        self.published = 0
+
+    def publish(self, snap):
+        with self._cond:
+            back = 1 - self._front
+            self._slots[back] = snap
+            self._front = back
+            self.published += 1
+            self._cond.notify_all()
+
+    def latest(self):
+        with self._cond:
+            return self._slots[self._front]
+
+    def wait_newer(self, seen, timeout):
+        """
+        Block until a snapshot newer than publish count `seen` exists.
+        Returns (snapshot, publish count), or (None, seen) on timeout.
+        """
+        with self._cond:
+            if self.published <= seen:
+                self._cond.wait(timeout)
+            if self.published <= seen:
+                return None, seen
+            return self._slots[self._front], self.published
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+
+class SimThread(threading.Thread):
+    """Runs fixed Game.update steps at `fps` and publishes a snapshot after each one."""
+
+    def __init__(self, game, buffer, fps, max_steps=None, on_phase=None):
+        super().__init__(name="geometrica-sim", daemon=True)
+        self.game = game
+        self.buffer = buffer
+        self.fps = fps
+        self.step_ms = 1000.0 / fps
+        self.max_steps = max_steps
+        self.on_phase = on_phase
+        self.steps = 0
+
+        # Written by the render thread, read by the sim thread. The key state is
+        # an immutable tuple, so plain attribute assignment is enough.
+        self.keys = None
+        self._key_events = queue.SimpleQueue()
+
+        self.stop_event = threading.Event()
+        self.result = None
+        self.error = None  # exception that ended the sim, re-raised by run_pipelined()
+
+    def post_key(self, key):
+        self._key_events.put(key)
+
+    def stop(self, result="quit"):
+        if self.result is None:
+            self.result = result
+        self.stop_event.set()
+        self.buffer.wake()
+
+    def run(self):
+        game = self.game
+        step_s = self.step_ms / 1000.0
+        next_step = time.perf_counter()
+        try:
+            while not self.stop_event.is_set():
+                # Steps follow a fixed schedule rather than sleeping a fixed
+                # time, so a step delayed by the render thread is made up.
+                delay = next_step - time.perf_counter()
+                if delay > 0:
+                    self.stop_event.wait(delay)
+                next_step += step_s
+                lag = time.perf_counter() - next_step
+                if lag > step_s * MAX_LAG_STEPS:
+                    next_step += lag
+                now = get_ticks()
+
+                while True:
+                    try:
+                        key = self._key_events.get_nowait()
+                    except queue.Empty:
+                        break
+                    action = game.handle_key(key, now)
+                    if action is not None:
+                        self.stop(action)
+                        return
+
+                t_update = time.perf_counter()
+                if self.keys is not None:
+                    game.update(self.keys, self.step_ms, now)
+                t_snapshot = time.perf_counter()
+                self.buffer.publish(game.snapshot(now))
+                if self.on_phase is not None:
+                    self.on_phase("update", t_snapshot - t_update)
+                    self.on_phase("snapshot", time.perf_counter() - t_snapshot)
+
+                self.steps += 1
+                if self.max_steps is not None and self.steps >= self.max_steps:
+                    self.stop("quit")
+        except BaseException as exc:
+            self.error = exc
+        finally:
+            # Make sure the render thread never waits on a dead sim.
+            self.stop_event.set()
+            self.buffer.wake()
+
+
+def run_pipelined(game, renderer, fps, on_present=None, max_fps=None, hotkeys=None,
+                  on_phase=None):
+    """
+    Drive `game` with the sim on a worker thread and render on this thread.
+    Returns "quit" or "restart", like run_serial(); an exception in the sim
+    thread is re-raised here. `on_present(snap)` is called after each flip
+    (used by the benchmark to measure latency).
+
+    With max_fps None a frame is drawn per sim step. Otherwise frames run at
+    max_fps (0 = uncapped) and are interpolated by how long ago the newest
+    snapshot was published. `hotkeys` maps keys to callbacks run on this
+    thread instead of going to the game. `on_phase(name, seconds)` gets the
+    sim thread's update/snapshot timings and this thread's draw/flip timings.
+    """
+    hotkeys = hotkeys or {}
+    buffer = SnapshotBuffer()
+    sim = SimThread(game, buffer, fps, on_phase=on_phase)
+    sim.keys = pygame.key.get_pressed()
+    sim.start()
+
+    clock = pygame.time.Clock()
+    seen = 0
+    try:
+        while not sim.stop_event.is_set():
+            for e in pygame.event.get():
+                if e.type == pygame.QUIT:
+                    sim.stop("quit")
+                elif e.type == pygame.KEYDOWN and e.key in hotkeys:
+                    hotkeys[e.key]()
+                elif e.type == pygame.KEYDOWN:
+                    sim.post_key(e.key)
+            sim.keys = pygame.key.get_pressed()
+
+            if max_fps is None:
+                # Only redraw when the sim has produced something new.
+                snap, seen = buffer.wait_newer(seen, timeout=0.05)
+                alpha = 1.0
+            else:
+                clock.tick(max_fps)
+                snap = buffer.latest()
+                if snap is not None:
+                    age_ms = (time.perf_counter() - snap.published_at) * 1000.0
+                    alpha = min(1.0, age_ms / sim.step_ms)
+            if snap is None:
+                continue
+            t_draw = time.perf_counter()
+            renderer.draw(snap, alpha)
+            t_flip = time.perf_counter()
+            pygame.display.flip()
+            if on_phase is not None:
+                on_phase("draw", t_flip - t_draw)
+                on_phase("flip", time.perf_counter() - t_flip)
+            if on_present is not None:
+                on_present(snap)
+    finally:
+        sim.stop("quit")
+        sim.join()
+    if sim.error is not None:
+        raise sim.error
+    return sim.result
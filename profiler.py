@@ -0,0 +1,178 @@
+"""
+In-game profile captures.
+
+A capture records a window of N presented frames and writes, to the profiles
+directory:
+
+    <stamp>-<tag>.collapsed  folded stacks from a sampling thread, one
+                             "thread;outer;...;inner count" line per stack
+                             (flamegraph.pl / speedscope / inferno format)
+    <stamp>-<tag>.pstats     cProfile data for the main thread, when the
+                             capture runs in cprofile mode
+    <stamp>-<tag>.json       what was on screen: states, bosses, peak enemy and
+                             bullet counts, frames, wall time
+
+The tag names the scenario (state, boss, peak enemy count) so a folder of
+captures can be sorted by fight. The sampler reads sys._current_frames() from
+its own thread every few milliseconds, so it costs the game threads almost
+nothing and also sees the sim thread in pipelined mode. While a capture runs,
+the interpreter's thread switch interval is shortened so the sampler also
+gets in while pure-Python code holds the GIL, not just when it is released.
+
+Start one with F9 in game (F9 again stops early), or from launch with
+GEOMETRICA_PROFILE=600 (sample 600 frames) / GEOMETRICA_PROFILE=cprofile:600.
+"""
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+SAMPLE_INTERVAL_S = 0.002
+SWITCH_INTERVAL_S = 0.0005  # sys.setswitchinterval() during a capture
+PROFILED_THREADS = ("MainThread", "geometrica-sim")
+
+
+def parse_spec(spec):
+    """'600' / 'cprofile:600' / 'sample:300' -> ProfileCapture keyword args."""
+    mode, _, frames = spec.rpartition(":")
+    if mode not in ("", "sample", "cprofile"):
+        raise ValueError(f"unknown profile mode {mode!r}")
+    return {"frames": int(frames), "use_cprofile": mode == "cprofile"}
+
+
+class StackSampler(threading.Thread):
+    """Counts folded call stacks of the named threads at a fixed interval."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL_S, thread_names=PROFILED_THREADS):
+        super().__init__(name="geometrica-profiler", daemon=True)
+        self.interval = interval
+        self.thread_names = thread_names
+        self.stacks = Counter()
+        self.samples = 0
+        self._labels = {}  # code object -> "func (file:line)"
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()
+                     if t.name in self.thread_names}
+            for tid, frame in sys._current_frames().items():
+                name = names.get(tid)
+                if name is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(name)
+                stack.reverse()
+                self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+
+class ProfileCapture:
+    """Present hook that profiles the next `frames` frames once started."""
+
+    def __init__(self, out_dir, frames=600, use_cprofile=False):
+        self.out_dir = out_dir
+        self.frames = frames
+        self.use_cprofile = use_cprofile
+        self._sampler = None
+        self._cprofile = None
+        self.last_paths = None
+
+    @property
+    def active(self):
+        return self._sampler is not None
+
+    def start(self):
+        if self.active:
+            return
+        self._frames_seen = 0
+        self._started = time.perf_counter()
+        self._states = Counter()
+        self._bosses = set()
+        self._max_enemies = 0
+        self._max_boss_bullets = 0
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(SWITCH_INTERVAL_S)
+        self._sampler = StackSampler()
+        self._sampler.start()
+        if self.use_cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def toggle(self):
+        if self.active:
+            self.stop()
+        else:
+            self.start()
+
+    def on_present(self, snap):
+        if not self.active:
+            return
+        self._frames_seen += 1
+        self._states[snap.state] += 1
+        for boss in snap.bosses:
+            self._bosses.add(boss[0])
+        self._max_enemies = max(self._max_enemies, len(snap.enemies))
+        self._max_boss_bullets = max(self._max_boss_bullets, len(snap.boss_bullets))
+        if self._frames_seen >= self.frames:
+            self.stop()
+
+    def stop(self):
+        """Finish the capture (if any) and write its files."""
+        if not self.active:
+            return None
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        self._sampler.stop()
+        sys.setswitchinterval(self._switch_interval)
+        wall = time.perf_counter() - self._started
+
+        state = self._states.most_common(1)[0][0] if self._states else "none"
+        boss = "+".join(sorted(b.replace("BOSS ", "boss") for b in self._bosses)) or "noboss"
+        tag = f"{state}-{boss}-e{self._max_enemies}"
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, time.strftime("%Y%m%d-%H%M%S-") + tag)
+
+        paths = [base + ".collapsed"]
+        with open(base + ".collapsed", "w") as f:
+            for stack, count in self._sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(base + ".pstats")
+            paths.append(base + ".pstats")
+        with open(base + ".json", "w") as f:
+            json.dump({
+                "frames": self._frames_seen,
+                "wall_s": round(wall, 3),
+                "fps": round(self._frames_seen / wall, 1) if wall else 0.0,
+                "samples": self._sampler.samples,
+                "states": dict(self._states),
+                "bosses": sorted(self._bosses),
+                "max_enemies": self._max_enemies,
+                "max_boss_bullets": self._max_boss_bullets,
+                "cprofile": self._cprofile is not None,
+            }, f, indent=1, sort_keys=True)
+        paths.append(base + ".json")
+
+        self._sampler = None
+        self._cprofile = None
+        self.last_paths = paths
+        print(f"profile written: {base}.*", flush=True)
+        return paths
@@ -0,0 +1,180 @@
+"""
+Local history of finished runs, stored in SQLite (WAL mode).
+
+The game hands finished runs to record(), which only appends to a queue; a
+writer thread commits them in batches and then refreshes `summary` (personal
+best, percentile of the latest run, top-N) so the game-over screen never
+touches the database itself. The query methods can also be called directly
+from tools; each one is a single indexed lookup.
+"""
+import queue
+import sqlite3
+import threading
+
+# Column name -> SQL type, in table order. Matches Game.run_record().
+RUN_COLUMNS = (
+    ("ended_at", "REAL NOT NULL"),        # unix seconds
+    ("duration_s", "REAL NOT NULL"),
+    ("score", "INTEGER NOT NULL"),
+    ("multiplier", "REAL NOT NULL"),
+    ("fire_rate", "REAL NOT NULL"),
+    ("enemies_killed", "INTEGER NOT NULL"),
+    ("enemies_killed_by_gate", "INTEGER NOT NULL"),
+    ("orbs_collected", "INTEGER NOT NULL"),
+    ("powerups_collected", "INTEGER NOT NULL"),
+    ("gates_triggered", "INTEGER NOT NULL"),
+    ("boost_uses", "INTEGER NOT NULL"),
+    ("bombs_used", "INTEGER NOT NULL"),
+    ("extra_lives_earned", "INTEGER NOT NULL"),
+    ("fire_rate_doubles", "INTEGER NOT NULL"),
+    ("bosses_killed", "INTEGER NOT NULL"),  # bit i set = boss i+1 defeated
+)
+COLUMN_NAMES = tuple(name for name, _ in RUN_COLUMNS)
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, "
+    + ", ".join(f"{name} {kind}" for name, kind in RUN_COLUMNS)
+    + ")",
+    "CREATE INDEX IF NOT EXISTS runs_score ON runs(score)",
+    "CREATE INDEX IF NOT EXISTS runs_duration ON runs(duration_s)",
+    "CREATE INDEX IF NOT EXISTS runs_ended_at ON runs(ended_at)",
+)
+
+BATCH_MAX = 256
+TOP_N = 10
+
+
+def connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    for stmt in SCHEMA:
+        conn.execute(stmt)
+    conn.commit()
+    return conn
+
+
+class RunHistory:
+    """Batched writer plus fast queries over the runs table."""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = connect(path)
+        self._lock = threading.Lock()  # serializes use of the shared connection
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+
+        # Latest {score, runs, best, percentile, top} for the most recently recorded run
+        self.summary = None
+
+    # --- Writes ---
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._writer, name="geometrica-history", daemon=True
+        )
+        self._thread.start()
+
+    def record(self, run):
+        """Queue one finished run (a dict keyed by COLUMN_NAMES). Never blocks."""
+        self._queue.put(run)
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._conn.close()
+
+    def insert_many(self, runs):
+        rows = [tuple(run.get(name, 0) for name in COLUMN_NAMES) for run in runs]
+        placeholders = ", ".join("?" for _ in COLUMN_NAMES)
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT INTO runs ({', '.join(COLUMN_NAMES)}) VALUES ({placeholders})",
+                    rows,
+                )
+
+    def _writer(self):
+        while True:
+            batch = [self._queue.get()]
+            # Drain whatever else is already waiting into the same transaction
+            while len(batch) < BATCH_MAX:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            runs = [run for run in batch if run is not None]
+            if runs:
+                try:
+                    self.insert_many(runs)
+                    self.summary = self.summarize(runs[-1]["score"])
+                except sqlite3.Error:
+                    pass
+            if stop:
+                return
+
+    # --- Queries ---
+
+    def _query(self, sql, args=()):
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def count(self):
+        return self._query("SELECT COUNT(*) FROM runs")[0][0]
+
+    def personal_best(self):
+        """Highest-scoring run as a dict, or None."""
+        rows = self._query(
+            f"SELECT {', '.join(COLUMN_NAMES)} FROM runs ORDER BY score DESC LIMIT 1"
+        )
+        return dict(zip(COLUMN_NAMES, rows[0])) if rows else None
+
+    def top(self, n=TOP_N, by="score"):
+        """Top-n runs by score or duration_s, as dicts."""
+        if by not in ("score", "duration_s"):
+            raise ValueError(f"cannot rank runs by {by!r}")
+        rows = self._query(
+            f"SELECT {', '.join(COLUMN_NAMES)} FROM runs ORDER BY {by} DESC LIMIT ?", (n,)
+        )
+        return [dict(zip(COLUMN_NAMES, row)) for row in rows]
+
+    def percentile(self, score):
+        """Percentage of recorded runs that scored strictly less than `score`."""
+        (below, total), = self._query(
+            "SELECT (SELECT COUNT(*) FROM runs WHERE score < ?), (SELECT COUNT(*) FROM runs)",
+            (score,),
+        )
+        return 100.0 * below / total if total else 0.0
+
+    def trend(self, last=100, field="score"):
+        """(ended_at, value) for the last `last` runs, oldest first."""
+        if field not in COLUMN_NAMES:
+            raise ValueError(f"unknown run field {field!r}")
+        rows = self._query(
+            f"SELECT ended_at, {field} FROM runs ORDER BY ended_at DESC LIMIT ?", (last,)
+        )
+        rows.reverse()
+        return rows
+
+    def summarize(self, score):
+        best = self.personal_best()
+        return {
+            "score": score,
+            "runs": self.count(),
+            "best": best["score"] if best else 0,
+            "percentile": self.percentile(score),
+            "top": [(run["ended_at"], run["score"]) for run in self.top(TOP_N)],
+        }
+
+
+def bosses_mask(*killed):
+    mask = 0
+    for i, k in enumerate(killed):
+        if k:
+            mask |= 1 << i
+    return mask
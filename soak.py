@@ -0,0 +1,282 @@
+"""
+Long-session soak test.
+
+Drives the game headless under the autopilot for a number of simulated hours,
+restarting after every game over like a kiosk would, and samples at a fixed
+sim interval:
+
+- process RSS and tracemalloc current/peak, plus the lines whose allocations
+  grew most since the previous sample (with --tracemalloc)
+- the size of every per-run collection (bullets, enemies, orbs, gates, ...)
+- live object count and renderer cache sizes
+
+At the end a least-squares slope per simulated hour is fitted to each series
+(after a warm-up) and the run fails if a slope exceeds its threshold. The
+whole time series goes to a JSON report with stable keys, so reports from two
+versions can be diffed.
+
+    python soak.py --hours 4 --out soak-before.json
+    python soak.py --hours 0.25 --tracemalloc
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import gametime
+import index
+from autopilot import Autopilot
+from fonts import FontCache
+
+# Series name -> default allowed growth per simulated hour
+THRESHOLDS = {
+    "rss_mb": 16.0,
+    "traced_mb": 8.0,
+    "objects": 20_000,
+    "bullets": 20, "enemies": 20, "orbs": 20, "gates": 2, "fire_powerups": 5,
+    "floating_texts": 20, "bosses": 1, "boss_bullets": 50, "particles": 200,
+    "particle_sprites": 10,
+}
+
+
+def rss_mb():
+    """Current resident set size (Linux), else the peak from getrusage."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def entity_counts(game, renderer):
+    return {
+        "bullets": len(game.bullets),
+        "enemies": len(game.enemies),
+        "orbs": len(game.orbs),
+        "gates": len(game.gates),
+        "fire_powerups": len(game.fire_powerups),
+        "floating_texts": len(game.floating_texts),
+        "bosses": len(game.bosses),
+        "boss_bullets": len(game.boss_bullets),
+        "particles": len(game.particles),
+        "particle_sprites": len(renderer.particle_sprites),
+    }
+
+
+def slope_per_hour(points):
+    """Least-squares slope of [(sim_hours, value), ...]."""
+    n = len(points)
+    if n < 2:
+        return 0.0
+    mx = sum(x for x, _ in points) / n
+    my = sum(y for _, y in points) / n
+    sxx = sum((x - mx) ** 2 for x, _ in points)
+    if sxx == 0:
+        return 0.0
+    return sum((x - mx) * (y - my) for x, y in points) / sxx
+
+
+def where(stat):
+    frame = stat.traceback[0]
+    return f"{os.path.relpath(frame.filename)}:{frame.lineno}"
+
+
+def take_snapshot():
+    """tracemalloc snapshot without tracemalloc's own bookkeeping."""
+    return tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__),))
+
+
+def new_game(now):
+    game = index.Game()
+    game.handle_key(pygame.K_RETURN, now)  # leave the start menu
+    return game
+
+
+def run(args):
+    random.seed(args.seed)
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((args.width, args.height))
+    renderer = index.Renderer(screen, FontCache(args.font_cache))
+
+    # Sim time drives every timestamp the game takes
+    clock = {"now": 0.0}
+    gametime.set_source(lambda: int(clock["now"]))
+
+    if args.tracemalloc:
+        tracemalloc.start(args.trace_depth)
+
+    step = 1000.0 / index.FPS
+    total_steps = int(args.hours * 3600 * 1000 / step)
+    sample_every = max(1, int(args.sample_min * 60 * 1000 / step))
+    pilot = Autopilot()
+    prev_snapshot = None
+    game = new_game(0)
+    runs = 1
+    samples = []
+    wall0 = time.perf_counter()
+
+    for i in range(total_steps + 1):
+        now = clock["now"]
+        if game.state == "game_over":
+            game = new_game(now)
+            runs += 1
+        keys, taps = pilot.keys(game)
+        for key in taps:
+            game.handle_key(key, now)
+        game.update(keys, step, now)
+        if args.render_every and i % args.render_every == 0:
+            renderer.draw(game.snapshot(now))
+
+        if i % sample_every == 0:
+            sample = {
+                "sim_hours": round(now / 3_600_000, 4),
+                "wall_s": round(time.perf_counter() - wall0, 2),
+                "runs": runs,
+                "score": game.score,
+                "rss_mb": round(rss_mb(), 2),
+                "objects": len(gc.get_objects()),
+            }
+            if args.tracemalloc:
+                current, peak = tracemalloc.get_traced_memory()
+                sample["traced_mb"] = round(current / 2**20, 3)
+                sample["traced_peak_mb"] = round(peak / 2**20, 3)
+                # Lines that grew since the last sample: a steady leak shows
+                # up at the top sample after sample
+                snapshot = take_snapshot()
+                if prev_snapshot is not None:
+                    grown = [st for st in snapshot.compare_to(prev_snapshot, "lineno")
+                             if st.size_diff > 0][:args.top]
+                    sample["traced_growth"] = [
+                        {"where": where(st), "kb": round(st.size_diff / 1024, 1),
+                         "count": st.count_diff}
+                        for st in grown
+                    ]
+                prev_snapshot = snapshot
+            sample.update(entity_counts(game, renderer))
+            samples.append(sample)
+            if not args.quiet:
+                print(f"{sample['sim_hours']:7.3f}h  rss {sample['rss_mb']:8.1f} MB  "
+                      f"objects {sample['objects']:>8}  runs {runs:>4}  "
+                      f"enemies {sample['enemies']:>4}  gates {sample['gates']:>3}  "
+                      f"orbs {sample['orbs']:>4}", flush=True)
+
+        clock["now"] = now + step
+
+    top_allocators = []
+    if args.tracemalloc:
+        for stat in take_snapshot().statistics("lineno")[:args.top]:
+            top_allocators.append({
+                "where": where(stat),
+                "kb": round(stat.size / 1024, 1),
+                "count": stat.count,
+            })
+        prev_snapshot = None
+        tracemalloc.stop()
+    gametime.set_source(None)
+    pygame.quit()
+
+    # Fit trends after the warm-up, when caches and pools have filled
+    warm = [s for s in samples if s["sim_hours"] >= args.hours * args.warmup]
+    trends = {}
+    failures = []
+    for name, default in THRESHOLDS.items():
+        if not warm or name not in warm[0]:
+            continue
+        slope = slope_per_hour([(s["sim_hours"], s[name]) for s in warm])
+        limit = args.threshold.get(name, default)
+        trends[name] = {"per_hour": round(slope, 3), "limit": limit}
+        if slope > limit:
+            failures.append(name)
+
+    # Lines that kept growing after the warm-up, by how many samples they grew in
+    growers = {}
+    for s in warm:
+        for g in s.get("traced_growth", ()):
+            row = growers.setdefault(g["where"], {"where": g["where"], "samples": 0, "kb": 0.0})
+            row["samples"] += 1
+            row["kb"] = round(row["kb"] + g["kb"], 1)
+    growers = sorted(growers.values(), key=lambda r: (-r["samples"], -r["kb"]))[:args.top]
+
+    return {
+        "meta": {
+            "hours": args.hours, "seed": args.seed, "sample_min": args.sample_min,
+            "fps": index.FPS, "render_every": args.render_every,
+            "python": sys.version.split()[0], "pygame": pygame.version.ver,
+        },
+        "samples": samples,
+        "trends": trends,
+        "failures": failures,
+        "top_allocators": top_allocators,
+        "top_growers": growers,
+    }
+
+
+def parse_threshold(text):
+    name, _, value = text.partition("=")
+    if name not in THRESHOLDS or not value:
+        raise argparse.ArgumentTypeError(
+            f"expected NAME=VALUE with NAME one of {', '.join(THRESHOLDS)}"
+        )
+    return name, float(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geometrica soak test")
+    parser.add_argument("--hours", type=float, default=1.0, help="simulated hours")
+    parser.add_argument("--sample-min", type=float, default=5.0,
+                        help="simulated minutes between samples")
+    parser.add_argument("--warmup", type=float, default=0.1,
+                        help="fraction of the run ignored when fitting trends")
+    parser.add_argument("--render-every", type=int, default=10,
+                        help="draw every Nth step (0 = never)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="trace Python allocations (slower)")
+    parser.add_argument("--trace-depth", type=int, default=1)
+    parser.add_argument("--top", type=int, default=15, help="top allocators to report")
+    parser.add_argument("--threshold", type=parse_threshold, action="append", default=[],
+                        metavar="NAME=PER_HOUR", help="override a growth limit")
+    parser.add_argument("--out", default=None, help="JSON report path")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--font-cache", default=os.path.join(index.DATA_DIR, "font_cache.json"))
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+    args.threshold = dict(args.threshold)
+
+    report = run(args)
+    out = args.out or time.strftime("soak-%Y%m%d-%H%M%S.json")
+    with open(out, "w") as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+    print(f"\n{'series':<18}{'per hour':>12}{'limit':>10}")
+    for name, t in report["trends"].items():
+        flag = "  FAIL" if name in report["failures"] else ""
+        print(f"{name:<18}{t['per_hour']:>12.3f}{t['limit']:>10g}{flag}")
+    for a in report["top_allocators"]:
+        print(f"  {a['kb']:>10.1f} KB {a['count']:>8}  {a['where']}")
+    if report["top_growers"]:
+        print(f"\n{'grew in':>9}{'total KB':>12}  line")
+        for g in report["top_growers"]:
+            print(f"{g['samples']:>9}{g['kb']:>12.1f}  {g['where']}")
+    print(f"report: {out}")
+    sys.exit(1 if report["failures"] else 0)
+
+
+if __name__ == "__main__":
+    main()
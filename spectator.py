@@ -0,0 +1,487 @@
+"""
+Live spectating over TCP.
+
+SpectatorServer runs an asyncio server on a daemon thread and is fed from the
+frame loop through a present hook; anyone on the network can then watch the
+run with the bundled viewer:
+
+    GEOMETRICA_SPECTATE=0.0.0.0:7777 python index.py
+    python spectator.py 192.168.1.20:7777
+
+Wire format: every message is a HEADER (payload length, kind, seq, now)
+followed by a payload of channel sections and an optional JSON tail.
+
+- Entity positions are quantized to int16 world coordinates (the world fits
+  comfortably) and kept per channel as an (n, k) int16 array.
+- A DELTA section carries only the rows that differ from the previous tick
+  (uint32 indices), plus rows appended at the end; a channel that did not
+  change is left out.
+  Rows are matched by index, so a kill in the middle of a list also resends
+  the rows behind it.
+- The JSON tail carries the slow-moving fields (HUD, state, boss names,
+  enemy kind table) and only the keys that changed.
+- A KEYFRAME is the same encoding against an empty state.
+
+Each tick is encoded once and the same bytes go to every spectator, so the
+per-viewer cost is a socket write. A viewer whose socket buffer grows past
+HIGH_WATER stops receiving deltas; once it drains below LOW_WATER it is
+resynced with a keyframe and continues from there. Every viewer also gets a
+keyframe every KEYFRAME_INTERVAL ticks.
+
+Particles and floating score texts are cosmetic and high-churn, so they are
+not streamed.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+PORT = 7777
+KEYFRAME_INTERVAL = 120  # ticks
+HIGH_WATER = 256 * 1024  # bytes queued for one viewer before it is skipped
+LOW_WATER = 32 * 1024    # ... and below which it is resynced
+SEND_BUFFER = 64 * 1024  # kernel send buffer per viewer, so lag shows up as backpressure
+
+KEYFRAME = 1
+DELTA = 2
+
+HEADER = struct.Struct("<IBII")   # payload length, kind, seq, now (ms)
+SECTION = struct.Struct("<BII")   # channel id, row count, changed rows
+ANGLE_SCALE = 10000.0             # player angle in 1e-4 rad
+
+# (name, columns); the channel id is the index
+CHANNELS = (
+    ("player", 5),         # x, y, angle, invincible, boost_active
+    ("gates", 4),          # x1, y1, x2, y2
+    ("fire_powerups", 2),  # x, y
+    ("bullets", 2),
+    ("enemies", 3),        # kind, x, y   (kind indexes meta["kinds"])
+    ("bosses", 3),         # x, y, health (rest in meta["bosses"])
+    ("boss_bullets", 2),
+    ("orbs", 2),
+)
+_EMPTY = {name: np.zeros((0, cols), np.int16) for name, cols in CHANNELS}
+
+
+def parse_addr(text, default_host="127.0.0.1"):
+    """'7777' / 'host:7777' -> (host, port)."""
+    host, _, port = text.rpartition(":")
+    return host or default_host, int(port)
+
+
+def _rows(values, cols):
+    if not values:
+        return np.zeros((0, cols), np.int16)
+    a = np.rint(np.asarray(values, dtype=np.float64))
+    return np.clip(a, -32768, 32767).astype(np.int16)
+
+
+class StateEncoder:
+    """Quantizes RenderSnapshots and encodes them as keyframes or deltas."""
+
+    def __init__(self):
+        self.kinds = {}  # (type, radius, color) -> index into meta["kinds"]
+        self.arrays = _EMPTY
+        self.meta = {}
+
+    def quantize(self, snap):
+        kinds = self.kinds
+        enemies = []
+        for t, x, y, _, _, r, color in snap.enemies:
+            k = kinds.get((t, r, color))
+            if k is None:
+                k = kinds[(t, r, color)] = len(kinds)
+            enemies.append((k, x, y))
+        p = snap.player
+        angle = (p[4] + math.pi) % (2 * math.pi) - math.pi
+        arrays = {
+            "player": _rows([(p[0], p[1], angle * ANGLE_SCALE, p[6], p[7])], 5),
+            "gates": _rows([g[:4] for g in snap.gates], 4),
+            "fire_powerups": _rows([f[:2] for f in snap.fire_powerups], 2),
+            "bullets": _rows([b[:2] for b in snap.bullets], 2),
+            "enemies": _rows(enemies, 3),
+            "bosses": _rows([(b[1], b[2], b[8]) for b in snap.bosses], 3),
+            "boss_bullets": _rows([b[:2] for b in snap.boss_bullets], 2),
+            "orbs": _rows([o[:2] for o in snap.orbs], 2),
+        }
+        meta = {
+            "state": snap.state,
+            "elapsed": int(snap.elapsed_sec),
+            "hud": list(snap.hud),
+            "respawn": snap.respawn_start_time,
+            "stats": list(snap.stats),
+            "log": list(snap.event_log),
+            "kinds": [[t, r, list(c)] for (t, r, c) in sorted(kinds, key=kinds.get)],
+            "bosses": [[b[0], b[5], b[6], [list(c) for c in b[7]], b[9]] for b in snap.bosses],
+        }
+        return arrays, meta
+
+    def encode(self, snap):
+        """
+        Advance to `snap`; returns (delta message, keyframe factory). The
+        keyframe is only built if some viewer needs one this tick.
+        """
+        arrays, meta = self.quantize(snap)
+        delta = _message(DELTA, snap, self.arrays, arrays, self.meta, meta)
+        self.arrays, self.meta = arrays, meta
+        return delta, lambda: _message(KEYFRAME, snap, _EMPTY, arrays, {}, meta)
+
+
+def _message(kind, snap, prev, cur, prev_meta, meta):
+    sections = []
+    for cid, (name, _) in enumerate(CHANNELS):
+        a, b = prev[name], cur[name]
+        common = min(len(a), len(b))
+        changed = np.flatnonzero((a[:common] != b[:common]).any(axis=1))
+        if not len(changed) and len(a) == len(b):
+            continue
+        sections.append(SECTION.pack(cid, len(b), len(changed)))
+        sections.append(changed.astype(np.uint32).tobytes())
+        sections.append(b[changed].tobytes())
+        sections.append(b[common:].tobytes())
+    changes = {k: v for k, v in meta.items() if prev_meta.get(k) != v}
+    tail = json.dumps(changes, separators=(",", ":")).encode("utf-8") if changes else b""
+    payload = bytes([len(sections) // 4]) + b"".join(sections) + tail
+    return HEADER.pack(len(payload), kind, snap.seq & 0xFFFFFFFF,
+                       int(snap.now) & 0xFFFFFFFF) + payload
+
+
+class StateDecoder:
+    """Rebuilds the quantized state from a stream of messages."""
+
+    def __init__(self):
+        self.arrays = dict(_EMPTY)
+        self.meta = {}
+        self.synced = False
+
+    def apply(self, kind, payload):
+        """Apply one message; returns False while waiting for a keyframe."""
+        if kind == KEYFRAME:
+            self.arrays = dict(_EMPTY)
+            self.meta = {}
+            self.synced = True
+        elif not self.synced:
+            return False
+        view = memoryview(payload)
+        off = 1
+        for _ in range(payload[0]):
+            cid, n, changed = SECTION.unpack_from(view, off)
+            off += SECTION.size
+            name, cols = CHANNELS[cid]
+            prev = self.arrays[name]
+            common = min(len(prev), n)
+            rows = np.empty((n, cols), np.int16)
+            rows[:common] = prev[:common]
+            idx = np.frombuffer(view, np.uint32, changed, off)
+            off += 4 * changed
+            rows[idx] = np.frombuffer(view, np.int16, changed * cols, off).reshape(changed, cols)
+            off += 2 * changed * cols
+            tail = n - common
+            rows[common:] = np.frombuffer(view, np.int16, tail * cols, off).reshape(tail, cols)
+            off += 2 * tail * cols
+            self.arrays[name] = rows
+        if off < len(payload):
+            self.meta.update(json.loads(bytes(view[off:])))
+        return True
+
+    def fields(self, seq, now):
+        """RenderSnapshot keyword arguments for the current state (prev = current)."""
+        a = self.arrays
+        m = self.meta
+        x, y, angle, invincible, boost = a["player"][0].tolist() if len(a["player"]) else (0,) * 5
+        angle /= ANGLE_SCALE
+        kinds = [(t, r, tuple(c)) for t, r, c in m.get("kinds", ())]
+        bosses = []
+        for (bx, by, health), (name, r, style_id, colors, max_health) in zip(
+                a["bosses"].tolist(), m.get("bosses", ())):
+            bosses.append((name, bx, by, bx, by, r, style_id,
+                           tuple(tuple(c) for c in colors), health, max_health))
+        return dict(
+            seq=seq, now=now, published_at=time.perf_counter(), step_ms=1000.0 / 60,
+            state=m.get("state", "start_menu"), elapsed_sec=m.get("elapsed", 0),
+            player=(x, y, x, y, angle, angle, bool(invincible), bool(boost)),
+            gates=tuple((x1, y1, x2, y2, x1, y1, x2, y2)
+                        for x1, y1, x2, y2 in a["gates"].tolist()),
+            fire_powerups=tuple((x, y, x, y) for x, y in a["fire_powerups"].tolist()),
+            bullets=tuple((x, y, x, y) for x, y in a["bullets"].tolist()),
+            enemies=tuple((kinds[k][0], x, y, x, y, kinds[k][1], kinds[k][2])
+                          for k, x, y in a["enemies"].tolist()),
+            bosses=tuple(bosses),
+            boss_bullets=tuple((x, y, x, y) for x, y in a["boss_bullets"].tolist()),
+            orbs=tuple((x, y, x, y) for x, y in a["orbs"].tolist()),
+            particles=(),
+            floating_texts=(),
+            hud=tuple(m.get("hud", (0, 1.0, 0.0, 0, 0, 0))),
+            respawn_start_time=m.get("respawn"),
+            stats=tuple(m.get("stats", ())),
+            event_log=tuple(m.get("log", ())),
+        )
+
+
+class _Viewer:
+    __slots__ = ("writer", "transport", "task", "needs_keyframe", "skipped", "resyncs")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.task = asyncio.current_task()
+        self.transport = writer.transport
+        self.needs_keyframe = True
+        self.skipped = 0
+        self.resyncs = 0
+
+
+class SpectatorServer:
+    """Broadcasts presented frames to TCP spectators from a daemon thread."""
+
+    def __init__(self, host="127.0.0.1", port=PORT, keyframe_interval=KEYFRAME_INTERVAL,
+                 high_water=HIGH_WATER, low_water=LOW_WATER):
+        self.host = host
+        self.port = port
+        self.keyframe_interval = keyframe_interval
+        self.high_water = high_water
+        self.low_water = low_water
+
+        # Counters, read by benchmarks / status displays
+        self.ticks = 0
+        self.bytes_sent = 0
+        self.keyframes_sent = 0
+        self.encode_s = 0.0
+        self.errors = 0     # ticks the broadcaster failed to send
+        self.error = None   # the last such exception
+
+        self.encoder = StateEncoder()
+        self._viewers = set()
+        self._latest = None
+        self._last_seq = None
+        self._loop = None
+        self._thread = None
+        self._wake = None
+        self._server = None
+        self._task = None
+        self._ready = threading.Event()
+
+    @property
+    def viewers(self):
+        return len(self._viewers)
+
+    def stats(self):
+        viewers = list(self._viewers)
+        return {
+            "viewers": len(viewers),
+            "ticks": self.ticks,
+            "bytes_sent": self.bytes_sent,
+            "keyframes_sent": self.keyframes_sent,
+            "encode_ms": self.encode_s * 1000.0 / max(1, self.ticks),
+            "skipped": sum(v.skipped for v in viewers),
+            "resyncs": sum(v.resyncs for v in viewers),
+            "errors": self.errors,
+        }
+
+    # --- Game-facing API (any thread) ---
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="geometrica-spectate",
+                                        daemon=True)
+        self._thread.start()
+        self._ready.wait(2.0)
+
+    def publish(self, snap):
+        """Present hook: hand the latest frame to the server. Never blocks."""
+        if snap.seq == self._last_seq or self._loop is None:
+            return  # interpolated redraw of a state already sent
+        self._last_seq = snap.seq
+        self._latest = snap
+        self._loop.call_soon_threadsafe(self._wake.set)
+
+    def close(self, timeout=2.0):
+        if self._loop is None:
+            return
+        fut = asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        try:
+            fut.result(timeout)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._loop = None
+
+    # --- Background loop ---
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._wake = asyncio.Event()
+        self._server = loop.run_until_complete(asyncio.start_server(
+            self._serve_viewer, self.host, self.port, backlog=512))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._task = loop.create_task(self._broadcaster())
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    async def _shutdown(self):
+        self._task.cancel()
+        self._server.close()
+        tasks = [v.task for v in self._viewers]
+        for v in self._viewers:
+            v.writer.close()  # the handler sees EOF and returns
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _serve_viewer(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+        viewer = _Viewer(writer)
+        self._viewers.add(viewer)
+        try:
+            # Spectators never send anything; this just waits for the hang-up
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self._viewers.discard(viewer)
+            writer.close()
+
+    async def _broadcaster(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            try:
+                self._broadcast(self._latest)
+            except Exception as exc:
+                # Keep streaming; whoever missed this tick resyncs from a keyframe
+                self.errors += 1
+                self.error = exc
+                for v in self._viewers:
+                    v.needs_keyframe = True
+
+    def _broadcast(self, snap):
+        """Encode one tick and queue it (or a keyframe) for every viewer."""
+        t0 = time.perf_counter()
+        delta, make_keyframe = self.encoder.encode(snap)
+        self.encode_s += time.perf_counter() - t0
+        self.ticks += 1
+        periodic = self.ticks % self.keyframe_interval == 0
+        keyframe = None
+        for v in list(self._viewers):
+            if v.transport.is_closing():
+                self._viewers.discard(v)
+                continue
+            queued = v.transport.get_write_buffer_size()
+            if v.needs_keyframe or (periodic and queued <= self.low_water):
+                if queued > self.low_water:
+                    v.skipped += 1  # still draining; resync later
+                    continue
+                if keyframe is None:
+                    keyframe = make_keyframe()
+                    self.keyframes_sent += 1
+                v.writer.write(keyframe)
+                v.needs_keyframe = False
+                self.bytes_sent += len(keyframe)
+            elif queued > self.high_water:
+                # Too far behind: leave the delta chain, resync once drained
+                v.needs_keyframe = True
+                v.skipped += 1
+                v.resyncs += 1
+            else:
+                v.writer.write(delta)
+                self.bytes_sent += len(delta)
+
+
+# --- Client ---
+
+def read_messages(sock):
+    """Yield (kind, seq, now, payload) from a connected socket until EOF."""
+    f = sock.makefile("rb")
+    while True:
+        head = f.read(HEADER.size)
+        if len(head) < HEADER.size:
+            return
+        size, kind, seq, now = HEADER.unpack(head)
+        payload = f.read(size)
+        if len(payload) < size:
+            return
+        yield kind, seq, now, payload
+
+
+def watch(host, port, width=1280, height=720, fullscreen=False, frames=0):
+    """Connect to a SpectatorServer and draw the run with the game's Renderer."""
+    import pygame
+
+    import index
+    from fonts import FontCache
+
+    sock = socket.create_connection((host, port), timeout=5.0)
+    sock.settimeout(None)
+    decoder = StateDecoder()
+    latest = {"snap": None, "done": False}
+
+    def receive():
+        try:
+            for kind, seq, now, payload in read_messages(sock):
+                if decoder.apply(kind, payload):
+                    latest["snap"] = index.RenderSnapshot(**decoder.fields(seq, now))
+        except OSError:
+            pass
+        latest["done"] = True
+
+    threading.Thread(target=receive, name="geometrica-spectate-rx", daemon=True).start()
+
+    pygame.display.init()
+    pygame.font.init()
+    flags = pygame.FULLSCREEN if fullscreen else 0
+    screen = pygame.display.set_mode((0, 0) if fullscreen else (width, height), flags)
+    pygame.display.set_caption(f"Geometrica - watching {host}:{port}")
+    os.makedirs(index.DATA_DIR, exist_ok=True)
+    renderer = index.Renderer(screen, FontCache(os.path.join(index.DATA_DIR, "font_cache.json")))
+    clock = pygame.time.Clock()
+    drawn = 0
+    last_seq = None
+    running = True
+    while running and not latest["done"]:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (
+                    event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+        snap = latest["snap"]
+        if snap is not None and snap.seq != last_seq:
+            renderer.draw(snap)
+            pygame.display.flip()
+            last_seq = snap.seq
+            drawn += 1
+            if frames and drawn >= frames:
+                break
+        clock.tick(index.FPS)
+    sock.close()
+    pygame.quit()
+    return drawn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch a Geometrica run")
+    parser.add_argument("addr", help="HOST:PORT of the game (GEOMETRICA_SPECTATE)")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fullscreen", action="store_true")
+    parser.add_argument("--frames", type=int, default=0,
+                        help="exit after drawing N frames (0 = until the game closes)")
+    args = parser.parse_args()
+    host, port = parse_addr(args.addr)
+    drawn = watch(host, port, args.width, args.height, args.fullscreen, args.frames)
+    print(f"{drawn} frames drawn")
+
+
+if __name__ == "__main__":
+    main()
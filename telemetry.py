@@ -0,0 +1,176 @@
+"""
+Structured gameplay events.
+
+Game code emits typed events (kind + sim time + world position + a few
+fields) on an EventBus. The bus keeps a short ring buffer for the pause
+screen and forwards every event to its subscribers, e.g. a TelemetryWriter
+that streams them to a gzip-compressed JSONL file from a background thread.
+
+    python telemetry.py ~/.geometrica/telemetry/run-20260101-120000.jsonl.gz
+
+prints a per-kind summary of a recorded file.
+"""
+import gzip
+import json
+import queue
+import sys
+import threading
+import time
+from collections import Counter, deque, namedtuple
+
+# t: sim milliseconds since the run started; info: dict of kind-specific fields
+Event = namedtuple("Event", ["t", "kind", "x", "y", "info"])
+
+# Pause-screen wording for the kinds that show up in "Recent Events".
+# Kinds without an entry (kill) are streamed but not listed.
+MESSAGES = {
+    "boss_spawn": "{boss} appeared",
+    "boss_defeat": "{boss} defeated",
+    "bomb": "Bomb detonated",
+    "boost": "Boost activated",
+    "gate": "Gate triggered",
+    "powerup": "Fire rate increased to {fire_rate:.2f}/s",
+    "triangle_burst": "Triangle burst wave",
+    "star_swarm": "Star swarm appeared",
+    "extra_life": "Extra life earned (score {score})",
+    "fire_rate_x2": "Fire rate x2 milestone reached",
+    "bomb_earned": "Bomb +1 earned",
+    "death": "Life lost ({lives} left)",
+}
+
+RECENT_MAX = 40
+WRITER_QUEUE_MAX = 4096
+
+
+def format_event(ev):
+    m = int(ev.t // 60000)
+    s = int(ev.t // 1000 % 60)
+    return f"{m:02d}:{s:02d}  " + MESSAGES[ev.kind].format(**ev.info)
+
+
+class EventBus:
+    """Fan-out point for gameplay events."""
+
+    def __init__(self):
+        self.recent = deque(maxlen=RECENT_MAX)  # displayable events only
+        self.counts = Counter()
+        self._subscribers = []
+
+    def subscribe(self, fn):
+        self._subscribers.append(fn)
+
+    def emit(self, t, kind, x, y, **info):
+        ev = Event(t, kind, x, y, info)
+        self.counts[kind] += 1
+        if kind in MESSAGES:
+            self.recent.append(ev)
+        for fn in self._subscribers:
+            fn(ev)
+        return ev
+
+    def recent_lines(self, n):
+        """Formatted text for the last n displayable events, oldest first."""
+        start = max(0, len(self.recent) - n)
+        return tuple(format_event(self.recent[i]) for i in range(start, len(self.recent)))
+
+
+class TelemetryWriter:
+    """
+    Streams events to a gzip JSONL file on a background thread.
+
+    put() never blocks: when the bounded queue is full the event is dropped
+    and counted, so a slow disk can't stall the frame loop.
+    """
+
+    def __init__(self, path, maxsize=WRITER_QUEUE_MAX):
+        self.path = path
+        self._queue = queue.Queue(maxsize)
+        self._thread = None
+        self.written = 0
+        self.dropped = 0
+        self.error = None  # what stopped the writer thread, if anything did
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="geometrica-telemetry", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, ev):
+        try:
+            self._queue.put_nowait(ev)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self._thread is None:
+            return
+        # The sentinel must get through even when the queue is saturated, but
+        # only a live writer will ever make room for it
+        while self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        try:
+            self._write()
+        except Exception as exc:  # e.g. disk full; the game carries on without telemetry
+            self.error = exc
+
+    def _write(self):
+        with gzip.open(self.path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(json.dumps({"kind": "session_start", "wall": time.time()}) + "\n")
+            while True:
+                ev = self._queue.get()
+                if ev is None:
+                    break
+                record = {"t": ev.t, "kind": ev.kind,
+                          "x": round(ev.x, 1), "y": round(ev.y, 1)}
+                record.update(ev.info)
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                self.written += 1
+            f.write(json.dumps({"kind": "session_end", "wall": time.time(),
+                                "written": self.written, "dropped": self.dropped}) + "\n")
+
+
+def read_events(path):
+    """Yield the records of a telemetry file as dicts."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def summarize(path):
+    kinds = Counter()
+    kills_by = Counter()
+    end = None
+    last_t = 0
+    for rec in read_events(path):
+        kinds[rec["kind"]] += 1
+        if rec["kind"] == "kill":
+            kills_by[(rec.get("enemy"), rec.get("cause"))] += 1
+        if rec["kind"] == "session_end":
+            end = rec
+        last_t = max(last_t, rec.get("t", 0))
+
+    print(f"{path}: {sum(kinds.values())} records, last event at {last_t / 1000:.1f}s")
+    for kind, n in kinds.most_common():
+        print(f"  {kind:<16}{n:>8}")
+    if kills_by:
+        print("  kills by enemy/cause:")
+        for (enemy, cause), n in kills_by.most_common():
+            print(f"    {enemy}/{cause}: {n}")
+    if end is not None and end.get("dropped"):
+        print(f"  WARNING: writer dropped {end['dropped']} events")
+
+
+if __name__ == "__main__":
+    for arg in sys.argv[1:]:
+        summarize(arg)
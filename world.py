@@ -0,0 +1,168 @@
+"""
+Chunked large worlds.
+
+Normally the world is one small arena that is simulated in full. A large
+world (GEOMETRICA_WORLD=50000x50000) is cut into square chunks instead, and
+only the chunks within `radius` of the player's chunk are live: their gates,
+powerups and enemies are ordinary Game entities, and the rectangle they cover
+(the arena) stands in for the world rectangle when spawning and culling.
+
+ChunkedWorld only does the bookkeeping; Game turns entities into plain rows
+and back. When the player moves into another chunk, page() reports which
+chunks became live and which went cold. Game freezes whatever is in cold
+chunks with store() and gets the rows for the new live chunks from load().
+A chunk's gates and powerups are generated the first time it is loaded, by
+populate(rng, bounds) with a per-chunk RNG, so the same chunk always gets
+the same layout.
+
+Frozen rows are kept in full for the RESIDENT_CHUNKS most recently frozen
+chunks. Older ones are summarized down to counts (powerups, enemies per
+type), which are scattered back over the chunk, with its layout's gates
+regenerated, when it is loaded again; a chunk with nothing left in it is
+forgotten. Memory grows with the number of chunks the player left something
+in, not with the world's area, and the per-step cost only with what is in
+the arena.
+"""
+import math
+import random
+from collections import Counter, OrderedDict
+
+CHUNK_SIZE = 1600
+ACTIVE_RADIUS = 1      # live chunks around the player's: 1 = a 3x3 block
+RESIDENT_CHUNKS = 64   # cold chunks kept with full rows
+
+
+def parse_size(spec):
+    """"50000x40000" -> (50000, 40000)."""
+    w, sep, h = spec.lower().partition("x")
+    if not sep:
+        raise ValueError(f"world size must look like WIDTHxHEIGHT, not {spec!r}")
+    return int(w), int(h)
+
+
+def arena_of(x, y, width, height, chunk=CHUNK_SIZE, radius=ACTIVE_RADIUS):
+    """(x0, y0, x1, y1) covered by the live chunks when the player is at (x, y)."""
+    cx = min(math.ceil(width / chunk) - 1, max(0, int(x // chunk)))
+    cy = min(math.ceil(height / chunk) - 1, max(0, int(y // chunk)))
+    return (max(0, cx - radius) * chunk, max(0, cy - radius) * chunk,
+            min(width, (cx + radius + 1) * chunk), min(height, (cy + radius + 1) * chunk))
+
+
+class ChunkedWorld:
+    def __init__(self, width, height, populate, chunk=CHUNK_SIZE, radius=ACTIVE_RADIUS,
+                 resident=RESIDENT_CHUNKS, seed=0):
+        """populate(rng, bounds) -> (gate rows, powerup rows) for a new chunk."""
+        if resident < (2 * radius + 1) ** 2:
+            raise ValueError("resident must cover at least one full set of live chunks")
+        self.width = width
+        self.height = height
+        self.populate = populate
+        self.chunk = chunk
+        self.radius = radius
+        self.resident = resident
+        self.seed = seed
+        self.cols = math.ceil(width / chunk)
+        self.rows = math.ceil(height / chunk)
+        self.center = None         # the player's chunk
+        self.active = frozenset()  # live chunk keys
+        self.bounds = (0, 0, width, height)
+        # key -> [gate rows, powerup rows, enemy rows, generated], oldest first
+        self._frozen = OrderedDict()
+        # key -> (powerup count, Counter of enemy types, generated)
+        self._summaries = {}
+        self.pages = 0
+
+    def key_of(self, x, y):
+        return (min(self.cols - 1, max(0, int(x // self.chunk))),
+                min(self.rows - 1, max(0, int(y // self.chunk))))
+
+    def chunk_bounds(self, key):
+        c = self.chunk
+        cx, cy = key
+        return cx * c, cy * c, min(self.width, (cx + 1) * c), min(self.height, (cy + 1) * c)
+
+    def rng(self, key):
+        """The generator for a chunk's layout; the same on every visit."""
+        return random.Random(hash((self.seed,) + key))
+
+    def page(self, x, y):
+        """
+        Follow the player to (x, y). Returns (entered, left) chunk keys, both
+        empty unless the player changed chunk.
+        """
+        key = self.key_of(x, y)
+        if key == self.center:
+            return (), ()
+        self.center = key
+        cx, cy = key
+        r = self.radius
+        active = frozenset((i, j)
+                           for i in range(max(0, cx - r), min(self.cols, cx + r + 1))
+                           for j in range(max(0, cy - r), min(self.rows, cy + r + 1)))
+        entered = sorted(active - self.active)
+        left = sorted(self.active - active)
+        self.active = active
+        self.bounds = arena_of(x, y, self.width, self.height, self.chunk, r)
+        for key in left:
+            self._frozen[key] = [[], [], [], True]  # filled in by store()
+        self.pages += 1
+        return entered, left
+
+    def store(self, key, gates, powerups, enemies):
+        """Freeze rows into a cold chunk, on top of whatever it already holds."""
+        frozen = self._frozen.pop(key, None) or self._expand(key)
+        frozen[0].extend(gates)
+        frozen[1].extend(powerups)
+        frozen[2].extend(enemies)
+        self._frozen[key] = frozen
+        self._evict()
+
+    def _evict(self):
+        while len(self._frozen) > self.resident:
+            old, (_, powerups, enemies, generated) = self._frozen.popitem(last=False)
+            if powerups or enemies:
+                self._summaries[old] = (len(powerups), Counter(row[0] for row in enemies),
+                                        generated)
+
+    def load(self, key):
+        """(gate rows, powerup rows, enemy rows) for a chunk that just became live."""
+        frozen = self._frozen.pop(key, None) or self._expand(key)
+        gates, powerups, enemies, generated = frozen
+        if not generated:
+            new_gates, new_powerups = self.populate(self.rng(key), self.chunk_bounds(key))
+            gates.extend(new_gates)
+            powerups.extend(new_powerups)
+        return gates, powerups, enemies
+
+    def _expand(self, key):
+        """Rows scattered from a chunk's summary, or empty ones if it has none."""
+        summary = self._summaries.pop(key, None)
+        if summary is None:
+            return [[], [], [], False]
+        powerup_count, enemy_types, generated = summary
+        bounds = self.chunk_bounds(key)
+        x0, y0, x1, y1 = bounds
+        gates = list(self.populate(self.rng(key), bounds)[0]) if generated else []
+        powerups = [(random.uniform(x0, x1), random.uniform(y0, y1))
+                    for _ in range(powerup_count)]
+        enemies = [(t, random.uniform(x0, x1), random.uniform(y0, y1))
+                   for t, n in sorted(enemy_types.items()) for _ in range(n)]
+        return [gates, powerups, enemies, generated]
+
+    def fork(self):
+        """Independent copy of the bookkeeping (for Game.fork()); rows are shared tuples."""
+        dup = ChunkedWorld.__new__(ChunkedWorld)
+        dup.__dict__ = self.__dict__.copy()
+        dup._frozen = OrderedDict((key, [list(g), list(p), list(e), generated])
+                                  for key, (g, p, e, generated) in self._frozen.items())
+        dup._summaries = dict(self._summaries)
+        return dup
+
+    def stats(self):
+        """Chunk counts (for benchmarks)."""
+        return {
+            "live": len(self.active),
+            "frozen": len(self._frozen),
+            "summarized": len(self._summaries),
+            "frozen_rows": sum(len(g) + len(p) + len(e) for g, p, e, _ in self._frozen.values()),
+        }